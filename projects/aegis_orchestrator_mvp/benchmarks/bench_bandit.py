@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Variant-selection policies — wasted runs and per-call cost.
+
+Usage (from projects/aegis_orchestrator_mvp/):
+    python benchmarks/bench_bandit.py [--rounds 1000] [--trials 20] [--variants 8]
+
+Simulates `--rounds` flows choosing among `--variants` variants with fixed
+success rates (the best one last), averaged over `--trials` seeds:
+  wasted  — share of runs spent on a non-best variant
+  regret  — expected successes lost vs. always running the best variant
+"greedy" is the original rule (best rate once a variant has 20 trials, else
+the default, here the first variant). `us/call` times `bandit.choose`.
+"""
+
+import argparse, os, sys, time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src import bandit
+
+
+def _greedy(arms, s, f, rng):
+    n = s + f
+    ranked = sorted(
+        (i for i in range(len(arms)) if n[i]), key=lambda i: (-s[i] / n[i], -n[i])
+    )[:5]
+    return next((arms[i] for i in ranked if n[i] >= 20), arms[0])
+
+
+def _simulate(choose, rates, rounds, seed):
+    rng = np.random.default_rng(seed)
+    arms = [f"v{i}" for i in range(len(rates))]
+    s, f = np.zeros(len(arms)), np.zeros(len(arms))
+    wasted, regret = 0, 0.0
+    for _ in range(rounds):
+        i = arms.index(choose(arms, s, f, rng))
+        if rng.random() < rates[i]:
+            s[i] += 1
+        else:
+            f[i] += 1
+        wasted += i != len(arms) - 1
+        regret += rates[-1] - rates[i]
+    return wasted / rounds, regret
+
+
+def run(rounds, trials, n_variants):
+    rates = np.linspace(0.3, 0.7, n_variants)
+    policies = {"greedy": _greedy}
+    for name in sorted(bandit.POLICIES):
+        policies[name] = lambda a, s, f, rng, name=name: bandit.choose(
+            a, s, f, name, rng=rng
+        )
+
+    print(f"variants: {n_variants}, rates {rates[0]:.2f}..{rates[-1]:.2f}")
+    print(f"{'policy':>15} {'wasted':>8} {'regret':>8} {'us/call':>8}")
+    s = np.arange(n_variants) * 10.0
+    f = np.full(n_variants, 20.0)
+    for name, choose in policies.items():
+        results = [_simulate(choose, rates, rounds, seed) for seed in range(trials)]
+        wasted = np.mean([w for w, _ in results])
+        regret = np.mean([r for _, r in results])
+        rng = np.random.default_rng(0)
+        arms = [f"v{i}" for i in range(n_variants)]
+        start = time.perf_counter()
+        for _ in range(2000):
+            choose(arms, s, f, rng)
+        us = (time.perf_counter() - start) / 2000 * 1e6
+        print(f"{name:>15} {wasted:>8.1%} {regret:>8.1f} {us:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--variants", type=int, default=8)
+    args = parser.parse_args()
+    run(args.rounds, args.trials, args.variants)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+`feedback.best_variant` latency under concurrent `record` traffic.
+
+Usage (from projects/aegis_orchestrator_mvp/):
+    python benchmarks/bench_best_variant.py [--writers 4] [--variants 8] [--calls 2000]
+
+`--writers` threads call `feedback.record` in a loop against a temp database
+while the main thread times `best_variant` calls (as `build_flow` makes them):
+  sql     — the previous implementation: ORDER BY query on every call
+  memory  — `feedback.best_variant` as shipped (in-memory stats)
+  decayed — the same with a 1-day window and 6-hour half-life (hourly buckets)
+Reported: p50 / p99 per-call latency and the writers' records/sec meanwhile.
+"""
+
+import argparse, contextlib, io, os, sys, tempfile, threading, time
+from pathlib import Path
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src import feedback
+
+PIPELINE = "pipeline.bench.v0"
+
+
+def _sql_best_variant(pipeline: str, default: str = "default") -> str:
+    rows = (
+        feedback._connection()
+        .execute(
+            """SELECT variant, success, failure,
+                  (success * 1.0) / NULLIF(success + failure, 0) AS rate,
+                  (success + failure)                            AS n
+           FROM ab_stats WHERE pipeline = ?
+           ORDER BY rate DESC, n DESC LIMIT 5""",
+            (pipeline,),
+        )
+        .fetchall()
+    )
+    for v, s, f, r, n in rows:
+        if n >= 20:
+            print(f"[Best Variant] For pipeline '{pipeline}', selected '{v}'")
+            return v
+    print(f"[Best Variant] For pipeline '{pipeline}', defaulting to '{default}'")
+    return default
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _measure(lookup, n_writers, n_variants, n_calls):
+    stop = threading.Event()
+    written = [0] * n_writers
+
+    def writer(i):
+        j = 0
+        while not stop.is_set():
+            feedback.record(PIPELINE, f"var{j % n_variants}", (i + j) % 4 != 0)
+            j += 1
+        written[i] = j
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(n_writers)]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)  # let traffic build up
+        start = time.perf_counter()
+        samples = []
+        for _ in range(n_calls):
+            t0 = time.perf_counter()
+            lookup(PIPELINE)
+            samples.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for t in threads:
+            t.join()
+    samples.sort()
+    return (
+        _percentile(samples, 0.50) * 1e6,
+        _percentile(samples, 0.99) * 1e6,
+        sum(written) / (elapsed + 0.2),
+    )
+
+
+def run(n_writers, n_variants, n_calls):
+    print(f"{'lookup':>8} {'p50 (us)':>10} {'p99 (us)':>10} {'records/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, lookup in (
+            ("sql", _sql_best_variant),
+            ("memory", feedback.best_variant),
+            (
+                "decayed",
+                lambda p: feedback.best_variant(p, window=86400, half_life=21600),
+            ),
+        ):
+            feedback.configure(Path(tmp) / f"{name}.db")
+            p50, p99, rate = _measure(lookup, n_writers, n_variants, n_calls)
+            print(f"{name:>8} {p50:>10.1f} {p99:>10.1f} {rate:>10.0f}")
+    feedback.configure()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--variants", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.writers, args.variants, args.calls)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Feedback write-path benchmark — `feedback.record` records/sec.
+
+Usage (from projects/aegis_orchestrator_mvp/):
+    python benchmarks/bench_feedback.py [--records 5000] [--variants 8]
+
+Each variant writes to a fresh SQLite file in a temp dir, cycling through
+`--variants` (pipeline, variant) keys with a 90% success rate:
+  legacy  — SELECT, then UPDATE or INSERT, explicit commit; rollback journal,
+            synchronous=FULL (the behaviour before the upsert change)
+  upsert  — `feedback.record` as shipped: one INSERT ... ON CONFLICT statement,
+            WAL journal, synchronous=NORMAL
+  async   — `feedback.record` with the background writer (`start_writer()`),
+            including the final `flush()`
+  memory  — `feedback.record` on the in-memory backend: the cost of `record`
+            itself, without any storage I/O
+The per-call stdout logging of `record` is discarded in all cases.
+"""
+
+import argparse, contextlib, io, os, sqlite3, sys, tempfile, time
+from pathlib import Path
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src import feedback, feedback_backends
+
+
+def _legacy_record(con, pipeline_id, variant, success):
+    print(f"[Feedback Record] Pipeline: {pipeline_id}, Variant: {variant}")
+    with con:
+        cur = con.cursor()
+        cur.execute(
+            "SELECT success, failure FROM ab_stats WHERE pipeline = ? AND variant = ?",
+            (pipeline_id, variant),
+        )
+        row = cur.fetchone()
+        if row:
+            s, f = row[0] + bool(success), row[1] + (not success)
+            cur.execute(
+                """UPDATE ab_stats SET success = ?, failure = ?,
+                   updated = CURRENT_TIMESTAMP WHERE pipeline = ? AND variant = ?""",
+                (s, f, pipeline_id, variant),
+            )
+        else:
+            cur.execute(
+                "INSERT INTO ab_stats (pipeline, variant, success, failure) VALUES (?, ?, ?, ?)",
+                (pipeline_id, variant, int(bool(success)), int(not success)),
+            )
+        con.commit()
+
+
+def _keys(n_records, n_variants):
+    return [
+        (f"pipeline.bench.v{i % n_variants}", f"var{i % 3}", i % 10 != 0)
+        for i in range(n_records)
+    ]
+
+
+def _records_per_sec(write, keys, finish=None) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for pipeline_id, variant, success in keys:
+            write(pipeline_id, variant, success)
+        if finish is not None:
+            finish()
+        elapsed = time.perf_counter() - start
+    return len(keys) / elapsed
+
+
+def run(n_records, n_variants):
+    keys = _keys(n_records, n_variants)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = sqlite3.connect(Path(tmp) / "legacy.db")
+        legacy.execute("PRAGMA synchronous=FULL")
+        legacy.execute(feedback_backends._schema)
+        legacy_rate = _records_per_sec(
+            lambda p, v, s: _legacy_record(legacy, p, v, s), keys
+        )
+        legacy.close()
+
+        feedback.configure(Path(tmp) / "upsert.db")
+        upsert_rate = _records_per_sec(lambda p, v, s: feedback.record(p, v, s), keys)
+
+        feedback.start_writer(db_path=Path(tmp) / "async.db")
+        try:
+            async_rate = _records_per_sec(
+                lambda p, v, s: feedback.record(p, v, s),
+                keys,
+                finish=lambda: feedback.flush(timeout=60),
+            )
+        finally:
+            feedback.stop_writer()
+
+        feedback.configure(backend="memory")
+        memory_rate = _records_per_sec(lambda p, v, s: feedback.record(p, v, s), keys)
+        feedback.configure()
+
+    print(f"{'variant':>8} {'records/s':>12}")
+    print(f"{'legacy':>8} {legacy_rate:>12.0f}")
+    print(f"{'upsert':>8} {upsert_rate:>12.0f}")
+    print(f"{'async':>8} {async_rate:>12.0f}")
+    print(f"{'memory':>8} {memory_rate:>12.0f}")
+    print(
+        f"speed-up vs legacy: {upsert_rate / legacy_rate:.1f}x (upsert), "
+        f"{async_rate / legacy_rate:.1f}x (async)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--variants", type=int, default=8)
+    args = parser.parse_args()
+    run(args.records, args.variants)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+`feedback.record_many` against a loop of `feedback.record` calls.
+
+Usage (from projects/aegis_orchestrator_mvp/):
+    python benchmarks/bench_record_many.py [--events 1000] [--variants 8] [--repeat 5]
+
+Records `--events` outcomes spread over `--variants` (pipeline, variant)
+keys, `--repeat` times, on a fresh SQLite file and on the in-memory backend:
+  loop  — one `record` call per outcome (a transaction and a metric
+          increment each)
+  bulk  — one `record_many` call (one transaction, one increment per key)
+Reported: events/sec (best of the repeats). stdout logging is discarded.
+"""
+
+import argparse, contextlib, io, os, sys, tempfile, time
+from pathlib import Path
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src import feedback
+
+
+def _events(n_events, n_variants):
+    return [
+        {
+            "pipeline_id": f"pipeline.bench.v{i % n_variants}",
+            "variant": f"var{i % 3}",
+            "success": i % 10 != 0,
+            "tool_name": "BulkTool",
+            "duration_s": 0.01,
+        }
+        for i in range(n_events)
+    ]
+
+
+def _loop(events):
+    for event in events:
+        feedback.record(**event)
+
+
+def _best_rate(write, events, repeat) -> float:
+    best = 0.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            write(events)
+            best = max(best, len(events) / (time.perf_counter() - start))
+    return best
+
+
+def run(n_events, n_variants, repeat):
+    events = _events(n_events, n_variants)
+    print(f"{'backend':>8} {'loop/s':>12} {'bulk/s':>12} {'speed-up':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, options in (
+            ("sqlite", {"db_path": Path(tmp) / "bench.db"}),
+            ("memory", {"backend": "memory"}),
+        ):
+            feedback.configure(**options)
+            loop = _best_rate(_loop, events, repeat)
+            bulk = _best_rate(feedback.record_many, events, repeat)
+            print(f"{name:>8} {loop:>12.0f} {bulk:>12.0f} {bulk / loop:>8.1f}x")
+    feedback.configure()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--variants", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.events, args.variants, args.repeat)
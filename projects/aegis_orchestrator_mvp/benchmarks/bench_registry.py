@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Registry micro-benchmark — `get` hit / miss latency vs. manifest size.
+
+Usage (from projects/aegis_orchestrator_mvp/):
+    python benchmarks/bench_registry.py [--sizes 10 100 1000 5000] [--iters 2000]
+
+For each manifest size a synthetic agents.yaml is written to a temp dir and
+the registry is pointed at it. Reported per-call latencies:
+  hit         — class already cached
+  miss        — class evicted, manifest index warm (dict lookup + import)
+  miss/parse  — legacy behaviour: full YAML parse on every miss
+"""
+
+import argparse, os, sys, tempfile, time
+from pathlib import Path
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import yaml
+from src import registry
+
+
+def _write_manifest(path: Path, n: int):
+    entries = [
+        {
+            "id": f"Agent{i}",
+            "module": "risk",  # cheap, already-importable module
+            "classname": "Dict",
+            "version": "0.1.0",
+            "status": "active",
+        }
+        for i in range(n)
+    ]
+    path.write_text(yaml.safe_dump(entries))
+    # Age the file past the racy window so the stamp check is the fast path
+    old = time.time() - 10
+    os.utime(path, (old, old))
+
+
+def _per_call_us(fn, iters: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - start) / iters * 1e6
+
+
+def run(sizes, iters):
+    print(f"YAML loader: {registry._YAML_LOADER.__name__}")
+    print(f"{'entries':>8} {'hit (us)':>10} {'miss (us)':>10} {'miss/parse (us)':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        registry._REG_PATH = Path(tmp) / "agents.yaml"
+        for n in sizes:
+            _write_manifest(registry._REG_PATH, n)
+            registry._invalidate_index()
+            registry._cache.clear()
+            target = f"Agent{n // 2}"
+            registry.get(target)
+
+            hit = _per_call_us(lambda: registry.get(target), iters)
+
+            def miss():
+                registry._cache.pop(target, None)
+                registry.get(target)
+
+            warm_miss = _per_call_us(miss, iters)
+
+            def parse_miss():
+                registry._cache.pop(target, None)
+                registry._invalidate_index()
+                registry.get(target)
+
+            parse_iters = max(5, iters // max(1, n // 10))
+            cold_miss = _per_call_us(parse_miss, parse_iters)
+            print(f"{n:>8} {hit:>10.2f} {warm_miss:>10.2f} {cold_miss:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--iters", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.sizes, args.iters)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Registry contention benchmark — concurrent `get` throughput.
+
+Usage (from projects/aegis_orchestrator_mvp/):
+    python benchmarks/bench_registry_contention.py [--threads 1 4 16 64] [--calls 20000]
+
+Two scenarios, each compared with a legacy-style path that takes a single
+process-wide RLock around every lookup:
+  hits        — N threads hammer cached agents; reports total lookups/sec.
+  slow import — one thread imports an agent whose import takes --slow-ms;
+                reports the worst latency other threads see for cached agents
+                while that import is in flight.
+"""
+
+import argparse, os, sys, threading, time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src import registry
+
+_AGENTS = ["SlackAPI", "EmailAPI", "SQLTool", "PlannerAgent"]
+_legacy_lock = threading.RLock()
+
+
+def legacy_get(agent_id):
+    with _legacy_lock:
+        return registry.get(agent_id)
+
+
+def _hits(get, n_threads, calls):
+    per_thread = calls // n_threads
+    barrier = threading.Barrier(n_threads + 1)
+
+    def worker(i):
+        agent = _AGENTS[i % len(_AGENTS)]
+        barrier.wait()
+        for _ in range(per_thread):
+            get(agent)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return per_thread * n_threads / (time.perf_counter() - start)
+
+
+def _slow_import(get, n_threads, slow_s):
+    """Worst cached-lookup latency while another agent's import is running."""
+    real_import = registry.import_module
+    started, done = threading.Event(), threading.Event()
+
+    def slow(name):
+        if name == "src.risk":
+            started.set()
+            time.sleep(slow_s)
+        return real_import(name)
+
+    owners = dict(registry._module_owner)
+    users = {k: set(v) for k, v in registry._module_users.items()}
+    registry.import_module = slow
+    manifest = registry._manifest()
+    manifest["Slow"] = {
+        "id": "Slow",
+        "module": "risk",
+        "classname": "Dict",
+        "status": "active",
+    }
+    worst = [0.0] * n_threads
+
+    def worker(i):
+        while not started.wait(0.01):
+            if done.is_set():
+                return  # the import finished (or failed) without the hook
+        agent = _AGENTS[i % len(_AGENTS)]
+        while not done.is_set():
+            t0 = time.perf_counter()
+            get(agent)
+            worst[i] = max(worst[i], time.perf_counter() - t0)
+            time.sleep(0.001)  # paced callers, not GIL-saturating spinners
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    try:
+        for t in threads:
+            t.start()
+        get("Slow")
+    finally:
+        done.set()
+        for t in threads:
+            t.join()
+        registry.import_module = real_import
+        with registry._lock:
+            registry._drop({"Slow"})
+            for key in [k for k in registry._retired.keys() if k[0] == "Slow"]:
+                registry._retired.pop(key, None)  # typing.Dict never drains
+            registry._module_owner.clear()
+            registry._module_owner.update(owners)
+            registry._module_users.clear()
+            registry._module_users.update(users)
+        manifest.pop("Slow", None)
+    if not started.is_set():
+        raise RuntimeError("the slow import never ran; src.risk was not imported")
+    return max(worst)
+
+
+def run(thread_counts, calls, slow_ms):
+    for agent in _AGENTS:
+        registry.get(agent)
+
+    print(f"{'threads':>8} {'lock-free get/s':>16} {'locked get/s':>14}")
+    for n in thread_counts:
+        fast = _hits(registry.get, n, calls)
+        slow = _hits(legacy_get, n, calls)
+        print(f"{n:>8} {fast:>16,.0f} {slow:>14,.0f}")
+
+    n = max(thread_counts)
+    print(f"\nWorst cached-lookup latency during a {slow_ms} ms import ({n} threads):")
+    print(
+        f"  lock-free: {_slow_import(registry.get, n, slow_ms / 1000) * 1000:8.2f} ms"
+    )
+    print(f"  locked:    {_slow_import(legacy_get, n, slow_ms / 1000) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--slow-ms", type=int, default=200)
+    args = parser.parse_args()
+    run(args.threads, args.calls, args.slow_ms)
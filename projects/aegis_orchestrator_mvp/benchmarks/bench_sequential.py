@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Sequential A/B testing — traffic until a decision and error rate under peeking.
+
+Usage (from projects/aegis_orchestrator_mvp/):
+    python benchmarks/bench_sequential.py [--runs 200] [--max-n 5000] [--alpha 0.05]
+
+Two variants split traffic evenly for up to `--max-n` runs each, with the
+counts checked after every run. For several rate gaps (0 = an A/A test):
+  decided — share of experiments that declared a winner
+  wrong   — share that declared the worse (or, for A/A, any) variant winner
+  median n — runs per variant when the decision was made
+`sequential` is `sequential.evaluate`; `peeking z` is a fixed-n two-sided
+z-test (p < alpha) re-run at every check, the "eyeballing" it replaces.
+"""
+
+import argparse, os, sys
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src import sequential
+
+BASE_RATE = 0.5
+CHECK_EVERY = 10  # runs per variant between checks
+
+
+def _first_decision(sa, sb, n, alpha, method):
+    """Index of the first check that decides, and whether b won."""
+    fa, fb = n - sa, n - sb
+    if method == "sequential":
+        lower, upper = sequential.confidence_sequence(
+            np.stack([sa, sb]), np.stack([fa, fb]), alpha / 2
+        )
+        b_wins = lower[1] > upper[0]
+        a_wins = lower[0] > upper[1]
+    else:
+        pooled = (sa + sb) / (2 * n)
+        se = np.sqrt(2 * pooled * (1 - pooled) / n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (sb - sa) / n / se
+        b_wins, a_wins = z > 1.96, z < -1.96
+    decided = np.flatnonzero(a_wins | b_wins)
+    if not len(decided):
+        return None, None
+    return decided[0], bool(b_wins[decided[0]])
+
+
+def run(n_runs, max_n, alpha):
+    rng = np.random.default_rng(0)
+    n = np.arange(CHECK_EVERY, max_n + 1, CHECK_EVERY)
+    print(f"{'gap':>5} {'method':>11} {'decided':>8} {'wrong':>7} {'median n':>9}")
+    for gap in (0.0, 0.02, 0.05, 0.1):
+        for method in ("sequential", "peeking z"):
+            decisions, wrong = [], 0
+            for _ in range(n_runs):
+                a = np.cumsum(rng.random(max_n) < BASE_RATE)[n - 1]
+                b = np.cumsum(rng.random(max_n) < BASE_RATE + gap)[n - 1]
+                index, b_won = _first_decision(a, b, n, alpha, method)
+                if index is None:
+                    continue
+                decisions.append(n[index])
+                wrong += gap == 0 or not b_won
+            median = f"{np.median(decisions):.0f}" if decisions else "-"
+            print(
+                f"{gap:>5.2f} {method:>11} {len(decisions) / n_runs:>8.1%} "
+                f"{wrong / n_runs:>7.1%} {median:>9}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--max-n", type=int, default=5000)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    args = parser.parse_args()
+    run(args.runs, args.max_n, args.alpha)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Multi-process feedback write throughput vs. shard count.
+
+Usage (from projects/aegis_orchestrator_mvp/):
+    python benchmarks/bench_sharding.py [--workers 8] [--records 2000] [--shards 1,2,4,8]
+
+`--workers` processes each call `feedback.record` `--records` times (inline
+commits, spread over 64 pipelines) against a fresh sharded SQLite store in a
+temp dir. With 1 shard every commit contends on the same write lock; with N
+shards, pipelines hash to N files. Reported: total records/sec across all
+workers (start barrier to the last worker finishing) and speed-up vs 1 shard.
+"""
+
+import argparse, contextlib, io, multiprocessing, os, sys, tempfile, time
+from pathlib import Path
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src import feedback
+
+N_PIPELINES = 64
+
+
+def _worker(path, shards, worker, n_records, barrier):
+    with contextlib.redirect_stdout(io.StringIO()):
+        feedback.configure(path, backend="sharded", shards=shards)
+        barrier.wait()
+        for j in range(n_records):
+            pipeline = f"pipeline.bench.p{(worker * 7 + j) % N_PIPELINES}"
+            feedback.record(pipeline, f"var{j % 3}", j % 10 != 0)
+
+
+def _records_per_sec(shards, n_workers, n_records) -> float:
+    ctx = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "feedback.db"
+        barrier = ctx.Barrier(n_workers + 1)
+        procs = [
+            ctx.Process(target=_worker, args=(path, shards, w, n_records, barrier))
+            for w in range(n_workers)
+        ]
+        for p in procs:
+            p.start()
+        barrier.wait()  # every worker has its store open
+        start = time.perf_counter()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+        if any(p.exitcode for p in procs):
+            raise RuntimeError("a benchmark worker failed")
+    return n_workers * n_records / elapsed
+
+
+def run(n_workers, n_records, shard_counts):
+    print(f"workers: {n_workers}, records/worker: {n_records}")
+    print(f"{'shards':>6} {'records/s':>12} {'speed-up':>9}")
+    baseline = None
+    for shards in shard_counts:
+        rate = _records_per_sec(shards, n_workers, n_records)
+        baseline = baseline or rate
+        print(f"{shards:>6} {rate:>12.0f} {rate / baseline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--shards", default="1,2,4,8")
+    args = parser.parse_args()
+    run(args.workers, args.records, [int(n) for n in args.shards.split(",")])
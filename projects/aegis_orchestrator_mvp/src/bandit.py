@@ -0,0 +1,81 @@
+"""
+Bandit policies for A/B variant selection.
+
+Each policy scores every variant of a pipeline in one vectorised NumPy pass
+over the `ab_stats` counts and the highest score wins:
+
+• thompson        — one draw from each variant's Beta(success + 1, failure + 1)
+                    posterior; explores in proportion to its uncertainty.
+• ucb1            — mean + sqrt(2 ln N / n); untried variants score +inf.
+• epsilon_greedy  — best mean, but a uniformly random variant with
+                    probability `epsilon`.
+
+`feedback.best_variant(pipeline, policy=...)` uses these; "greedy" (the
+original highest-rate-after-20-trials rule) stays the default there.
+"""
+
+import threading
+from typing import Sequence
+
+import numpy as np
+
+EPSILON = 0.1
+
+_local = threading.local()  # numpy Generators are not thread-safe
+
+
+def _rng() -> np.random.Generator:
+    rng = getattr(_local, "rng", None)
+    if rng is None:
+        rng = _local.rng = np.random.default_rng()
+    return rng
+
+
+def thompson(successes: np.ndarray, failures: np.ndarray, rng) -> np.ndarray:
+    return rng.beta(successes + 1.0, failures + 1.0)
+
+
+def ucb1(successes: np.ndarray, failures: np.ndarray, rng) -> np.ndarray:
+    n = successes + failures
+    total = n.sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = successes / n + np.sqrt(2.0 * np.log(max(total, 1.0)) / n)
+    scores[n == 0] = np.inf
+    return scores
+
+
+def epsilon_greedy(successes: np.ndarray, failures: np.ndarray, rng) -> np.ndarray:
+    if rng.random() < EPSILON:
+        return rng.random(len(successes))
+    n = successes + failures
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(n > 0, successes / n, 0.0)
+
+
+POLICIES = {
+    "thompson": thompson,
+    "ucb1": ucb1,
+    "epsilon_greedy": epsilon_greedy,
+}
+
+
+def choose(
+    variants: Sequence[str],
+    successes: Sequence[int],
+    failures: Sequence[int],
+    policy: str = "thompson",
+    rng: np.random.Generator = None,
+) -> str:
+    """Pick one of `variants` given their success / failure counts."""
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown bandit policy '{policy}'")
+    if not variants:
+        raise ValueError("No variants to choose from")
+    scores = POLICIES[policy](
+        np.asarray(successes, dtype=float),
+        np.asarray(failures, dtype=float),
+        rng if rng is not None else _rng(),
+    )
+    best = np.flatnonzero(scores == scores.max())
+    index = best[0] if len(best) == 1 else (rng or _rng()).choice(best)
+    return variants[int(index)]
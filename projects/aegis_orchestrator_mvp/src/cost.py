@@ -0,0 +1,75 @@
+"""
+Per-tool cost accounting.
+
+Cost models are declared per agent in `agents.yaml`:
+  - id: "PlannerAgent"
+    ...
+    cost:
+      per_call: 0.0       # USD per invocation
+      per_token: 0.0000006  # USD per LLM token reported in the result
+      per_row: 0.0        # USD per row returned / affected
+
+Usage is read from the tool result:
+  tokens <- result["usage"]["total_tokens"] (or prompt + completion tokens),
+            result["tokens"]
+  rows   <- len(result["data"]) when it is a list, result["rows_affected"],
+            result["rows"]
+"""
+
+from typing import Dict
+
+COST_KEYS = ("per_call", "per_token", "per_row")
+
+
+def usage(result) -> Dict[str, int]:
+    """Extract token / row usage from a tool result (missing -> 0)."""
+    tokens = rows = 0
+    if isinstance(result, dict):
+        u = result.get("usage")
+        if isinstance(u, dict):
+            tokens = u.get("total_tokens") or (
+                (u.get("prompt_tokens") or 0) + (u.get("completion_tokens") or 0)
+            )
+        elif isinstance(result.get("tokens"), int):
+            tokens = result["tokens"]
+
+        if isinstance(result.get("data"), list):
+            rows = len(result["data"])
+        elif isinstance(result.get("rows_affected"), int):
+            rows = max(result["rows_affected"], 0)
+        elif isinstance(result.get("rows"), int):
+            rows = result["rows"]
+    return {"tokens": int(tokens or 0), "rows": int(rows or 0)}
+
+
+def task_cost(model: Dict, result) -> float:
+    """USD cost of one invocation under `model` given its `result`."""
+    if not model:
+        return 0.0
+    u = usage(result)
+    return (
+        float(model.get("per_call", 0.0))
+        + float(model.get("per_token", 0.0)) * u["tokens"]
+        + float(model.get("per_row", 0.0)) * u["rows"]
+    )
+
+
+class CostLedger:
+    """Accumulates cost per task and per flow against an optional budget."""
+
+    def __init__(self, budget: float = None):
+        self.budget = budget
+        self.per_task = {}
+        self.total = 0.0
+
+    def charge(self, task_id: str, amount: float) -> float:
+        self.per_task[task_id] = self.per_task.get(task_id, 0.0) + amount
+        self.total += amount
+        return self.total
+
+    @property
+    def exceeded(self) -> bool:
+        return self.budget is not None and self.total > self.budget
+
+    def remaining(self):
+        return None if self.budget is None else self.budget - self.total
@@ -0,0 +1,160 @@
+"""
+Pre-execution latency & cost estimator for planned task graphs.
+
+• `observe(agent_id, seconds, cost_usd)` — the orchestrator feeds every task
+  run into a bounded per-agent sample reservoir.
+• `preload(history)` — preloads the reservoirs with persisted run times (the
+  orchestrator passes `feedback.durations()` once per process), so a fresh
+  process does not start from DEFAULT_LATENCY.
+• `estimate(graph)` — predicts p50 / p95 makespan and expected cost before
+  the graph is committed.
+
+The orchestrator runs a flow's tasks one after another, so by default the
+makespan is the sum of the task durations. `parallel=True` models tasks that
+declare `dependencies` as a DAG whose independent branches overlap (the
+longest path), for when branches actually run concurrently. The p50/p95 come
+from a small seeded Monte Carlo over the per-agent samples, rather than
+summing per-task p95s.
+Agents with no history borrow the pooled samples of all agents (or
+`DEFAULT_LATENCY` on a cold start) and are reported in `unknown_agents`.
+"""
+
+import random, threading
+from collections import deque
+from typing import Callable, Dict, List
+
+DEFAULT_LATENCY = 1.0  # seconds, used before any history exists
+_MAX_SAMPLES = 512  # per agent
+_N_SIMULATIONS = 256
+
+_lock = threading.Lock()
+_latency = {}  # agent_id -> deque of seconds
+_cost = {}  # agent_id -> (total_usd, n)
+
+
+def observe(agent_id: str, seconds: float, cost_usd: float = None):
+    """Record one task run for `agent_id`."""
+    with _lock:
+        samples = _latency.get(agent_id)
+        if samples is None:
+            samples = _latency[agent_id] = deque(maxlen=_MAX_SAMPLES)
+        samples.append(seconds)
+        if cost_usd is not None:
+            total, n = _cost.get(agent_id, (0.0, 0))
+            _cost[agent_id] = (total + cost_usd, n + 1)
+
+
+def preload(history: Dict[str, List[float]]):
+    """Preload run times ({agent_id: [seconds, ...]}, oldest first).
+
+    Seeded samples go behind the ones observed in this process, so live
+    runs are kept when the reservoir overflows.
+    """
+    with _lock:
+        for agent_id, seconds in history.items():
+            samples = deque(seconds, maxlen=_MAX_SAMPLES)
+            live = _latency.get(agent_id) or ()
+            samples.extend(live)
+            _latency[agent_id] = samples
+
+
+def reset():
+    with _lock:
+        _latency.clear()
+        _cost.clear()
+
+
+def task_dependencies(tasks: List[Dict]) -> Dict[str, List[str]]:
+    """task_id -> upstream task ids (`dependencies`, else the previous task)."""
+    ids = [t["id"] for t in tasks]
+    if not any("dependencies" in t for t in tasks):
+        return {tid: ids[i - 1 : i] for i, tid in enumerate(ids)}
+    known = set(ids)
+    return {
+        t["id"]: [d for d in t.get("dependencies") or [] if d in known] for t in tasks
+    }
+
+
+def topo_order(upstream: Dict[str, List[str]]) -> List[str]:
+    order, state = [], {}
+
+    def visit(tid):
+        if state.get(tid) == 2:
+            return
+        if state.get(tid) == 1:
+            raise ValueError(f"Dependency cycle at task '{tid}'")
+        state[tid] = 1
+        for dep in upstream[tid]:
+            visit(dep)
+        state[tid] = 2
+        order.append(tid)
+
+    for tid in upstream:
+        visit(tid)
+    return order
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def estimate(
+    graph: Dict,
+    cost_model: Callable[[str], Dict] = None,
+    seed: int = 0,
+    parallel: bool = False,
+):
+    """Predict makespan (p50/p95 seconds) and expected cost for `graph`.
+
+    `cost_model(agent_id)` is consulted for agents with no observed cost
+    (their declared `per_call` price is used). Tasks run sequentially unless
+    `parallel` is set (see the module docstring).
+    """
+    tasks = graph.get("tasks", [])
+    upstream = task_dependencies(tasks)
+    order = topo_order(upstream)  # also rejects dependency cycles
+    if not parallel:
+        ids = [t["id"] for t in tasks]
+        upstream = {tid: ids[i - 1 : i] for i, tid in enumerate(ids)}
+        order = ids
+    agent_of = {t["id"]: t.get("agent") for t in tasks}
+
+    with _lock:
+        pooled = [s for samples in _latency.values() for s in samples]
+        samples = {
+            tid: list(_latency.get(agent_of[tid]) or ()) or pooled for tid in order
+        }
+        observed_cost = dict(_cost)
+        unknown = sorted(
+            {agent_of[tid] for tid in order if agent_of[tid] not in _latency}, key=str
+        )
+
+    rng = random.Random(seed)
+    makespans = []
+    for _ in range(_N_SIMULATIONS):
+        finish = {}
+        for tid in order:
+            s = samples[tid]
+            duration = rng.choice(s) if s else DEFAULT_LATENCY
+            finish[tid] = duration + max(
+                (finish[d] for d in upstream[tid]), default=0.0
+            )
+        makespans.append(max(finish.values(), default=0.0))
+    makespans.sort()
+
+    cost_usd = 0.0
+    for tid in order:
+        agent = agent_of[tid]
+        if agent in observed_cost:
+            total, n = observed_cost[agent]
+            cost_usd += total / n
+        elif cost_model is not None:
+            cost_usd += float((cost_model(agent) or {}).get("per_call", 0.0))
+
+    return {
+        "p50_seconds": _quantile(makespans, 0.50),
+        "p95_seconds": _quantile(makespans, 0.95),
+        "cost_usd": cost_usd,
+        "unknown_agents": unknown,
+    }
@@ -1,13 +1,58 @@
 """
 Lightweight reward & A/B tracker.
 Writes results to Prometheus via custom metrics and
-persists variant stats in `feedback.db` (SQLite).
+persists variant stats through a storage backend (feedback_backends.py):
+`feedback.db` (SQLite) by default, `configure(path)` or FEEDBACK_DB_PATH
+picks another file; `configure(backend="memory")` or FEEDBACK_BACKEND selects
+another backend. Nothing is opened until the first `record` / `best_variant`.
+
+By default `record` commits synchronously. `start_writer()` (or
+FEEDBACK_ASYNC=1) switches it to a background `FeedbackWriter`: events go on a
+bounded in-memory queue and are aggregated per (pipeline, variant) and
+committed in batches, so tool calls no longer wait on the disk. Pending events
+are flushed by `flush()`, `stop_writer()` and at interpreter exit;
+`best_variant` counts them right away.
+
+Every `record` is also appended to the `feedback_events` log (tool, duration,
+inputs / output / error capped at PAYLOAD_LIMIT characters); `rollup()` folds
+new events into hourly per-variant aggregates (`ab_stats_hourly`; backends
+without an event log cursor maintain them on write). `record_duration` logs a
+task's run time without counting an outcome; `durations()` reads them back
+(the estimator is seeded from them).
+
+`best_variant` is answered from per-pipeline stats held in memory: loaded from
+the DB on first use, updated by every `record` and re-read from the DB every
+STATS_RECONCILE_SECONDS by a background thread (`refresh_stats`, which also
+runs `rollup()`), so writes from other processes show up while the lookup
+itself never flushes, rolls up or waits on a write lock.
+
+Besides lifetime totals the in-memory stats keep hourly buckets (the last
+STATS_HORIZON_SECONDS), so `best_variant(..., window=..., half_life=...)`
+ranks variants on a sliding window and / or exponentially decayed counts in
+O(buckets) — a variant that degraded recently stops winning on old successes.
+FEEDBACK_WINDOW_SECONDS / FEEDBACK_HALF_LIFE_SECONDS set the defaults.
+
+Experiments are tested sequentially (sequential.py): always-valid confidence
+intervals on the lifetime counts declare winners and losers as soon as the
+data allows, `experiment_status(pipeline)` reports them and `best_variant`
+stops selecting losers (FEEDBACK_RETIRE_LOSERS=0 turns that off).
 """
 
-import sqlite3, time
+import atexit, json, os, queue, threading, time
+from contextlib import contextmanager, nullcontext
 from prometheus_client import Counter
 from pathlib import Path  # Added for Path
 
+from . import bandit, sequential
+from .feedback_backends import BUCKET_SECONDS, FeedbackBackend, SQLiteBackend, create
+from .metrics import (
+    EXPERIMENT_DECISIONS,
+    EXPERIMENT_STATUS,
+    FEEDBACK_DROPPED,
+    FEEDBACK_FLUSH_SECONDS,
+    FEEDBACK_QUEUE_DEPTH,
+)
+
 VARIANT_METRIC = Counter(
     "variant_success_total", "Success count per variant", ["pipeline_id", "variant"]
 )
@@ -19,27 +64,92 @@ _PROJECT_ROOT = (
 _DB_PATH = _PROJECT_ROOT / "data"
 _DB_FILE = _DB_PATH / "feedback.db"
 
-_schema = """
-CREATE TABLE IF NOT EXISTS ab_stats (
-  pipeline TEXT,
-  variant  TEXT,
-  success  INTEGER,
-  failure  INTEGER,
-  updated  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-  PRIMARY KEY (pipeline, variant)
-);
-"""
+PAYLOAD_LIMIT = 2048  # characters kept per inputs / output / error payload
+
+
+def _cap(payload):
+    """Serialise `payload` to at most PAYLOAD_LIMIT characters (None stays)."""
+    if payload is None:
+        return None
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+    if len(text) > PAYLOAD_LIMIT:
+        text = text[:PAYLOAD_LIMIT] + "...[truncated]"
+    return text
+
+
+# Variant selection policy: "greedy" or a bandit policy (see bandit.py)
+POLICY = os.getenv("FEEDBACK_POLICY", "greedy")
+WINDOW_SECONDS = float(os.getenv("FEEDBACK_WINDOW_SECONDS", 0)) or None
+HALF_LIFE_SECONDS = float(os.getenv("FEEDBACK_HALF_LIFE_SECONDS", 0)) or None
+SEQUENTIAL_ALPHA = float(os.getenv("FEEDBACK_SEQUENTIAL_ALPHA", sequential.ALPHA))
+RETIRE_LOSERS = os.getenv("FEEDBACK_RETIRE_LOSERS", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+
+_backend = None  # set by configure(), on first use at the latest
+_backend_lock = threading.RLock()  # serialises configure() / first use
+_db_file = None  # path of the SQLite backend, None for other backends
+
+
+def configure(db_path=None, backend=None, **options) -> FeedbackBackend:
+    """Select the storage backend; a running background writer is flushed
+    and stopped first.
+
+    `backend` is a FeedbackBackend instance or a name from
+    feedback_backends.BACKENDS (default FEEDBACK_BACKEND, else "sqlite");
+    `options` go to its constructor. For SQLite, `db_path` defaults to
+    FEEDBACK_DB_PATH, else data/feedback.db (the base name of the shard
+    files for "sharded").
+    """
+    global _backend, _db_file
+    with _backend_lock:
+        stop_writer()
+        if not isinstance(backend, FeedbackBackend):
+            name = backend or ("sqlite" if db_path else os.getenv("FEEDBACK_BACKEND"))
+            name = name or "sqlite"
+            if name in ("sqlite", "sharded"):
+                options.setdefault(
+                    "path", db_path or os.getenv("FEEDBACK_DB_PATH") or _DB_FILE
+                )
+            backend = create(name, **options)
+        previous, _backend = _backend, backend
+        _db_file = getattr(backend, "path", None)
+        if previous is not None and previous is not backend:
+            previous.close()
+        invalidate_stats()
+    return backend
+
+
+def get_backend() -> FeedbackBackend:
+    """The active backend, configured from the environment on first use."""
+    current = _backend
+    if current is None:
+        with _backend_lock:
+            current = _backend or configure()
+    return current
+
+
+def _connection():
+    """This thread's connection to the SQLite backend (tests, tooling)."""
+    return get_backend().connection()
 
-# Ensure the directory for the SQLite DB exists
-_DB_PATH.mkdir(parents=True, exist_ok=True)
 
-con = sqlite3.connect(_DB_FILE)
-con.execute(_schema)
-con.commit()
+def _after_fork():
+    global _writer, _stats_lock, _backend_lock, _experiments_lock
+    global _commits_in_flight
+    # The child starts without the parent's threads: fall back to inline
+    # writes (backends reopen their connections on the new pid).
+    _writer = None
+    _stats_lock = threading.Lock()  # may have been held by a parent thread
+    _commits_in_flight = 0
+    _pending.clear()  # the parent's queue commits them, not ours
+    _backend_lock = threading.RLock()
+    _experiments_lock = threading.Lock()
 
-# Ensure the connection is closed when the module is unloaded or program exits
-# This is a bit tricky with global connections, but good practice to consider.
-# For simple scripts, it might be okay, but for long-running apps, manage connections carefully.
+
+os.register_at_fork(after_in_child=_after_fork)
 
 
 def record(
@@ -50,8 +160,13 @@ def record(
     inputs: dict = None,
     output: dict = None,
     error_message: str = None,
+    duration_s: float = None,
 ):
-    """Records the outcome of a particular variant execution."""
+    """Records the outcome of a particular variant execution.
+
+    Updates the `ab_stats` counters and appends the full event (tool,
+    size-capped inputs / output / error, duration) to `feedback_events`.
+    """
     VARIANT_METRIC.labels(pipeline_id, variant).inc()  # Prometheus metric
 
     # Ensure inputs/outputs are serializable if they are being stored or logged elsewhere in future.
@@ -63,78 +178,695 @@ def record(
     if error_message:
         print(f"[Feedback Record Error] {error_message}")
 
-    with con:  # SQLite database update
-        cur = con.cursor()
-        # Check if row exists
-        cur.execute(
-            "SELECT success, failure FROM ab_stats WHERE pipeline = ? AND variant = ?",
-            (pipeline_id, variant),
+    event = _event(
+        pipeline_id,
+        variant,
+        success,
+        tool_name,
+        inputs,
+        output,
+        error_message,
+        duration_s,
+    )
+    counts = {(pipeline_id, variant): (int(bool(success)), int(not success))}
+
+    writer = _writer
+    if writer is not None:
+        if writer.submit(pipeline_id, variant, success, event):
+            _bump([event], queued=True)
+        return
+
+    with _commit_window([event]):
+        get_backend().write([event], counts)
+
+
+def _event(
+    pipeline_id,
+    variant,
+    success,
+    tool_name="N/A",
+    inputs=None,
+    output=None,
+    error_message=None,
+    duration_s=None,
+) -> tuple:
+    return (
+        time.time(),
+        pipeline_id,
+        variant,
+        tool_name,
+        None if success is None else int(bool(success)),
+        None if duration_s is None else duration_s * 1000.0,
+        _cap(error_message),
+        _cap(inputs),
+        _cap(output),
+    )
+
+
+def record_many(events) -> int:
+    """Record a batch of outcomes at once (batch tools, batch dispatch).
+
+    `events` are dicts of `record` keyword arguments (`pipeline_id`,
+    `variant`, `success`, optional `tool_name`, `inputs`, `output`,
+    `error_message`, `duration_s`). Counts are aggregated per
+    (pipeline, variant) in memory and written in one transaction (or one
+    queue put with the background writer), with one metric increment per
+    label set. A `success` of None makes the event timing-only, as in
+    `record_duration`. Returns the number of events recorded.
+    """
+    rows = [_event(**e) for e in events]
+    if not rows:
+        return 0
+    counts = {}
+    for _, pipeline_id, variant, _, success, *_ in rows:
+        if success is None:  # timing-only: logged, never counted
+            continue
+        s, f = counts.get((pipeline_id, variant), (0, 0))
+        counts[(pipeline_id, variant)] = (s + success, f + (not success))
+    for (pipeline_id, variant), (s, f) in counts.items():
+        VARIANT_METRIC.labels(pipeline_id, variant).inc(s + f)
+
+    failures = sum(f for _, f in counts.values())
+    print(
+        f"[Feedback Record] {len(rows)} events ({failures} failed) across {len(counts)} pipeline/variant pairs"
+    )
+
+    writer = _writer
+    if writer is not None:
+        if writer.submit_many([(row[1], row[2], row[4], row) for row in rows]):
+            _bump(rows, queued=True)
+        return len(rows)
+
+    with _commit_window(rows):
+        get_backend().write(rows, counts)
+    return len(rows)
+
+
+def record_duration(
+    tool_name: str, duration_s: float, pipeline_id: str = None, variant: str = None
+):
+    """Log one task run time for `tool_name` (e.g. an agent id).
+
+    Timing-only: the event has no outcome (`success` is NULL), so it never
+    counts towards the A/B stats or the hourly aggregates.
+    """
+    event = _event(pipeline_id, variant, None, tool_name, duration_s=duration_s)
+    writer = _writer
+    if writer is not None:
+        writer.submit(pipeline_id, variant, None, event)
+        return
+    get_backend().write([event], {})
+
+
+def durations(limit: int = 10_000) -> dict:
+    """{tool: [seconds, ...]} from the last `limit` `record_duration` events,
+    oldest first; pending background writes included."""
+    flush()
+    history = {}
+    for tool, duration_ms in reversed(get_backend().durations(limit)):
+        history.setdefault(tool, []).append(duration_ms / 1000.0)
+    return history
+
+
+def rollup() -> int:
+    """Fold events appended since the last rollup into `ab_stats_hourly`.
+
+    Incremental: the SQLite backend keeps a cursor (last folded event id) in
+    `feedback_rollup` and advances it in the same transaction, so each event
+    is counted exactly once however often this runs. Returns the number of
+    events folded in (always 0 for backends that aggregate on write).
+    """
+    return get_backend().rollup()
+
+
+def report():
+    """Lifetime (pipeline, variant, success, failure) rows for every
+    pipeline, merged across shards; pending background writes included."""
+    flush()
+    return sorted(get_backend().report())
+
+
+def hourly_stats(pipeline: str, since: float = None):
+    """Hourly (variant, bucket_start, success, failure, avg_duration_ms)
+    rows for `pipeline`, oldest bucket first (SQLite also folds in events
+    not rolled up yet)."""
+    rows = [
+        (v, bucket, s, f, total / n if n else None)
+        for v, bucket, s, f, total, n in get_backend().hourly(pipeline, since or 0)
+    ]
+    return sorted(rows, key=lambda row: (row[1], row[0]))
+
+
+# ----------------------------------------------------------------------
+# In-memory variant stats: pipeline -> {variant: [success, failure]} plus
+# pipeline -> {variant: {bucket: [success, failure]}} for the hourly buckets,
+# loaded from the DB on first use, bumped by `record` and re-read from the DB
+# every STATS_RECONCILE_SECONDS (refresh_stats) to pick up other processes.
+#
+# A re-read must neither lose nor double-count this process's writes:
+# * events still queued in the background writer are kept in `_pending` and
+#   added on top of every snapshot until their batch commits;
+# * a snapshot is only swapped in if no in-process commit overlapped the read
+#   (`_commit_generation` unchanged, none in flight), else it is retried.
+STATS_RECONCILE_SECONDS = 30.0
+STATS_HORIZON_SECONDS = 30 * 24 * 3600  # hourly buckets kept in memory
+
+_stats_lock = threading.Lock()
+_stats = {}
+_buckets = {}
+_stats_loaded = {}  # pipeline -> monotonic time of the last DB load
+_last_choice = {}  # pipeline -> variant last reported by best_variant
+_pending = {}  # (pipeline, variant, bucket) -> [success, failure] still queued
+_commit_generation = 0  # bumped when an in-process commit starts
+_commits_in_flight = 0
+_refresher_pid = None  # pid whose background refresh thread is running
+
+
+def _outcomes(events):
+    """{(pipeline, variant, bucket): (success, failure)} of outcome events."""
+    outcomes = {}
+    for ts, pipeline_id, variant, _, success, *_ in events:
+        if success is None:
+            continue  # timing-only event
+        key = (pipeline_id, variant, int(ts // BUCKET_SECONDS) * BUCKET_SECONDS)
+        s, f = outcomes.get(key, (0, 0))
+        outcomes[key] = (s + success, f + (not success))
+    return outcomes
+
+
+def _add_loaded(outcomes):
+    """Add outcomes to the loaded stats (call under _stats_lock)."""
+    for (pipeline_id, variant, bucket), (s, f) in outcomes.items():
+        variants = _stats.get(pipeline_id)
+        if variants is None:
+            continue  # not loaded yet; the first lookup reads the DB
+        buckets = _buckets[pipeline_id].setdefault(variant, {})
+        for row in (
+            variants.setdefault(variant, [0, 0]),
+            buckets.setdefault(bucket, [0, 0]),
+        ):
+            row[0] += s
+            row[1] += f
+
+
+def _add_pending(outcomes, sign: int):
+    """Track outcomes queued (+1) / committed (-1) by the writer (under lock)."""
+    for key, (s, f) in outcomes.items():
+        row = _pending.setdefault(key, [0, 0])
+        row[0] += sign * s
+        row[1] += sign * f
+        if row == [0, 0]:
+            del _pending[key]
+
+
+def _bump(events, queued: bool = False):
+    """Count `events` in the loaded stats; `queued` ones also in _pending
+    until the writer commits them."""
+    outcomes = _outcomes(events)
+    with _stats_lock:
+        _add_loaded(outcomes)
+        if queued:
+            _add_pending(outcomes, 1)
+
+
+@contextmanager
+def _commit_window(events, queued: bool = False):
+    """Bracket a backend write of `events` so no stats snapshot straddles it.
+
+    Inline writes are counted in the loaded stats once committed; writer
+    batches (`queued`) were counted when submitted and leave _pending.
+    """
+    global _commit_generation, _commits_in_flight
+    outcomes = _outcomes(events)
+    with _stats_lock:
+        _commit_generation += 1
+        _commits_in_flight += 1
+    committed = False
+    try:
+        yield
+        committed = True
+    finally:
+        with _stats_lock:
+            _commits_in_flight -= 1
+            if queued:
+                _add_pending(outcomes, -1)  # in the store now (or dropped)
+            elif committed:
+                _add_loaded(outcomes)
+
+
+def _load_stats(pipeline: str, attempts: int = 3):
+    """Swap in `pipeline`'s stats as stored plus the still-queued outcomes.
+
+    Read-only: no flush and no rollup (SQLite's `hourly` folds in events not
+    rolled up yet), so it never waits on a write lock. A read overlapped by
+    an in-process commit is retried; the last attempt is kept regardless
+    and corrected by the next refresh.
+    """
+    store = get_backend()
+    for attempt in range(attempts):
+        with _stats_lock:
+            generation, busy = _commit_generation, _commits_in_flight
+        totals = store.totals(pipeline)
+        hourly = store.hourly(pipeline, time.time() - STATS_HORIZON_SECONDS)
+        with _stats_lock:
+            if busy or generation != _commit_generation:
+                if attempt < attempts - 1:
+                    continue
+            stats = {v: [s, f] for v, s, f in totals}
+            buckets = {}
+            for v, bucket, s, f, *_ in hourly:
+                buckets.setdefault(v, {})[bucket] = [s, f]
+            for (pipeline_id, v, bucket), (s, f) in _pending.items():
+                if pipeline_id != pipeline:
+                    continue
+                for row in (
+                    stats.setdefault(v, [0, 0]),
+                    buckets.setdefault(v, {}).setdefault(bucket, [0, 0]),
+                ):
+                    row[0] += s
+                    row[1] += f
+            _stats[pipeline] = stats
+            _buckets[pipeline] = buckets
+            _stats_loaded[pipeline] = time.monotonic()
+            return
+
+
+def refresh_stats(pipeline: str = None):
+    """Roll up new events and re-read the stats of `pipeline` (default: every
+    loaded one) from the store.
+
+    Runs every STATS_RECONCILE_SECONDS in a background thread, started by the
+    first stats lookup; call it directly to pick up other processes' writes
+    right away.
+    """
+    try:
+        get_backend().rollup()  # bring ab_stats_hourly up to date (incremental)
+    except Exception as e:
+        print(f"[Feedback Rollup Error] {e}")
+    for name in [pipeline] if pipeline else list(_stats_loaded):
+        _load_stats(name)
+
+
+def _refresh_loop():
+    while True:
+        time.sleep(max(0.1, STATS_RECONCILE_SECONDS))
+        try:
+            refresh_stats()
+        except Exception as e:  # keep refreshing through a bad pass
+            print(f"[Feedback Stats Error] Refresh failed: {e}")
+
+
+def _start_refresher():
+    global _refresher_pid
+    if _refresher_pid == os.getpid():
+        return
+    with _backend_lock:
+        if _refresher_pid == os.getpid():
+            return
+        _refresher_pid = os.getpid()  # a forked child starts its own
+        threading.Thread(
+            target=_refresh_loop, name="feedback-stats-refresh", daemon=True
+        ).start()
+
+
+def _variant_stats(pipeline: str, window: float = None, half_life: float = None):
+    """(variant, success, failure) rows for `pipeline`, from memory.
+
+    Lifetime totals by default. `window` keeps only the hourly buckets
+    overlapping the last `window` seconds; `half_life` weights each bucket
+    by 0.5 ** (age / half_life), giving fractional effective counts.
+    """
+    if pipeline not in _stats_loaded:
+        _load_stats(pipeline)
+        _start_refresher()
+    with _stats_lock:
+        if window is None and half_life is None:
+            return [(v, s, f) for v, (s, f) in _stats.get(pipeline, {}).items()]
+        now = time.time()
+        rows = []
+        for v, buckets in _buckets.get(pipeline, {}).items():
+            s_sum = f_sum = 0.0
+            for bucket, (s, f) in buckets.items():
+                if window is not None and bucket + BUCKET_SECONDS <= now - window:
+                    continue
+                weight = 1.0
+                if half_life is not None:
+                    age = max(0.0, now - (bucket + BUCKET_SECONDS / 2))
+                    weight = 0.5 ** (age / half_life)
+                s_sum += s * weight
+                f_sum += f * weight
+            rows.append((v, s_sum, f_sum))
+        return rows
+
+
+def invalidate_stats(pipeline: str = None):
+    """Drop cached stats (all pipelines by default); next lookup re-reads."""
+    with _stats_lock:
+        if pipeline is None:
+            _stats.clear()
+            _buckets.clear()
+            _stats_loaded.clear()
+            _experiments.clear()
+        else:
+            _stats.pop(pipeline, None)
+            _buckets.pop(pipeline, None)
+            _stats_loaded.pop(pipeline, None)
+            _experiments.pop(pipeline, None)
+
+
+BACKPRESSURE_POLICIES = ("block", "drop")
+_STOP = object()
+
+
+class FeedbackWriter:
+    """Background writer that commits queued feedback events in batches.
+
+    A batch is committed once `batch_size` events are pending or
+    `flush_interval` seconds after its first event, whichever comes first:
+    the events are appended to the log and the aggregated counters upserted
+    in one transaction. Every `rollup_interval` seconds the writer also runs
+    `rollup()`. It writes to `backend` (default: the active one), or to its
+    own SQLiteBackend at `db_path`.
+    When the queue (`max_queue` events) is full, policy "block" waits up to
+    `put_timeout` seconds for space and "drop" gives up immediately; dropped
+    events are counted in `feedback_dropped_total`.
+    """
+
+    def __init__(
+        self,
+        db_path=None,
+        backend: FeedbackBackend = None,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_queue: int = 10_000,
+        policy: str = "block",
+        put_timeout: float = 1.0,
+        rollup_interval: float = 60.0,
+    ):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{policy}'")
+        self._owns_backend = backend is None and db_path is not None
+        if self._owns_backend:
+            backend = SQLiteBackend(str(db_path))
+        self.backend = backend or get_backend()
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.put_timeout = put_timeout
+        self.rollup_interval = rollup_interval
+        self.counted = False  # set by start_writer: record() counts queued events
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(
+            target=self._run, name="feedback-writer", daemon=True
         )
-        row = cur.fetchone()
-
-        if row:
-            current_success = row[0]
-            current_failure = row[1]
-            if success:
-                current_success += 1
-            else:
-                current_failure += 1
-            cur.execute(
-                """
-                UPDATE ab_stats 
-                SET success = ?, failure = ?, updated = CURRENT_TIMESTAMP
-                WHERE pipeline = ? AND variant = ?
-            """,
-                (current_success, current_failure, pipeline_id, variant),
+        self._thread.start()
+
+    def submit(
+        self, pipeline_id: str, variant: str, success: bool, event: tuple = None
+    ) -> bool:
+        """Queue one event (plus its log row); False if dropped by backpressure."""
+        try:
+            self._queue.put(
+                (
+                    pipeline_id,
+                    variant,
+                    None if success is None else bool(success),
+                    event,
+                ),
+                block=self.policy == "block",
+                timeout=self.put_timeout,
             )
-        else:
-            # Insert new row
-            if success:
-                cur.execute(
-                    "INSERT INTO ab_stats (pipeline, variant, success, failure) VALUES (?, ?, 1, 0)",
-                    (pipeline_id, variant),
-                )
-            else:
-                cur.execute(
-                    "INSERT INTO ab_stats (pipeline, variant, success, failure) VALUES (?, ?, 0, 1)",
-                    (pipeline_id, variant),
-                )
-        con.commit()  # Explicit commit after insert/update
+        except queue.Full:
+            FEEDBACK_DROPPED.labels("queue_full").inc()
+            return False
+        FEEDBACK_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def submit_many(self, items) -> bool:
+        """Queue (pipeline_id, variant, success, event) items as one entry;
+        False if the whole batch was dropped by backpressure."""
+        items = list(items)
+        try:
+            self._queue.put(
+                items, block=self.policy == "block", timeout=self.put_timeout
+            )
+        except queue.Full:
+            FEEDBACK_DROPPED.labels("queue_full").inc(len(items))
+            return False
+        FEEDBACK_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Commit everything queued so far; False on timeout."""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Flush pending events and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        pending, events, count, deadline = {}, [], 0, None
+        last_rollup = time.monotonic()
+        try:
+            while True:
+                wait = None
+                if deadline is not None:
+                    wait = max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=wait)
+                except queue.Empty:
+                    item = None  # flush interval elapsed
+                if isinstance(item, (tuple, list)):  # one event / a batch
+                    for pipeline_id, variant, success, event in (
+                        item if isinstance(item, list) else (item,)
+                    ):
+                        if success is not None:  # None: timing-only event
+                            s, f = pending.get((pipeline_id, variant), (0, 0))
+                            pending[(pipeline_id, variant)] = (
+                                s + success,
+                                f + (not success),
+                            )
+                        if event is not None:
+                            events.append(event)
+                        count += 1
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                    if count < self.batch_size:
+                        continue
+                self._commit(pending, events, count)
+                pending, events, count, deadline = {}, [], 0, None
+                FEEDBACK_QUEUE_DEPTH.set(self._queue.qsize())
+                if (
+                    item is _STOP
+                    or time.monotonic() - last_rollup >= self.rollup_interval
+                ):
+                    self._rollup()
+                    last_rollup = time.monotonic()
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is _STOP:
+                    return
+        finally:
+            if self._owns_backend:
+                self.backend.close()
+
+    def _rollup(self):
+        try:
+            self.backend.rollup()
+        except Exception as e:
+            print(f"[Feedback Writer Error] Rollup failed: {e}")
+
+    def _commit(self, pending, events, count):
+        if not pending and not events:
+            return
+        start = time.perf_counter()
+        try:
+            # Only the writer record() feeds has its events counted in memory
+            window = _commit_window(events, queued=True) if self.counted else None
+            with window or nullcontext():
+                self.backend.write(events, pending)
+        except Exception as e:  # keep the writer thread alive
+            print(f"[Feedback Writer Error] Dropping {count} events: {e}")
+            FEEDBACK_DROPPED.labels("commit_failed").inc(count)
+            return
+        FEEDBACK_FLUSH_SECONDS.observe(time.perf_counter() - start)
 
 
-def best_variant(pipeline: str, default: str = "default") -> str:
+_writer = None
+
+
+def start_writer(**kwargs) -> FeedbackWriter:
+    """Route `record` through a background `FeedbackWriter` (idempotent)."""
+    global _writer
+    if _writer is None:
+        writer = FeedbackWriter(**kwargs)
+        writer.counted = True
+        _writer = writer
+    return _writer
+
+
+def stop_writer(timeout: float = 5.0):
+    """Flush and stop the background writer; `record` commits inline again."""
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """Commit events queued by the background writer (no-op when inline)."""
+    writer = _writer
+    return True if writer is None else writer.flush(timeout)
+
+
+atexit.register(stop_writer)
+
+
+# ----------------------------------------------------------------------
+# Sequential testing: pipeline -> (counts the evaluation is for, evaluation)
+_experiments = {}
+_experiments_lock = threading.Lock()
+_STATUS_VALUES = {sequential.WINNER: 1, sequential.RUNNING: 0, sequential.LOSER: -1}
+
+
+def _evaluate(pipeline: str, alpha: float = None):
+    alpha = alpha or SEQUENTIAL_ALPHA
+    stats = sorted(_variant_stats(pipeline))
+    key = (tuple(stats), alpha)
+    with _experiments_lock:
+        cached = _experiments.get(pipeline)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        result = sequential.evaluate(
+            [v for v, _, _ in stats],
+            [s for _, s, _ in stats],
+            [f for _, _, f in stats],
+            alpha,
+        )
+        previous = cached[1] if cached else {}
+        _experiments[pipeline] = (key, result)
+    for variant, info in result.items():
+        status = info["status"]
+        EXPERIMENT_STATUS.labels(pipeline, variant).set(_STATUS_VALUES[status])
+        if status != sequential.RUNNING and (
+            previous.get(variant, {}).get("status") != status
+        ):
+            EXPERIMENT_DECISIONS.labels(pipeline, status).inc()
+            print(
+                f"[Experiment] Pipeline '{pipeline}': '{variant}' declared {status} (rate: {info['rate']:.2f}, interval: [{info['lower']:.2f}, {info['upper']:.2f}])"
+            )
+    return result
+
+
+def experiment_status(pipeline: str, alpha: float = None) -> dict:
+    """Sequential-test status of `pipeline`'s variants.
+
+    {"pipeline", "alpha", "state": "decided" | "running", "winner",
+     "variants": {variant: {successes, failures, rate, lower, upper,
+     status}}}, where status is "winner", "loser" or "running" and
+    [lower, upper] is the always-valid interval on the success rate.
+    """
+    result = _evaluate(pipeline, alpha)
+    winner = next(
+        (v for v, info in result.items() if info["status"] == sequential.WINNER),
+        None,
+    )
+    return {
+        "pipeline": pipeline,
+        "alpha": alpha or SEQUENTIAL_ALPHA,
+        "state": "running" if winner is None else "decided",
+        "winner": winner,
+        "variants": {v: dict(info) for v, info in result.items()},
+    }
+
+
+def best_variant(
+    pipeline: str,
+    default: str = "default",
+    policy: str = None,
+    variants=None,
+    window: float = None,
+    half_life: float = None,
+    retire_losers: bool = None,
+) -> str:
     """
     Return the variant with highest success-rate (>=20 trials) or `default`.
+
+    Served from the in-memory stats: O(variants), no query per call. Ranking
+    matches the original SQL: rate desc, then trials desc, top 5 considered.
+
+    `policy` (default FEEDBACK_POLICY, else "greedy") may instead name a
+    bandit policy from bandit.py ("thompson", "ucb1", "epsilon_greedy"),
+    which chooses among `variants` (candidate arms, including untried ones)
+    plus every variant already recorded for the pipeline.
+
+    `window` / `half_life` (seconds; defaults FEEDBACK_WINDOW_SECONDS /
+    FEEDBACK_HALF_LIFE_SECONDS, unset = lifetime totals) rank on recent or
+    decayed counts instead; the 20-trial minimum then applies to those.
+
+    Variants the sequential test has declared losers (on lifetime counts,
+    see `experiment_status`) are never selected unless `retire_losers` (default
+    FEEDBACK_RETIRE_LOSERS) is False; if `default` is one of them, the best
+    remaining variant stands in for it.
     """
-    # Ensure we use the global `con` established in the module.
-    # No need to sqlite3.connect() here again if `con` is module-level.
-    cur = con.execute(
-        """SELECT variant,
-                  success, failure,
-                  (success * 1.0) / NULLIF(success + failure, 0) AS rate,
-                  (success + failure)                            AS n
-           FROM ab_stats
-           WHERE pipeline = ?
-           ORDER BY rate DESC, n DESC -- Added n DESC as a tie-breaker for high rates
-           LIMIT 5""",
-        (pipeline,),
-    )
-    rows = cur.fetchall()
-    for v, s, f, r, n in rows:
-        if n >= 20:  # only trust variants with enough data
+    policy = policy or POLICY
+    window = window or WINDOW_SECONDS
+    half_life = half_life or HALF_LIFE_SECONDS
+    stats = _variant_stats(pipeline, window, half_life)
+    retired, evaluation = set(), {}
+    if RETIRE_LOSERS if retire_losers is None else retire_losers:
+        evaluation = _evaluate(pipeline)
+        retired = {
+            v for v, info in evaluation.items() if info["status"] == sequential.LOSER
+        }
+        stats = [row for row in stats if row[0] not in retired]
+    if policy != "greedy":
+        counts = {v: (s, f) for v, s, f in stats}
+        arms = list(dict.fromkeys([*(variants or ()), *counts]))
+        arms = [v for v in arms if v not in retired]
+        if not arms:
+            return default
+        return bandit.choose(
+            arms,
+            [counts.get(v, (0, 0))[0] for v in arms],
+            [counts.get(v, (0, 0))[1] for v in arms],
+            policy,
+        )
+
+    rows = []
+    for v, s, f in stats:
+        n = s + f
+        if n:
+            rows.append((v, s, f, s / n, n))
+    rows.sort(key=lambda row: (-row[3], -row[4]))
+    rows = rows[:5]
+    choice = next((row for row in rows if row[4] >= 20), None)
+    if default in retired:  # never hand traffic back to a stopped arm
+        survivors = [row[0] for row in rows] or sorted(
+            (v for v in evaluation if v not in retired),
+            key=lambda v: -evaluation[v]["rate"],
+        )
+        default = next(iter(survivors), default)
+    variant = default if choice is None else choice[0]
+    if _last_choice.get(pipeline) != variant:  # log changes, not every build
+        _last_choice[pipeline] = variant
+        if choice is None:
             print(
-                f"[Best Variant] For pipeline '{pipeline}', selected '{v}' (rate: {r:.2f}, trials: {n})"
+                f"[Best Variant] For pipeline '{pipeline}', no variant met criteria. Defaulting to '{default}'. Found: {rows}"
             )
-            return v
-    print(
-        f"[Best Variant] For pipeline '{pipeline}', no variant met criteria. Defaulting to '{default}'. Found: {rows}"
-    )
-    return default
+        else:
+            print(
+                f"[Best Variant] For pipeline '{pipeline}', selected '{variant}' (rate: {choice[3]:.2f}, trials: {choice[4]:g})"
+            )
+    return variant
 
 
-# Example of how to potentially close the connection (can be tricky with web apps/long running services)
-# import atexit
-# def close_db():
-#     if con:
-#         con.close()
-# atexit.register(close_db)
+if os.getenv("FEEDBACK_ASYNC", "").lower() in ("1", "true", "yes"):
+    start_writer()
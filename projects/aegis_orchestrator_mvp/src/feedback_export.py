@@ -0,0 +1,228 @@
+"""
+Columnar export of feedback history for offline analytics.
+
+Streams the `feedback_events` log and the closed `ab_stats_hourly` buckets
+into Parquet (or Arrow IPC) files, Hive-partitioned by date and pipeline:
+
+  <out>/events/date=2026-10-19/pipeline=pipeline.onboarding.v0/part-<first>-<last>.parquet
+  <out>/hourly/date=2026-10-19/pipeline=pipeline.onboarding.v0/part-<bucket>.parquet
+
+• Incremental: a watermark (last exported event id / hourly bucket) is kept
+  in `<out>/_watermark.json` and only newer rows are read.
+• Streaming: events are read `batch_size` rows at a time over a read-only
+  connection, so memory stays bounded and the production writers are never
+  blocked (WAL readers do not take the write lock).
+• Hourly buckets are exported once closed (`GRACE_SECONDS` after the hour),
+  after folding in pending events with `feedback.rollup()`.
+
+pyarrow is optional: without it `export()` raises ImportError. Only the
+SQLite backend is exported.
+
+Usage (from projects/aegis_orchestrator_mvp/):
+    python -m src.feedback_export [--out data/export] [--format parquet|arrow]
+"""
+
+import argparse, json, os, sqlite3, time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+from . import feedback
+from .feedback_backends import BUSY_TIMEOUT, SQLiteBackend
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_DEFAULT_EXPORT_DIR = _PROJECT_ROOT / "data" / "export"
+WATERMARK_FILE = "_watermark.json"
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+GRACE_SECONDS = 300  # late writes (async writer, clock skew) into a closed hour
+
+_EVENT_COLUMNS = (
+    ("id", "int64"),
+    ("ts", "float64"),
+    ("pipeline", "string"),
+    ("variant", "string"),
+    ("tool", "string"),
+    ("success", "int8"),
+    ("duration_ms", "float64"),
+    ("error", "string"),
+    ("inputs", "string"),
+    ("output", "string"),
+)
+_HOURLY_COLUMNS = (
+    ("pipeline", "string"),
+    ("variant", "string"),
+    ("bucket", "int64"),
+    ("success", "int64"),
+    ("failure", "int64"),
+    ("duration_ms_sum", "float64"),
+    ("duration_n", "int64"),
+)
+
+
+def _export_dir(out_dir=None) -> Path:
+    return Path(out_dir or os.getenv("FEEDBACK_EXPORT_DIR") or _DEFAULT_EXPORT_DIR)
+
+
+def _schema(columns) -> "pa.Schema":
+    return pa.schema([(name, getattr(pa, kind)()) for name, kind in columns])
+
+
+def _read_watermark(out: Path) -> Dict:
+    try:
+        return json.loads((out / WATERMARK_FILE).read_text())
+    except (OSError, ValueError):
+        return {"last_event_id": 0, "last_bucket": -1}
+
+
+def _write_watermark(out: Path, watermark: Dict):
+    tmp = out / f"{WATERMARK_FILE}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(watermark, sort_keys=True))
+    os.replace(tmp, out / WATERMARK_FILE)
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _partition(out: Path, kind: str, day: str, pipeline: str) -> Path:
+    safe = str(pipeline).replace(os.sep, "_")
+    path = out / kind / f"date={day}" / f"pipeline={safe}"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _write(table: "pa.Table", path: Path, fmt: str):
+    tmp = path.with_name(f".{path.name}.tmp")
+    if fmt == "parquet":
+        pq.write_table(table, tmp)
+    else:
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(tmp, path)  # readers never see a half-written file
+
+
+def _write_groups(rows, columns, out, kind, fmt, name_of, ts_index, pipeline_index):
+    groups = {}
+    for row in rows:
+        key = (_day(row[ts_index]), row[pipeline_index])
+        groups.setdefault(key, []).append(row)
+    schema = _schema(columns)
+    for (day, pipeline), group in groups.items():
+        table = pa.Table.from_arrays(
+            [
+                pa.array([r[i] for r in group], type=schema.field(i).type)
+                for i in range(len(columns))
+            ],
+            schema=schema,
+        )
+        directory = _partition(out, kind, day, pipeline)
+        _write(table, directory / (name_of(group) + FORMATS[fmt]), fmt)
+    return len(rows)
+
+
+def _export_events(reader, out, fmt, watermark, batch_size) -> int:
+    cursor = reader.execute(
+        f"""SELECT {", ".join(name for name, _ in _EVENT_COLUMNS)}
+            FROM feedback_events WHERE id > ? ORDER BY id""",
+        (watermark["last_event_id"],),
+    )
+    exported = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return exported
+        exported += _write_groups(
+            rows,
+            _EVENT_COLUMNS,
+            out,
+            "events",
+            fmt,
+            lambda group: f"part-{group[0][0]}-{group[-1][0]}",
+            ts_index=1,
+            pipeline_index=2,
+        )
+        # Advance per batch so an interrupted export resumes where it stopped
+        watermark["last_event_id"] = rows[-1][0]
+        _write_watermark(out, watermark)
+
+
+def _export_hourly(reader, out, fmt, watermark, now) -> int:
+    rows = reader.execute(
+        f"""SELECT {", ".join(name for name, _ in _HOURLY_COLUMNS)}
+            FROM ab_stats_hourly
+            WHERE bucket > ? AND bucket + ? <= ?
+            ORDER BY bucket""",
+        (watermark["last_bucket"], feedback.BUCKET_SECONDS, now - GRACE_SECONDS),
+    ).fetchall()
+    if not rows:
+        return 0
+    exported = 0
+    for bucket in sorted({row[2] for row in rows}):
+        exported += _write_groups(
+            [row for row in rows if row[2] == bucket],
+            _HOURLY_COLUMNS,
+            out,
+            "hourly",
+            fmt,
+            lambda group: f"part-{group[0][2]}",
+            ts_index=2,
+            pipeline_index=0,
+        )
+    watermark["last_bucket"] = rows[-1][2]
+    _write_watermark(out, watermark)
+    return exported
+
+
+def export(
+    out_dir=None, fmt: str = "parquet", batch_size: int = 50_000, now: float = None
+) -> Dict[str, int]:
+    """Export feedback rows newer than the watermark; returns rows written."""
+    if not _HAS_PYARROW:
+        raise ImportError("Feedback export needs pyarrow: pip install pyarrow")
+    if fmt not in FORMATS:
+        raise ValueError(
+            f"Unknown export format '{fmt}' (expected one of {sorted(FORMATS)})"
+        )
+    out = _export_dir(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    watermark = _read_watermark(out)
+
+    store = feedback.get_backend()
+    if not isinstance(store, SQLiteBackend):
+        raise ValueError(
+            f"Feedback export reads SQLite, not the '{store.name}' backend"
+        )
+    store.rollup()  # fold pending events so closed hours are complete
+    db_uri = Path(store.path).resolve().as_uri() + "?mode=ro"
+    reader = sqlite3.connect(db_uri, uri=True, timeout=BUSY_TIMEOUT)
+    try:
+        counts = {
+            "events": _export_events(reader, out, fmt, watermark, batch_size),
+            "hourly": _export_hourly(
+                reader, out, fmt, watermark, time.time() if now is None else now
+            ),
+        }
+    finally:
+        reader.close()
+    print(
+        f"[Feedback Export] {counts['events']} events, {counts['hourly']} hourly rows -> {out}"
+    )
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+    export(args.out, args.format, args.batch_size)
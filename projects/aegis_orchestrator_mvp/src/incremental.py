@@ -0,0 +1,118 @@
+"""
+Make-style incremental re-execution.
+
+Each task is fingerprinted by its own spec (agent, the agent version the flow
+resolved, params) plus the fingerprints of its upstream tasks, so editing one
+task's params or upgrading its agent changes its fingerprint and those of
+everything downstream — and nothing else. With
+`graph["incremental"] = True` the orchestrator reuses stored outputs for
+unchanged fingerprints and only invokes tasks whose fingerprint changed.
+
+Outputs live in a small SQLite store (`data/task_outputs.db`, override with
+TASK_OUTPUT_DB_PATH). Only successful, JSON-serialisable outputs are stored.
+"""
+
+import hashlib, json, os, sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+
+from .estimator import task_dependencies, topo_order
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_DEFAULT_DB_FILE = _PROJECT_ROOT / "data" / "task_outputs.db"
+
+_schema = """
+CREATE TABLE IF NOT EXISTS task_outputs (
+  fingerprint TEXT PRIMARY KEY,
+  task_id     TEXT,
+  output      TEXT,
+  updated     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def _spec_key(task_spec: Dict) -> Dict:
+    # Of the runtime-only keys, only the resolved version (set by build_flow,
+    # canary routing included) affects the fingerprint; "__agent_cls" never does
+    return {
+        "agent": task_spec.get("agent"),
+        "version": task_spec.get("__agent_version"),
+        "params": task_spec.get("params", {}),
+    }
+
+
+def fingerprints(tasks) -> Dict[str, str]:
+    """task_id -> hex fingerprint of its spec plus upstream fingerprints."""
+    by_id = {t["id"]: t for t in tasks}
+    upstream = task_dependencies(tasks)
+    fps = {}
+    for tid in topo_order(upstream):
+        payload = json.dumps(
+            {
+                "spec": _spec_key(by_id[tid]),
+                "upstream": [fps[d] for d in upstream[tid]],
+            },
+            sort_keys=True,
+            default=str,
+        )
+        fps[tid] = hashlib.sha256(payload.encode()).hexdigest()
+    return fps
+
+
+class OutputStore:
+    """Fingerprint -> stored task output (SQLite)."""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = str(
+            db_path or os.getenv("TASK_OUTPUT_DB_PATH") or _DEFAULT_DB_FILE
+        )
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._memory_con = None
+        with self._connect() as con:
+            con.execute(_schema)
+
+    @contextmanager
+    def _connect(self):
+        # Fresh connection per call keeps the store thread-safe (cf. SQLTool)
+        if self.db_path == ":memory:":
+            if self._memory_con is None:
+                self._memory_con = sqlite3.connect(":memory:", check_same_thread=False)
+            with self._memory_con:
+                yield self._memory_con
+            return
+        con = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def get(self, fingerprint: str):
+        """Stored output for `fingerprint`, or None."""
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT output FROM task_outputs WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, fingerprint: str, task_id: str, output) -> bool:
+        """Store a successful output; returns False if it isn't storable."""
+        if isinstance(output, dict) and (
+            output.get("error") or output.get("status") == "skipped_budget"
+        ):
+            return False
+        try:
+            payload = json.dumps(output)
+        except (TypeError, ValueError):
+            return False
+        with self._connect() as con:
+            con.execute(
+                """INSERT INTO task_outputs (fingerprint, task_id, output)
+                   VALUES (?, ?, ?)
+                   ON CONFLICT(fingerprint) DO UPDATE
+                   SET output = excluded.output, updated = CURRENT_TIMESTAMP""",
+                (fingerprint, task_id, payload),
+            )
+        return True
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram, start_http_server
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 import time, os
 
 REQUEST_COUNT = Counter("agent_task_total", "Total tasks executed", ["task_id"])
@@ -10,7 +10,61 @@ FLOW_OUTPUT_TOKEN_COUNT = Counter(
 )
 
 COST_ESTIMATE = Histogram(
-    "flow_cost_usd", "Estimated compute/API cost per flow", ["flow_id"]
+    "flow_cost_usd",
+    "Accumulated per-tool cost per flow",
+    ["flow_id"],
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10),
+)
+TASK_COST = Histogram(
+    "agent_task_cost_usd",
+    "Per-tool cost per task invocation",
+    ["task_id"],
+    buckets=(0.00001, 0.0001, 0.001, 0.01, 0.1, 1),
+)
+
+DISPATCH_QUEUE_DEPTH = Gauge(
+    "dispatch_queue_depth", "Flows waiting for dispatch", ["priority_class"]
+)
+DISPATCH_WAIT = Histogram(
+    "dispatch_wait_seconds",
+    "Time a flow spent queued before dispatch",
+    ["priority_class"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+AGENT_IMPORT_SECONDS = Gauge(
+    "agent_import_seconds", "Time to import an agent during prewarm", ["agent_id"]
+)
+REGISTRY_READY = Gauge("registry_ready", "1 once registry prewarm has completed")
+
+SLO_OUTCOME = Counter(
+    "flow_slo_total",
+    "Deadline-bearing flows by outcome (met | missed | rejected | degraded)",
+    ["pipeline_id", "outcome"],
+)
+
+FEEDBACK_QUEUE_DEPTH = Gauge(
+    "feedback_queue_depth", "Feedback events waiting for the background writer"
+)
+FEEDBACK_FLUSH_SECONDS = Histogram(
+    "feedback_flush_seconds",
+    "Time to commit one batch of feedback events",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1),
+)
+FEEDBACK_DROPPED = Counter(
+    "feedback_dropped_total",
+    "Feedback events dropped by backpressure or a failed commit",
+    ["reason"],
+)
+
+EXPERIMENT_STATUS = Gauge(
+    "feedback_experiment_status",
+    "Sequential test status per variant (1 winner, 0 running, -1 loser)",
+    ["pipeline_id", "variant"],
+)
+EXPERIMENT_DECISIONS = Counter(
+    "feedback_experiment_decisions_total",
+    "Variants declared winner or loser by the sequential test",
+    ["pipeline_id", "decision"],
 )
 
 
@@ -1,4 +1,21 @@
-"""Dynamic Orchestrator — converts task graph into Prefect flow and deploys."""
+"""Dynamic Orchestrator — converts task graph into Prefect flow and deploys.
+
+Optional graph keys:
+  budget_usd     — stop (or downgrade) remaining tasks once the flow's
+                   accumulated tool cost exceeds this amount.
+  budget_policy  — "stop" (default): skip remaining tasks;
+                   "downgrade": run each remaining task's `downgrade` spec
+                   ({"agent": ..., "params": {...}}) instead, skipping tasks
+                   without one.
+  incremental    — reuse stored outputs of tasks whose fingerprint (spec +
+                   upstream fingerprints) is unchanged; see incremental.py.
+  variants       — candidate A/B variants for the pipeline; with
+  variant_policy   a bandit policy ("thompson", "ucb1", "epsilon_greedy")
+                   picks among them instead of the greedy default.
+  variant_window, variant_half_life
+                 — rank variants on the last N seconds of feedback and / or
+                   exponentially decayed counts instead of lifetime totals.
+"""
 
 import json, inspect, types, importlib.util, pathlib, uuid
 from typing import Dict
@@ -11,42 +28,20 @@ from prefect.deployments import run_deployment
 from . import (
     risk,
 )  # Assuming risk.py is in the same directory or accessible via python path
+from . import cost, estimator, incremental
 from .metrics import (
     REQUEST_COUNT,
     REQUEST_LATENCY,
     FLOW_OUTPUT_TOKEN_COUNT,
     COST_ESTIMATE,
+    TASK_COST,
 )  # Removed FLOW_INPUT_TOKEN_COUNT
 from .feedback import record as feedback_record  # Changed import
 from .feedback import (
     best_variant as feedback_best_variant,
 )  # Added for A/B variant selection
-
-# Dynamically import all tools from the .tools submodule
-_TOOL_CLASSES = {}
-try:
-    from . import tools as tool_module  # Relative import for tools submodule
-
-    for tool_name in tool_module.__all__:  # Relies on __all__ in tools/__init__.py
-        _TOOL_CLASSES[tool_name] = getattr(tool_module, tool_name)
-except ImportError as e:
-    print(
-        f"[Orchestrator Warning] Could not import tools submodule or specific tools: {e}"
-    )
-
-# Add conceptual/placeholder tools not in dedicated files (if any)
-_TOOL_CLASSES.update(
-    {
-        "FormAPI": lambda **p: print(f"[Tool Stub] FormAPI invoked with {p}"),
-        "PingCheck": lambda **p: print(f"[Tool Stub] PingCheck invoked with {p}"),
-        "PandasExec": lambda **p: print(f"[Tool Stub] PandasExec invoked with {p}"),
-        "LLMCompose": lambda **p: print(f"[Tool Stub] LLMCompose invoked with {p}"),
-        "CrossCheck": lambda **p: print(f"[Tool Stub] CrossCheck invoked with {p}"),
-        "SentimentAnalysis": lambda **p: print(
-            f"[Tool Stub] SentimentAnalysis invoked with {p}"
-        ),
-    }
-)
+from .feedback import durations as feedback_durations
+from .feedback import record_duration as feedback_record_duration
 
 # load adapters dynamically via registry
 from . import registry
@@ -55,15 +50,16 @@ from . import registry
 def _make_task(task_spec: Dict):
     task_id = task_spec["id"]
     agent_cls = task_spec["__agent_cls"]
-    instance = agent_cls()
-    result = instance.invoke(**task_spec.get("params", {}))
-    print(f"[{task_id}] → {result}")
+    params = task_spec.get("params", {})
 
     @task(name=task_id)
     def generic_task_execution():
         with REQUEST_LATENCY.labels(task_id).time():
             REQUEST_COUNT.labels(task_id).inc()
             print(f"Executing task_id: {task_id} with agent: {agent_cls.__name__}")
+            # Invoke at run time (not build time) so budget gating can skip it
+            result = agent_cls().invoke(**params)
+            print(f"[{task_id}] → {result}")
 
             if not result:
                 print(f"  No result returned for task {task_id}.")
@@ -93,7 +89,33 @@ def _review_gate(instruction: str):
     return gate
 
 
-def build_flow(graph: Dict):
+_history_loaded = False
+
+
+def _load_history():
+    """Seed the estimator with task run times persisted by earlier processes."""
+    global _history_loaded
+    if _history_loaded:
+        return
+    _history_loaded = True
+    try:
+        estimator.preload(feedback_durations())
+    except Exception as e:
+        print(f"[Estimator] Could not load run history: {e}")
+
+
+def estimate(graph: Dict) -> Dict:
+    """Predict p50/p95 makespan and cost of `graph` from run history.
+
+    Cheap enough to call on every plan (no agents are imported or invoked);
+    see estimator.py for the model. History persisted by earlier runs (the
+    feedback event log) is loaded on the first call.
+    """
+    _load_history()
+    return estimator.estimate(graph, cost_model=registry.cost_model)
+
+
+def build_flow(graph: Dict, output_store: "incremental.OutputStore" = None):
     trigger_instruction = graph.get("trigger_instruction", "No instruction provided")
     flow_id_for_feedback = graph.get(
         "id", f"flow-{uuid.uuid4().hex[:6]}"
@@ -101,7 +123,16 @@ def build_flow(graph: Dict):
 
     # Determine the variant for this pipeline run
     # This variant will be passed to all tasks if not overridden by task-specific variant logic
-    pipeline_level_variant = feedback_best_variant(flow_id_for_feedback)
+    # Optional graph keys: "variants" (candidate arms), "variant_policy"
+    # ("greedy" | "thompson" | "ucb1" | "epsilon_greedy") and
+    # "variant_window" / "variant_half_life" (seconds), see feedback.py.
+    pipeline_level_variant = feedback_best_variant(
+        flow_id_for_feedback,
+        policy=graph.get("variant_policy"),
+        variants=graph.get("variants"),
+        window=graph.get("variant_window"),
+        half_life=graph.get("variant_half_life"),
+    )
     print(
         f"[Orchestrator] Using variant '{pipeline_level_variant}' for pipeline '{flow_id_for_feedback}'"
     )
@@ -109,10 +140,21 @@ def build_flow(graph: Dict):
     # Create the review gate task first
     review_task_instance = _review_gate(trigger_instruction)
 
+    budget = graph.get("budget_usd")
+    budget_policy = graph.get("budget_policy", "stop")
+
+    # One route key per flow: canary routing is decided once per flow and the
+    # classes captured below pin every task to that version for the whole run,
+    # even if the registry is upgraded mid-flight.
+    route_key = f"{flow_id_for_feedback}:{uuid.uuid4().hex}"
+
     tasks = {}
+    downgrades = {}
     for t in graph.get("tasks", []):
-        agent_cls = registry.get(t["agent"])
+        agent_cls = registry.get(t["agent"], route_key=route_key)
         t["__agent_cls"] = agent_cls  # keep for runtime invocation
+        t["__agent_version"] = registry.version_of(t["agent"], agent_cls)
+        t["__cost_model"] = registry.cost_model(t["agent"])
 
         # Set or override the variant for the task
         # Priority: task-specific variant > pipeline-level determined variant > "default" (if best_variant returns it)
@@ -127,6 +169,18 @@ def build_flow(graph: Dict):
 
         tasks[t["id"]] = _make_task(t)
 
+        if budget is not None and budget_policy == "downgrade" and t.get("downgrade"):
+            d = {"id": t["id"], **t["downgrade"]}
+            d["params"] = {**t["params"], **d.get("params", {})}
+            d["__agent_cls"] = registry.get(d["agent"], route_key=route_key)
+            d["__cost_model"] = registry.cost_model(d["agent"])
+            downgrades[t["id"]] = (d, _make_task(d))
+
+    fingerprints = {}
+    if graph.get("incremental"):
+        output_store = output_store or incremental.OutputStore()
+        fingerprints = incremental.fingerprints(graph.get("tasks", []))
+
     @flow(name=graph.get("id", f"flow-{uuid.uuid4().hex[:6]}"))
     def dynamic_flow():
         import time  # Ensure time is imported
@@ -163,16 +217,62 @@ def build_flow(graph: Dict):
         all_task_outputs = {}
         flow_success = True  # Assume success, set to False on error
         flow_error_message = None
+        ledger = cost.CostLedger(budget)
 
         # if approval_result.get("status") == "auto_approved": # Example conditional logic
         for t_spec in graph.get("tasks", []):
             task_id = t_spec["id"]
-            if task_id in tasks:
+            run_spec, run_task = t_spec, tasks.get(task_id)
+            # A stored output costs nothing, so reuse it even over budget
+            fingerprint = fingerprints.get(task_id)
+            reused = output_store.get(fingerprint) if fingerprint else None
+            if reused is None and ledger.exceeded:
+                if task_id not in downgrades:
+                    logger.warning(
+                        f"[Budget] ${ledger.total:.4f} > ${budget:.4f}; skipping task {task_id}"
+                    )
+                    all_task_outputs[task_id] = {"status": "skipped_budget"}
+                    flow_success = False
+                    if not flow_error_message:
+                        flow_error_message = f"Budget exceeded before task {task_id}"
+                    continue
+                run_spec, run_task = downgrades[task_id]
+                fingerprint = None  # the fallback's output isn't this task's
+                logger.warning(
+                    f"[Budget] Budget exceeded; downgrading task {task_id} to {run_spec['agent']}"
+                )
+            if reused is not None:
+                logger.info(f"[Incremental] Task {task_id} unchanged; reusing output")
+                all_task_outputs[task_id] = reused
+            elif run_task is not None:
                 try:
                     # Pass previous task outputs if needed (conceptual for now)
                     # Pass pipeline_id and variant to the task execution context if possible
                     # For now, tools handle this internally via their invoke signature
-                    all_task_outputs[task_id] = tasks[task_id]()
+                    task_start = time.time()
+                    all_task_outputs[task_id] = run_task()
+                    task_cost = cost.task_cost(
+                        run_spec["__cost_model"], all_task_outputs[task_id]
+                    )
+                    ledger.charge(task_id, task_cost)
+                    TASK_COST.labels(task_id).observe(task_cost)
+                    task_seconds = time.time() - task_start
+                    estimator.observe(run_spec["agent"], task_seconds, task_cost)
+                    try:
+                        feedback_record_duration(
+                            run_spec["agent"],
+                            task_seconds,
+                            flow_id_for_feedback,
+                            pipeline_level_variant,
+                        )
+                    except Exception as fb_error:
+                        logger.error(
+                            f"[Feedback Error] Could not record task duration: {fb_error}"
+                        )
+                    if fingerprint:
+                        output_store.put(
+                            fingerprint, task_id, all_task_outputs[task_id]
+                        )
                     if isinstance(all_task_outputs[task_id], dict) and all_task_outputs[
                         task_id
                     ].get("error"):
@@ -200,12 +300,12 @@ def build_flow(graph: Dict):
                 # if not flow_error_message: flow_error_message = f"Task {task_id} not found"
 
         duration = time.time() - start_time  # Calculate duration
-        # naive cost: $0.0005/sec as placeholder, now from env var
-        cost_rate_per_sec = float(os.getenv("COST_RATE_PER_SEC", "0.0005"))
-        COST_ESTIMATE.labels(flow_id=graph["id"]).observe(
-            round(duration * cost_rate_per_sec, 4)
+        # Accumulated per-tool cost (see cost.py / agents.yaml `cost:`)
+        COST_ESTIMATE.labels(flow_id=flow_id_for_feedback).observe(ledger.total)
+        logger.info(
+            f"Flow completed in {duration:.2f}s, cost ${ledger.total:.6f} "
+            f"(per task: {ledger.per_task}). All task outputs: {all_task_outputs}"
         )
-        logger.info(f"Flow completed. All task outputs: {all_task_outputs}")
 
         # Final feedback record for pipeline end
         try:
@@ -216,6 +316,7 @@ def build_flow(graph: Dict):
                 tool_name="PipelineEnd",
                 output=all_task_outputs,  # Pass the collected task outputs
                 error_message=flow_error_message,
+                duration_s=duration,
                 # No direct metrics field in feedback.record; could be part of output if needed
             )
         except Exception as fb_error:
@@ -0,0 +1,109 @@
+"""
+Entry-point plugin discovery.
+
+Third-party packages can ship agents without editing `agents.yaml` or
+`src/tools/__init__.py` by declaring an entry point in the `aegis.agents`
+group, e.g. in their pyproject.toml:
+
+  [project.entry-points."aegis.agents"]
+  ZendeskAPI = "aegis_zendesk.adapter:ZendeskAPI"
+
+Scanning entry points reads the metadata of every installed distribution, so
+the result is cached in a small JSON index (`data/plugin_index.json`,
+override with PLUGIN_INDEX_PATH). The index is keyed by a fingerprint of the
+sys.path entries and their mtimes: installing or removing a distribution adds
+or removes its `.dist-info` directory, which changes the fingerprint and
+triggers a rescan. Use `discover(refresh=True)` after changing an editable
+install in place.
+"""
+
+import hashlib, json, os, sys, threading
+from importlib import import_module, metadata
+from pathlib import Path
+from typing import Dict
+
+ENTRY_POINT_GROUP = "aegis.agents"
+SOURCE = "entry_point"  # manifest `source` of discovered agents
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_DEFAULT_INDEX_FILE = _PROJECT_ROOT / "data" / "plugin_index.json"
+
+_lock = threading.Lock()
+_memo = None  # (index path, fingerprint, agents) of the last discovery
+
+
+def _index_path() -> Path:
+    return Path(os.getenv("PLUGIN_INDEX_PATH") or _DEFAULT_INDEX_FILE)
+
+
+def fingerprint() -> str:
+    """Cheap key for the installed distributions (one stat per sys.path entry)."""
+    parts = [sys.version, ENTRY_POINT_GROUP]
+    for entry in sys.path:
+        try:
+            parts.append(f"{entry}:{os.stat(entry or '.').st_mtime_ns}")
+        except OSError:
+            parts.append(f"{entry}:-")
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+def _scan() -> Dict[str, Dict]:
+    agents = {}
+    for ep in metadata.entry_points(group=ENTRY_POINT_GROUP):
+        if ep.name in agents:
+            continue  # first on sys.path wins, as for imports
+        module, _, classname = ep.value.partition(":")
+        dist = getattr(ep, "dist", None)
+        agents[ep.name] = {
+            "id": ep.name,
+            "module": module.strip(),
+            "classname": classname.strip(),
+            "version": dist.version if dist else "0.0.0",
+            "status": "active",
+            "source": SOURCE,
+            "distribution": dist.metadata["Name"] if dist else None,
+        }
+    return agents
+
+
+def _read_index(path: Path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_index(path: Path, payload: Dict):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload, sort_keys=True))
+        os.replace(tmp, path)  # readers never see a partial index
+    except OSError as e:
+        print(f"[Plugins] Could not write discovery index {path}: {e}")
+
+
+def discover(refresh: bool = False) -> Dict[str, Dict]:
+    """agent_id -> manifest entry for every `aegis.agents` entry point."""
+    global _memo
+    path = _index_path()
+    fp = fingerprint()
+    with _lock:
+        if not refresh and _memo and _memo[:2] == (path, fp):
+            return _memo[2]
+        cached = None if refresh else _read_index(path)
+        if cached and cached.get("fingerprint") == fp:
+            agents = cached.get("agents", {})
+        else:
+            agents = _scan()
+            _write_index(path, {"fingerprint": fp, "agents": agents})
+        _memo = (path, fp, agents)
+        return agents
+
+
+def load(agent_id: str):
+    """Import and return the class behind a discovered agent id."""
+    entry = discover().get(agent_id)
+    if entry is None:
+        raise KeyError(f"No '{ENTRY_POINT_GROUP}' entry point named '{agent_id}'")
+    return getattr(import_module(entry["module"]), entry["classname"])
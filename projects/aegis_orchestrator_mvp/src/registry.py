@@ -4,7 +4,9 @@ Agent Registry
 • Central lookup for every agent/tool the orchestrator can invoke.
 • Supports hot-swap upgrades while flows are running.
 
-Manifest file: `agents.yaml` (same folder).
+Manifest file: `agents.yaml` (same folder), plus agents that installed
+packages expose through `aegis.agents` entry points (see plugins.py);
+`agents.yaml` wins on an id clash.
 Yaml schema:
   - id: "SlackAPI"
     module: "tools.slack_api"
@@ -12,84 +14,760 @@ Yaml schema:
     version: "0.1.0"
     status: "active"   # active | beta | deprecated
     default_params: {}
+    cost:              # optional, see cost.py
+      per_call: 0.0
+      per_token: 0.0
+      per_row: 0.0
 
 The registry exposes:
   get(agent_id)          -> returns loaded class (lazy import)
-  upgrade(agent_id, ...) -> swap version & reload
-  list(status="active")  -> iterate known agents
+  get(agent_id, version=..., route_key=...) -> a specific / routed version
+  cost_model(agent_id)   -> declared cost model ({} if none)
+  upgrade(agent_id, ...) -> swap version & reload (optionally as a % canary)
+  upgrade_many(changes)  -> several upgrades, one atomic write & snapshot swap
+  recover()              -> finish an upgrade interrupted by a crash
+  loaded_versions(agent_id) / collect() -> inspect / GC side-by-side versions
+  version_of(agent_id, cls) -> version of a class returned by get()
+  watch() / unwatch()    -> hot-reload agents.yaml edits in the background
+  list_agents(status="active") -> ids of known agents
+  prewarm(status="active")     -> import agents concurrently in the background
+  ready() / wait_ready()       -> True once prewarm has finished
+
+The parsed manifest is held in memory as an index (agent_id -> entry) and is
+only re-parsed when `agents.yaml` changes: its (mtime, size) stamp is checked
+on each lookup, and a content hash avoids re-parsing on a mere touch. Files
+modified within the last `_RACY_WINDOW_NS` are always re-hashed, since a
+coarse filesystem clock could hide a same-size edit. When a re-parse finds
+changed entries, only those agents are dropped from the cache.
+
+`watch()` starts a background thread (inotify on Linux, stat polling
+elsewhere) that notices edits within a second even if no lookup misses; while
+it runs, lookups never touch the filesystem.
+
+Concurrency: `get` hits read immutable snapshot dicts without locking, routed
+lookups included (the canary split is resolved against the snapshot).
+Misses take a per-agent import lock (so a slow import only blocks callers of
+that agent) and publish by swapping in a new snapshot; `upgrade` swaps in a
+snapshot without the upgraded agent. The global `_lock` only guards writers.
+
+Versions: several versions of an agent can be loaded side by side. When a new
+version reuses a module path whose canonical `sys.modules` entry belongs to
+another version, its source is executed again under a versioned module name,
+so the new code is actually loaded. Retiring the version that owns the
+canonical entry releases it (and the lazy `src.tools` attribute), so the next
+version imports under the canonical name and the old one can be collected.
+An entry may carry a canary:
+  canary: {version: "0.2.0", module: ..., classname: ..., percent: 10}
+The orchestrator resolves all agents of a flow with one route key when the
+flow is built, so a running flow never mixes versions.
 """
 
+from concurrent.futures import Future, ThreadPoolExecutor
 from importlib import import_module
 from pathlib import Path
+import ctypes, ctypes.util, gc, hashlib, importlib.util, json, os, re, select, sys
+import time, weakref
 import yaml, threading
 
+from . import plugins
+from .metrics import AGENT_IMPORT_SECONDS, REGISTRY_READY
+
 _LOCK_TIMEOUT = 5  # seconds
 
+# libyaml-backed loader is ~10x faster; fall back to the pure-Python one
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_RACY_WINDOW_NS = 2_000_000_000
+
 # Path to the YAML file, relative to this script's location
 _REG_PATH = Path(__file__).resolve().parent / "agents.yaml"  # Corrected filename
 
-_lock = threading.RLock()
-_cache = {}  # agent_id -> class
+_lock = threading.RLock()  # guards writers; readers never take it
+_cache = {}  # agent_id -> class; immutable snapshot, replaced on every change
+_generation = 0  # bumped whenever entries are dropped from the snapshot
+_import_locks = {}  # agent_id -> Lock serialising imports of that agent
+
+# Side-by-side versions, keyed by (agent_id, version, module, classname)
+_versions = {}  # active (current + canary) versions; immutable snapshot
+_canaries = {}  # agent_id -> (percent, canary version key); immutable snapshot
+_retired = weakref.WeakValueDictionary()  # superseded, alive while referenced
+# Module copies, guarded by _lock. Agents naming the same module at the same
+# version share one copy; another version of a module runs side by side.
+_module_owner = {}  # full module path -> version owning the sys.modules copy
+_module_users = {}  # (full module path, version) -> ids of agents loaded from it
+_ready = threading.Event()  # set once prewarm() has finished
+
+_watcher = None  # (thread, stop event, mode) while watch() is active
+
+_index = None  # agent_id -> manifest entry
+_index_stamp = None  # (st_mtime_ns, st_size) of the parsed file
+_index_digest = None  # sha1 of the parsed file
 
 
-def _load_manifest():
-    if not _REG_PATH.exists():
+def _load_manifest(raw: bytes = None):
+    if raw is None:
+        if not _REG_PATH.exists():
+            raise FileNotFoundError(f"Missing agent manifest {_REG_PATH}")
+        raw = _REG_PATH.read_bytes()
+    return {d["id"]: d for d in yaml.load(raw, Loader=_YAML_LOADER) or []}
+
+
+def _manifest():
+    """In-memory manifest index, refreshed only when agents.yaml changes.
+
+    While the watcher runs it owns refreshing, so lookups do no I/O at all.
+    """
+    if _watcher is not None and _index is not None:
+        return _index
+    with _lock:
+        return _refresh_index()
+
+
+def _refresh_index():
+    """Re-read agents.yaml if it changed and drop agents whose entry changed."""
+    global _index, _index_stamp, _index_digest
+    if _index is None:
+        recover()
+    try:
+        st = _REG_PATH.stat()
+    except FileNotFoundError:
         raise FileNotFoundError(f"Missing agent manifest {_REG_PATH}")
-    with open(_REG_PATH) as f:
-        return {d["id"]: d for d in yaml.safe_load(f)}
+    stamp = (st.st_mtime_ns, st.st_size)
+    racy = time.time_ns() - st.st_mtime_ns < _RACY_WINDOW_NS
+    if _index is not None and stamp == _index_stamp and not racy:
+        return _index
+
+    raw = _REG_PATH.read_bytes()
+    digest = hashlib.sha1(raw).hexdigest()
+    if _index is None or digest != _index_digest:
+        old, _index = _index, _with_plugins(_load_manifest(raw))
+        _index_digest = digest
+        if old is not None:
+            changed = {
+                agent_id
+                for agent_id in old.keys() | _index.keys()
+                if old.get(agent_id) != _index.get(agent_id)
+            }
+            if changed:
+                print(f"[Registry] agents.yaml changed: {sorted(changed)}")
+                _drop(changed)
+    _index_stamp = stamp
+    return _index
+
 
+def _with_plugins(manifest: dict) -> dict:
+    """Add entry-point agents (see plugins.py); agents.yaml entries win."""
+    try:
+        discovered = plugins.discover()
+    except Exception as e:  # a broken plugin must not take the registry down
+        print(f"[Registry] Plugin discovery failed: {e}")
+        return manifest
+    extra = {k: v for k, v in discovered.items() if k not in manifest}
+    return {**manifest, **extra} if extra else manifest
 
-def get(agent_id: str):
+
+def _invalidate_index():
+    global _index, _index_stamp, _index_digest
+    _index = _index_stamp = _index_digest = None
+
+
+def _inotify_waiter(path: Path):
+    """wait(timeout) that returns early on changes in `path`'s directory.
+
+    Uses inotify through libc (Linux); returns None where it is unavailable.
+    The directory is watched because editors often replace the file.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    # IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    if libc.inotify_add_watch(fd, str(path.parent).encode(), 0x38A) < 0:
+        os.close(fd)
+        return None
+
+    def wait(timeout: float):
+        if select.select([fd], [], [], timeout)[0]:
+            try:
+                os.read(fd, 65536)  # drain queued events
+            except BlockingIOError:
+                pass
+
+    wait.close = lambda: os.close(fd)
+    return wait
+
+
+def _settle(path: Path, quiet: float = 0.05, limit: float = 1.0):
+    """Wait until `path` stops changing, so a half-written file isn't loaded."""
+    deadline = time.monotonic() + limit
+    previous = None
+    while time.monotonic() < deadline:
+        try:
+            st = path.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == previous or stamp == _index_stamp:
+            return
+        previous = stamp
+        time.sleep(quiet)
+
+
+def _watch_loop(stop: threading.Event, interval: float, wait):
+    try:
+        while not stop.is_set():
+            if wait is None:
+                stop.wait(interval)
+            else:
+                wait(interval)
+            if stop.is_set():
+                break
+            try:
+                _settle(_REG_PATH)
+                with _lock:
+                    _refresh_index()
+            except Exception as e:  # keep watching through a bad edit
+                print(f"[Registry] watcher could not reload agents.yaml: {e}")
+    finally:
+        if wait is not None:
+            wait.close()
+
+
+def watch(interval: float = 0.5, use_inotify: bool = True) -> str:
+    """Start the background watcher for agents.yaml (idempotent).
+
+    Changes are picked up within `interval` seconds (immediately with
+    inotify) and only the agents whose entries changed are invalidated.
+    Returns the mode in use: "inotify" or "poll".
+    """
+    global _watcher
     with _lock:
-        if agent_id in _cache:
-            return _cache[agent_id]
-        manifest = _load_manifest().get(agent_id)
-        if not manifest or manifest["status"] == "deprecated":
-            raise KeyError(f"Agent '{agent_id}' not found/available")
-
-        module_path = manifest["module"]
-        class_name = manifest["classname"]
-
-        # Ensure module path is absolute from project root perspective (e.g., src.tools.module)
-        # The paths in agents.yaml are relative to src/ (e.g. tools.slack_api)
-        # When registry.py is in src/, and tests add project_mvp_root to sys.path,
-        # import_module needs "src.tools.slack_api"
-        if not module_path.startswith("src."):
-            full_module_path = f"src.{module_path}"
+        if _watcher is not None:
+            return _watcher[2]
+        _refresh_index()
+        wait = _inotify_waiter(_REG_PATH) if use_inotify else None
+        mode = "poll" if wait is None else "inotify"
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=_watch_loop,
+            args=(stop, interval, wait),
+            name="registry-watcher",
+            daemon=True,
+        )
+        _watcher = (thread, stop, mode)
+        thread.start()
+    print(f"[Registry] watching {_REG_PATH} ({mode})")
+    return mode
+
+
+def unwatch(timeout: float = None):
+    """Stop the watcher; lookups go back to stat-checking agents.yaml."""
+    global _watcher
+    with _lock:
+        watcher, _watcher = _watcher, None
+    if watcher is not None:
+        watcher[1].set()
+        watcher[0].join(timeout)
+
+
+def _import_lock(agent_id: str) -> threading.Lock:
+    lock = _import_locks.get(agent_id)
+    if lock is None:
+        with _lock:
+            lock = _import_locks.setdefault(agent_id, threading.Lock())
+    return lock
+
+
+def _version_key(agent_id: str, spec: dict):
+    return (agent_id, str(spec.get("version")), spec["module"], spec["classname"])
+
+
+def _bucket(agent_id: str, route_key) -> int:
+    digest = hashlib.sha1(f"{agent_id}:{route_key}".encode()).hexdigest()
+    return int(digest[:8], 16) % 100
+
+
+def _select(agent_id: str, entry: dict, version: str = None, route_key=None):
+    """Pick the manifest spec (current or canary) serving this lookup."""
+    canary = entry.get("canary")
+    if version is not None:
+        if str(entry.get("version")) == str(version):
+            return entry
+        if canary and str(canary.get("version")) == str(version):
+            return canary
+        raise KeyError(f"Version '{version}' of agent '{agent_id}' not available")
+    if (
+        canary
+        and route_key is not None
+        and _bucket(agent_id, route_key) < canary.get("percent", 0)
+    ):
+        return canary
+    return entry
+
+
+def _canary_route(agent_id: str, entry: dict):
+    """(percent, version key) of the entry's canary, None without one."""
+    canary = entry.get("canary")
+    if not canary:
+        return None
+    return canary.get("percent", 0), _version_key(agent_id, canary)
+
+
+def _publish(key, agent_class, generation: int, current: bool, route) -> bool:
+    """Swap in new snapshots containing `agent_class` (copy-on-write).
+
+    Snapshots that already hold `agent_class` and `route` are left alone.
+    """
+    global _cache, _versions, _canaries
+    agent_id = key[0]
+    with _lock:
+        if generation != _generation:
+            return False  # an upgrade landed while we were importing
+        if _versions.get(key) is not agent_class:
+            versions = dict(_versions)
+            versions[key] = agent_class
+            _versions = versions
+        if _canaries.get(agent_id) != route:
+            canaries = {k: v for k, v in _canaries.items() if k != agent_id}
+            if route is not None:
+                canaries[agent_id] = route
+            _canaries = canaries
+        if current and _cache.get(agent_id) is not agent_class:
+            snapshot = dict(_cache)
+            snapshot[agent_id] = agent_class
+            _cache = snapshot
+        return True
+
+
+def _find_loaded(agent_id: str, version: str):
+    """A still-loaded class for an explicit `version` (active or retired)."""
+    version = str(version)
+    for key, agent_class in list(_versions.items()):
+        if key[0] == agent_id and key[1] == version:
+            return agent_class
+    with _lock:
+        for key in list(_retired.keys()):
+            if key[0] == agent_id and key[1] == version:
+                return _retired.get(key)
+    return None
+
+
+def get(agent_id: str, version: str = None, route_key=None):
+    """Return the agent class.
+
+    `version` requests a specific version (current, canary, or a retired one
+    still in use by a pinned flow). `route_key` (e.g. a flow run id) routes a
+    stable `canary.percent` share of keys to the canary version.
+    """
+    # Lock-free fast path: `_cache`, `_canaries` and `_versions` are
+    # immutable snapshots that are only ever replaced wholesale.
+    if version is None:
+        route = _canaries.get(agent_id) if route_key is not None else None
+        if route is not None and _bucket(agent_id, route_key) < route[0]:
+            agent_class = _versions.get(route[1])
         else:
-            full_module_path = module_path
+            agent_class = _cache.get(agent_id)
+        if agent_class is not None:
+            return agent_class
+    else:
+        agent_class = _find_loaded(agent_id, version)
+        if agent_class is not None:
+            return agent_class
 
-        try:
+    # Miss: serialise per agent only, so a slow import of one agent does not
+    # block lookups (or imports) of any other.
+    with _import_lock(agent_id):
+        while True:
+            with _lock:
+                generation = _generation
+                entry = _manifest().get(agent_id)
+            if not entry or entry["status"] == "deprecated":
+                raise KeyError(f"Agent '{agent_id}' not found/available")
+            spec = _select(agent_id, entry, version, route_key)
+            key = _version_key(agent_id, spec)
+            agent_class = _versions.get(key)
+            if agent_class is None:
+                with _lock:
+                    agent_class = _retired.pop(key, None)  # revive if still alive
+            if agent_class is None:
+                agent_class = _import_agent(agent_id, spec, key)
+            route = _canary_route(agent_id, entry)
+            if _publish(key, agent_class, generation, spec is entry, route):
+                return agent_class
+
+
+def _import_agent(agent_id: str, manifest: dict, key=None):
+    module_path = manifest["module"]
+    class_name = manifest["classname"]
+
+    # Ensure module path is absolute from project root perspective (e.g., src.tools.module)
+    # The paths in agents.yaml are relative to src/ (e.g. tools.slack_api)
+    # When registry.py is in src/, and tests add project_mvp_root to sys.path,
+    # import_module needs "src.tools.slack_api"
+    # Entry-point plugins are importable exactly as declared.
+    if manifest.get("source") == plugins.SOURCE or module_path.startswith("src."):
+        full_module_path = module_path
+    else:
+        full_module_path = f"src.{module_path}"
+
+    version = str(manifest.get("version"))
+    with _lock:
+        owner = _module_owner.setdefault(full_module_path, version)
+        _module_users.setdefault((full_module_path, version), set()).add(agent_id)
+    try:
+        if owner == version:
             mod = import_module(full_module_path)  # Use prepended path
-            agent_class = getattr(mod, class_name)
-            _cache[agent_id] = agent_class
-            return agent_class
-        except ImportError as e:
-            raise ImportError(
-                f"Could not import module {full_module_path} for agent {agent_id}: {e}"
-            )
-        except AttributeError as e:
-            raise AttributeError(
-                f"Could not find class {class_name} in module {full_module_path} for agent {agent_id}: {e}"
+        else:
+            # Another version already owns the canonical module; load this
+            # version's code side by side instead of reusing sys.modules.
+            mod = _import_isolated(full_module_path, version)
+        return getattr(mod, class_name)
+    except ImportError as e:
+        raise ImportError(
+            f"Could not import module {full_module_path} for agent {agent_id}: {e}"
+        )
+    except AttributeError as e:
+        raise AttributeError(
+            f"Could not find class {class_name} in module {full_module_path} for agent {agent_id}: {e}"
+        )
+
+
+def _isolated_name(full_module_path: str, version: str) -> str:
+    return f"{full_module_path}__v{re.sub(r'[^0-9A-Za-z]', '_', version)}"
+
+
+def _import_isolated(full_module_path: str, version: str):
+    """Execute a fresh copy of `full_module_path` under a versioned name.
+
+    One copy per (module, version): agents sharing it get the same classes.
+    """
+    name = _isolated_name(full_module_path, version)
+    with _import_lock(name):
+        mod = sys.modules.get(name)
+        if mod is not None:
+            return mod
+        spec = importlib.util.find_spec(full_module_path)
+        if spec is None or not spec.origin:
+            raise ImportError(f"No source found for {full_module_path}")
+        iso_spec = importlib.util.spec_from_file_location(name, spec.origin)
+        mod = importlib.util.module_from_spec(iso_spec)
+        mod.__package__ = full_module_path.rpartition(".")[0]
+        sys.modules[name] = mod
+        try:
+            iso_spec.loader.exec_module(mod)
+        except BaseException:
+            sys.modules.pop(name, None)
+            raise
+        return mod
+
+
+def _release_module(full_module_path: str):
+    """Forget the canonical copy of a retired version's module.
+
+    The next version imports it afresh; the retired class keeps what it needs.
+    Lazy packages (tools/__init__.py) also drop the classes they cached from
+    it, so `src.tools.<Class>` resolves to the new version.
+    """
+    mod = sys.modules.pop(full_module_path, None)
+    parent_name, _, child = full_module_path.rpartition(".")
+    parent = sys.modules.get(parent_name)
+    if mod is None or parent is None:
+        return
+    if getattr(parent, child, None) is mod:
+        delattr(parent, child)
+    if hasattr(parent, "__getattr__"):
+        for name, value in list(vars(parent).items()):
+            if isinstance(value, type) and value.__module__ == full_module_path:
+                delattr(parent, name)
+
+
+def loaded_versions(agent_id: str):
+    """Versions of `agent_id` currently loaded (active plus not-yet-drained)."""
+    with _lock:
+        keys = list(_versions) + list(_retired.keys())
+    return sorted({key[1] for key in keys if key[0] == agent_id})
+
+
+def version_of(agent_id: str, agent_class):
+    """Version string `agent_class` was loaded as, None if not loaded by us."""
+    for key, loaded in list(_versions.items()):
+        if key[0] == agent_id and loaded is agent_class:
+            return key[1]
+    with _lock:
+        for key in list(_retired.keys()):
+            if key[0] == agent_id and _retired.get(key) is agent_class:
+                return key[1]
+    return None
+
+
+def collect():
+    """Garbage-collect retired versions no pinned flow references any more.
+
+    Returns the (agent_id, version) pairs still alive (i.e. not yet drained).
+    """
+    gc.collect()
+    with _lock:
+        return sorted({key[:2] for key in _retired.keys()})
+
+
+def list_agents(status: str = "active"):
+    """Ids of manifest entries with `status` (all entries if None)."""
+    with _lock:
+        manifest = _manifest()
+    return [
+        agent_id
+        for agent_id, entry in manifest.items()
+        if status is None or entry.get("status") == status
+    ]
+
+
+def prewarm(status: str = "active", max_workers: int = 8, background: bool = True):
+    """Import all agents with `status` concurrently, ahead of the first flow.
+
+    Per-agent import time is exported as `agent_import_seconds{agent_id}`.
+    Returns a Future resolving to {agent_id: error} for agents that failed to
+    import; a failed agent does not hold back readiness (it is logged and
+    reported instead). With background=False, blocks until warm.
+    """
+    agent_ids = list_agents(status)
+    _ready.clear()
+    REGISTRY_READY.set(0)
+    done = Future()
+
+    def warm_one(agent_id):
+        start = time.perf_counter()
+        try:
+            get(agent_id)
+        except Exception as e:
+            print(f"[Registry Warning] Prewarm of '{agent_id}' failed: {e}")
+            return agent_id, str(e)
+        finally:
+            AGENT_IMPORT_SECONDS.labels(agent_id).set(time.perf_counter() - start)
+        return agent_id, None
+
+    def run():
+        try:
+            workers = max(1, min(max_workers, len(agent_ids)))
+            with ThreadPoolExecutor(workers, thread_name_prefix="prewarm") as pool:
+                results = list(pool.map(warm_one, agent_ids))
+            errors = {agent_id: err for agent_id, err in results if err}
+            print(
+                f"[Registry] Prewarmed {len(agent_ids) - len(errors)}/{len(agent_ids)} agents"
             )
+            done.set_result(errors)
+        except Exception as e:
+            done.set_exception(e)
+        finally:
+            _ready.set()
+            REGISTRY_READY.set(1)
+
+    if background:
+        threading.Thread(target=run, name="registry-prewarm", daemon=True).start()
+    else:
+        run()
+    return done
+
+
+def ready() -> bool:
+    """True once a prewarm() has completed."""
+    return _ready.is_set()
+
+
+def wait_ready(timeout: float = None) -> bool:
+    return _ready.wait(timeout)
+
+
+def cost_model(agent_id: str) -> dict:
+    """Cost model declared for `agent_id` in the manifest ({} if none)."""
+    with _lock:
+        entry = _manifest().get(agent_id) or {}
+    return dict(entry.get("cost") or {})
 
 
 def upgrade(
-    agent_id: str, new_version: str, new_module: str = None, new_class: str = None
+    agent_id: str,
+    new_version: str,
+    new_module: str = None,
+    new_class: str = None,
+    percent: int = 100,
 ):
     """
     Hot-swap an agent implementation.
     Gemini: write the persistence back to YAML then `get()` will reload next call.
+
+    With percent < 100 the new version is written as the entry's `canary` and
+    only that share of route keys (flows) is sent to it; percent=100 makes it
+    current. Flows already built keep the classes they resolved (they are
+    pinned); superseded versions are retired and collected once drained.
+    """
+    upgrade_many(
+        [
+            {
+                "agent_id": agent_id,
+                "version": new_version,
+                "module": new_module,
+                "classname": new_class,
+                "percent": percent,
+            }
+        ]
+    )
+
+
+def _apply_change(item: dict, change: dict):
+    """Apply one upgrade to a manifest entry; raise before touching it if bad."""
+    agent_id = change["agent_id"]
+    percent = change.get("percent", 100)
+    if not change.get("version"):
+        raise ValueError(f"Upgrade of agent '{agent_id}' needs a version")
+    if not item:
+        if not (change.get("module") and change.get("classname")):
+            raise KeyError(
+                f"Agent '{agent_id}' not found; a new agent needs module and classname"
+            )
+        if percent < 100:
+            raise ValueError(f"New agent '{agent_id}' cannot start as a canary")
+        item.update(id=agent_id, status="active")
+    if percent >= 100:
+        item.pop("canary", None)
+        item["version"] = change["version"]
+        if change.get("module"):
+            item["module"] = change["module"]
+        if change.get("classname"):
+            item["classname"] = change["classname"]
+    else:
+        item["canary"] = {
+            "version": change["version"],
+            "module": change.get("module") or item.get("module"),
+            "classname": change.get("classname") or item.get("classname"),
+            "percent": max(0, int(percent)),
+        }
+
+
+def upgrade_many(changes):
+    """Apply several upgrades as one transaction.
+
+    `changes` is an iterable of dicts with `agent_id`, `version` and
+    optionally `module`, `classname`, `percent` (as for `upgrade`). The new
+    manifest is journaled, written once (temp file + rename, so readers never
+    see a partial file) and published with a single snapshot swap. Returns
+    the upgraded agent ids.
+
+    Every change is validated before anything is written: an unknown
+    `agent_id` is only added when `module` and `classname` are given.
     """
+    changes = list(changes)
     with _lock:
-        manifest = _load_manifest()
-        item = manifest.get(agent_id) or {}
-        item["version"] = new_version
-        if new_module:
-            item["module"] = new_module
-        if new_class:
-            item["classname"] = new_class
-        manifest[agent_id] = item
-        with open(_REG_PATH, "w") as f:
-            yaml.safe_dump(list(manifest.values()), f)
-        _cache.pop(agent_id, None)  # clear cache
+        manifest = {k: dict(v) for k, v in _manifest().items()}
+        upgraded = []
+        for change in changes:
+            agent_id = change["agent_id"]
+            item = manifest.get(agent_id) or {}
+            _apply_change(item, change)
+            manifest[agent_id] = item
+            upgraded.append(agent_id)
+        declared = [
+            v
+            for k, v in manifest.items()
+            if v.get("source") != plugins.SOURCE or k in upgraded
+        ]
+        _commit(declared)
+        _invalidate_index()
+        _drop(set(upgraded))
+    print(f"[Registry] upgraded {upgraded}")
+    return upgraded
+
+
+def _journal_path() -> Path:
+    return _REG_PATH.with_name(_REG_PATH.name + ".journal")
+
+
+def _atomic_write(path: Path, dump):
+    """Write `path` via a synced temp file and rename (atomic on POSIX)."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            dump(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    _fsync_dir(path.parent)  # make the rename itself durable
+
+
+def _fsync_dir(directory: Path):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # e.g. Windows, where directories cannot be opened
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _commit(entries):
+    """Journal `entries`, then atomically replace agents.yaml with them.
+
+    The journal holds the complete new manifest, so if the process dies
+    before the journal is removed, `recover()` simply re-applies it.
+    """
+    journal = _journal_path()
+    _atomic_write(journal, lambda f: json.dump({"manifest": entries}, f))
+    _atomic_write(_REG_PATH, lambda f: yaml.safe_dump(entries, f))
+    journal.unlink(missing_ok=True)
+
+
+def recover() -> bool:
+    """Finish an upgrade interrupted by a crash. Returns True if one was."""
+    journal = _journal_path()
+    with _lock:
+        try:
+            entries = json.loads(journal.read_text())["manifest"]
+        except FileNotFoundError:
+            return False
+        except (ValueError, KeyError):
+            # Torn journal: the manifest itself was never touched
+            print(f"[Registry] Discarding incomplete journal {journal}")
+            journal.unlink(missing_ok=True)
+            return False
+        print(f"[Registry] Re-applying journaled upgrade from {journal}")
+        _atomic_write(_REG_PATH, lambda f: yaml.safe_dump(entries, f))
+        journal.unlink(missing_ok=True)
+        _invalidate_index()
+        _drop(set(_cache) | {key[0] for key in _versions})
+        return True
+
+
+def _drop(agent_ids):
+    """Atomically swap in snapshots without `agent_ids` (call under _lock).
+
+    Their loaded versions move to `_retired`, which only holds them weakly:
+    a version stays alive while a pinned flow still references its class.
+    """
+    global _cache, _versions, _canaries, _generation
+    _generation += 1
+    _cache = {k: v for k, v in _cache.items() if k not in agent_ids}
+    _canaries = {k: v for k, v in _canaries.items() if k not in agent_ids}
+    versions = {}
+    for key, agent_class in _versions.items():
+        if key[0] in agent_ids:
+            _retired[key] = agent_class
+        else:
+            versions[key] = agent_class
+    _versions = versions
+    # Module copies no remaining agent uses are released; retired classes
+    # keep what they need
+    for (path, version), users in list(_module_users.items()):
+        users.difference_update(agent_ids)
+        if users:
+            continue
+        del _module_users[path, version]
+        if _module_owner.get(path) == version:
+            del _module_owner[path]
+            _release_module(path)
+        else:
+            sys.modules.pop(_isolated_name(path, version), None)
@@ -0,0 +1,286 @@
+"""
+Dispatch Scheduler
+==================
+• Sits in front of `orchestrator.build_flow`: callers `submit()` task graphs,
+  workers pull them with `next()` / `run_next()`.
+• Pipeline-level priority classes (interactive | standard | batch).
+• Weighted fair queuing across tenants / pipeline ids, so a burst from one
+  source (e.g. an analytics backfill) cannot starve the others.
+
+Fair queuing uses start-time virtual tags: every queued flow gets
+  finish_tag = max(virtual_time, last_tag[tenant]) + 1 / weight
+where weight = class weight × tenant weight. The smallest tag is dispatched
+first, so each tenant receives service in proportion to its weight and a new
+interactive request is never stuck behind a long batch backlog.
+
+Priority resolution: graph["priority"] > PIPELINE_PRIORITIES[graph["id"]] >
+"standard". Tenant resolution: graph["tenant"] > graph["id"].
+
+Deadlines / SLOs
+----------------
+• A graph may carry `deadline` (epoch seconds) or `slo_seconds` (relative to
+  submission). Such flows go to an earliest-deadline-first queue that is
+  served ahead of the fair-share queue.
+• Admission control: at submit time the expected completion is
+  now + (EDF work queued ahead / workers) + own expected latency, using an
+  EWMA of observed run latency per pipeline. If that misses the deadline the
+  flow is rejected (`AdmissionRejected`) or, with policy "degrade", demoted to
+  best-effort fair-share scheduling.
+• SLO attainment is counted in `flow_slo_total{pipeline_id, outcome}`.
+"""
+
+import heapq, itertools, threading, time, uuid
+from typing import Callable, Dict
+
+from .metrics import DISPATCH_QUEUE_DEPTH, DISPATCH_WAIT, SLO_OUTCOME
+
+CLASS_WEIGHTS = {"interactive": 8.0, "standard": 2.0, "batch": 1.0}
+
+# Pipeline ids produced by the Planner -> default priority class
+PIPELINE_PRIORITIES = {
+    "pipeline.onboarding.v0": "interactive",
+    "pipeline.feedback.v0": "standard",
+    "pipeline.analytics.v0": "batch",
+}
+
+DEADLINE_POLICIES = ("reject", "degrade")
+_EWMA_ALPHA = 0.2
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised by `Dispatcher.submit` when a deadline cannot be met."""
+
+
+class QueuedFlow:
+    """A graph waiting for dispatch (plus its scheduling bookkeeping)."""
+
+    __slots__ = (
+        "id",
+        "graph",
+        "priority_class",
+        "tenant",
+        "tag",
+        "deadline",
+        "degraded",
+        "enqueued_at",
+    )
+
+    def __init__(
+        self,
+        graph: Dict,
+        priority_class: str,
+        tenant: str,
+        tag: float,
+        deadline: float = None,
+    ):
+        self.id = uuid.uuid4().hex[:8]
+        self.graph = graph
+        self.priority_class = priority_class
+        self.tenant = tenant
+        self.tag = tag
+        self.deadline = deadline
+        self.degraded = False
+        self.enqueued_at = time.monotonic()
+
+    def __repr__(self):
+        return (
+            f"QueuedFlow(id={self.id!r}, pipeline={self.graph.get('id')!r}, "
+            f"class={self.priority_class!r}, tenant={self.tenant!r})"
+        )
+
+
+class Dispatcher:
+    """Priority + weighted-fair queue in front of the orchestrator."""
+
+    def __init__(
+        self,
+        runner: Callable[[Dict], object] = None,
+        class_weights: Dict[str, float] = None,
+        tenant_weights: Dict[str, float] = None,
+        pipeline_priorities: Dict[str, str] = None,
+        workers: int = 1,
+        default_latency: float = 30.0,
+        deadline_policy: str = "reject",
+    ):
+        if deadline_policy not in DEADLINE_POLICIES:
+            raise ValueError(f"Unknown deadline policy '{deadline_policy}'")
+        self._runner = runner
+        self.class_weights = dict(class_weights or CLASS_WEIGHTS)
+        self.tenant_weights = dict(tenant_weights or {})
+        self.pipeline_priorities = dict(pipeline_priorities or PIPELINE_PRIORITIES)
+        self.workers = max(1, workers)
+        self.default_latency = default_latency
+        self.deadline_policy = deadline_policy
+
+        self._cond = threading.Condition()
+        self._heap = []  # (tag, seq, QueuedFlow)
+        self._edf = []  # (deadline, seq, QueuedFlow)
+        self._latency = {}  # pipeline_id -> EWMA of run seconds
+        self._seq = itertools.count()
+        self._vtime = 0.0  # virtual time == tag of the last dispatched flow
+        self._last_tag = {}  # (class, tenant) -> last assigned finish tag
+        self._depth = {c: 0 for c in self.class_weights}
+
+    # ------------------------------------------------------------------
+    def _classify(self, graph: Dict, priority: str = None):
+        priority_class = (
+            priority
+            or graph.get("priority")
+            or self.pipeline_priorities.get(graph.get("id"), "standard")
+        )
+        if priority_class not in self.class_weights:
+            raise ValueError(f"Unknown priority class '{priority_class}'")
+        return priority_class
+
+    def _weight(self, priority_class: str, tenant: str) -> float:
+        return self.class_weights[priority_class] * self.tenant_weights.get(tenant, 1.0)
+
+    @staticmethod
+    def _deadline(graph: Dict):
+        if graph.get("deadline") is not None:
+            return float(graph["deadline"])
+        if graph.get("slo_seconds") is not None:
+            return time.time() + float(graph["slo_seconds"])
+        return None
+
+    def expected_latency(self, pipeline_id: str) -> float:
+        """EWMA of observed run time for `pipeline_id` (or `default_latency`)."""
+        return self._latency.get(pipeline_id, self.default_latency)
+
+    def observe_latency(self, pipeline_id: str, seconds: float):
+        with self._cond:
+            prev = self._latency.get(pipeline_id)
+            self._latency[pipeline_id] = (
+                seconds
+                if prev is None
+                else (1 - _EWMA_ALPHA) * prev + _EWMA_ALPHA * seconds
+            )
+
+    def _admission(self, pipeline_id: str, deadline: float):
+        """Return (projected finish, displaces) for a new EDF flow.
+
+        `displaces` is True when admitting it would push an already-admitted,
+        currently on-time flow past its own deadline.
+        """
+        now = time.time()
+        own = self.expected_latency(pipeline_id)
+        finish, elapsed = None, 0.0
+        for d, _, queued in sorted(self._edf):
+            if finish is None and d > deadline:
+                elapsed += own
+                finish = now + elapsed / self.workers
+            elapsed += self.expected_latency(queued.graph.get("id"))
+            if finish is not None:
+                late_with = now + elapsed / self.workers > d
+                late_without = now + (elapsed - own) / self.workers > d
+                if late_with and not late_without:
+                    return finish, True
+        if finish is None:
+            finish = now + (elapsed + own) / self.workers
+        return finish, False
+
+    # ------------------------------------------------------------------
+    def submit(self, graph: Dict, priority: str = None, tenant: str = None):
+        """Queue a task graph. Returns the `QueuedFlow` handle.
+
+        Raises `AdmissionRejected` if the graph has a deadline that cannot be
+        met and its policy (graph["deadline_policy"] or the dispatcher
+        default) is "reject".
+        """
+        priority_class = self._classify(graph, priority)
+        tenant = tenant or graph.get("tenant") or graph.get("id", "unknown")
+        deadline = self._deadline(graph)
+        with self._cond:
+            degraded = False
+            if deadline is not None:
+                pipeline_id = graph.get("id", "unknown")
+                projected, displaces = self._admission(pipeline_id, deadline)
+                if projected <= deadline and not displaces:
+                    item = QueuedFlow(graph, priority_class, tenant, 0.0, deadline)
+                    heapq.heappush(self._edf, (deadline, next(self._seq), item))
+                    self._track_depth(priority_class, +1)
+                    self._cond.notify()
+                    return item
+                policy = graph.get("deadline_policy", self.deadline_policy)
+                if policy != "degrade":
+                    SLO_OUTCOME.labels(pipeline_id, "rejected").inc()
+                    raise AdmissionRejected(
+                        f"Flow '{pipeline_id}' would displace admitted flows"
+                        if displaces
+                        else f"Flow '{pipeline_id}' projected to finish "
+                        f"{projected - deadline:.1f}s after its deadline"
+                    )
+                SLO_OUTCOME.labels(pipeline_id, "degraded").inc()
+                degraded = True
+            key = (priority_class, tenant)
+            start = max(self._vtime, self._last_tag.get(key, 0.0))
+            tag = start + 1.0 / self._weight(priority_class, tenant)
+            self._last_tag[key] = tag
+            item = QueuedFlow(graph, priority_class, tenant, tag)
+            item.degraded = degraded
+            heapq.heappush(self._heap, (tag, next(self._seq), item))
+            self._track_depth(priority_class, +1)
+            self._cond.notify()
+        return item
+
+    def _track_depth(self, priority_class: str, delta: int):
+        self._depth[priority_class] = self._depth.get(priority_class, 0) + delta
+        DISPATCH_QUEUE_DEPTH.labels(priority_class).set(self._depth[priority_class])
+
+    def next(self, timeout: float = None):
+        """Pop the next flow to run (blocks up to `timeout`; None if empty).
+
+        Deadline-bearing flows are served earliest-deadline-first, ahead of
+        the fair-share queue.
+        """
+        with self._cond:
+            if not (self._edf or self._heap) and not self._cond.wait_for(
+                lambda: self._edf or self._heap, timeout=timeout
+            ):
+                return None
+            if self._edf:
+                _, _, item = heapq.heappop(self._edf)
+            else:
+                tag, _, item = heapq.heappop(self._heap)
+                self._vtime = max(self._vtime, tag)
+            self._track_depth(item.priority_class, -1)
+        DISPATCH_WAIT.labels(item.priority_class).observe(
+            time.monotonic() - item.enqueued_at
+        )
+        return item
+
+    def run_next(self, timeout: float = None):
+        """Dispatch one queued flow through the runner and return its result.
+
+        Records the run latency for admission control and, for flows with a
+        deadline, whether the SLO was met.
+        """
+        item = self.next(timeout)
+        if item is None:
+            return None
+        pipeline_id = item.graph.get("id", "unknown")
+        start = time.monotonic()
+        try:
+            return self._run(item.graph)
+        finally:
+            self.observe_latency(pipeline_id, time.monotonic() - start)
+            if item.deadline is not None:
+                outcome = "met" if time.time() <= item.deadline else "missed"
+                SLO_OUTCOME.labels(pipeline_id, outcome).inc()
+
+    def _run(self, graph: Dict):
+        if self._runner is None:
+            from .orchestrator import build_flow
+
+            self._runner = lambda g: build_flow(g)()
+        return self._runner(graph)
+
+    # ------------------------------------------------------------------
+    def depth(self, priority_class: str = None) -> int:
+        with self._cond:
+            if priority_class is None:
+                return len(self._heap) + len(self._edf)
+            return self._depth.get(priority_class, 0)
+
+    def __len__(self):
+        return self.depth()
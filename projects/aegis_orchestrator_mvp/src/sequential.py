@@ -0,0 +1,81 @@
+"""
+Sequential A/B testing with always-valid confidence intervals.
+
+Each variant's success rate gets a confidence sequence: an interval that
+holds at every sample size simultaneously (with probability 1 - alpha), so
+the counts can be checked after every `record` without inflating the error
+rate the way repeatedly peeking at a fixed-n test does.
+
+• Boundary — normal-mixture confidence sequence for the mean of [0, 1]
+             outcomes (sub-Gaussian with sigma = 1/2), tuned to be tightest
+             around TUNED_TRIALS samples; alpha is split across the variants.
+• loser    — its upper bound is below another variant's lower bound.
+• winner   — its lower bound is above every other variant's upper bound.
+• running  — neither, yet.
+
+`feedback.experiment_status(pipeline)` reports this from the stored counts
+and `feedback.best_variant` stops selecting losers.
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+
+ALPHA = 0.05
+TUNED_TRIALS = 500  # sample size at which the boundary is tightest
+_SIGMA2 = 0.25  # variance bound of a Bernoulli outcome
+
+WINNER, LOSER, RUNNING = "winner", "loser", "running"
+
+
+def _rho(alpha: float) -> float:
+    # Mixture variance that makes the boundary tightest at TUNED_TRIALS
+    log_term = -2.0 * np.log(alpha)
+    return _SIGMA2 * TUNED_TRIALS / (log_term + np.log(log_term + 1.0))
+
+
+def confidence_sequence(
+    successes: np.ndarray, failures: np.ndarray, alpha: float = ALPHA
+):
+    """(lower, upper) always-valid bounds on each success rate."""
+    successes = np.asarray(successes, dtype=float)
+    n = successes + np.asarray(failures, dtype=float)
+    rho = _rho(alpha)
+    v = _SIGMA2 * n + rho
+    radius = np.sqrt(v * np.log(v / (rho * alpha**2)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(n > 0, successes / n, 0.5)
+        radius = np.where(n > 0, radius / n, np.inf)
+    return np.clip(rate - radius, 0.0, 1.0), np.clip(rate + radius, 0.0, 1.0)
+
+
+def evaluate(
+    variants: Sequence[str],
+    successes: Sequence[float],
+    failures: Sequence[float],
+    alpha: float = ALPHA,
+) -> Dict[str, Dict]:
+    """Per-variant rate, bounds and status (winner / loser / running)."""
+    if not variants:
+        return {}
+    s = np.asarray(successes, dtype=float)
+    f = np.asarray(failures, dtype=float)
+    lower, upper = confidence_sequence(s, f, alpha / len(variants))
+    result = {}
+    for i, variant in enumerate(variants):
+        others = np.arange(len(variants)) != i
+        status = RUNNING
+        if others.any() and upper[i] < lower[others].max():
+            status = LOSER
+        elif others.any() and lower[i] > upper[others].max():
+            status = WINNER
+        n = s[i] + f[i]
+        result[variant] = {
+            "successes": int(s[i]),
+            "failures": int(f[i]),
+            "rate": s[i] / n if n else None,
+            "lower": float(lower[i]),
+            "upper": float(upper[i]),
+            "status": status,
+        }
+    return result
@@ -1,20 +1,61 @@
-from .okta_api import OktaAPI
-from .slack_api import SlackAPI
-from .crm_api import CRMAPI
-from .calendar_api import CalendarAPI
-from .email_api import EmailAPI
-from .sql_tool import SQLTool
-from .plot_api import PlotAPI
-from .survey_api import SurveyAPI
+"""Tool adapters, loaded lazily.
+
+`from src.tools import SlackAPI` (and `getattr(tools, name)`) imports only the
+adapter module that defines the requested class, so importing the package does
+not drag in pandas, slack_sdk or dotenv for tools a flow never uses. Other
+names (except submodules and private names) fall back to installed
+`aegis.agents` entry points; a plugin that fails to load is an AttributeError.
+"""
+
+from importlib import import_module
+
+# Class name -> submodule defining it
+_TOOL_MODULES = {
+    "OktaAPI": "okta_api",
+    "SlackAPI": "slack_api",
+    "CRMAPI": "crm_api",
+    "CalendarAPI": "calendar_api",
+    "EmailAPI": "email_api",
+    "SQLTool": "sql_tool",
+    "PlotAPI": "plot_api",
+    "SurveyAPI": "survey_api",
+}
+
+_SUBMODULES = frozenset(_TOOL_MODULES.values())
 
 # Exporting all tool classes for easier access by the orchestrator
-__all__ = [
-    "OktaAPI",
-    "SlackAPI",
-    "CRMAPI",
-    "CalendarAPI",
-    "EmailAPI",
-    "SQLTool",
-    "PlotAPI",
-    "SurveyAPI",
-]
+__all__ = list(_TOOL_MODULES)
+
+
+def __getattr__(name):
+    submodule = _TOOL_MODULES.get(name)
+    if submodule is not None:
+        value = getattr(import_module(f".{submodule}", __name__), name)
+    elif not name.startswith("_") and name not in _SUBMODULES:
+        # Submodules are left to the import system: `from src.tools import
+        # slack_api` probes this hook first and must not scan entry points
+        value = _plugin_tool(name)
+    else:
+        value = None
+    if value is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # cache: later lookups bypass __getattr__
+    return value
+
+
+def _plugin_tool(name):
+    # Third-party tools declared as `aegis.agents` entry points (plugins.py)
+    from .. import plugins
+
+    try:
+        return plugins.load(name)
+    except KeyError:
+        return None
+    except Exception as e:  # keep hasattr()/getattr(default) working
+        raise AttributeError(
+            f"module {__name__!r} could not load plugin tool {name!r}: {e}"
+        ) from e
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
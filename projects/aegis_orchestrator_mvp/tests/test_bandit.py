@@ -0,0 +1,60 @@
+"""Bandit policy tests — scoring, exploration and convergence."""
+
+import os, sys
+import numpy as np
+import pytest
+
+_current_file_dir = os.path.dirname(os.path.abspath(__file__))
+_project_mvp_root_dir = os.path.dirname(_current_file_dir)
+if _project_mvp_root_dir not in sys.path:
+    sys.path.insert(0, _project_mvp_root_dir)
+
+from src import bandit
+
+TRUE_RATES = {"a": 0.3, "b": 0.5, "c": 0.7}
+
+
+def _simulate(policy, rounds=600, seed=0):
+    rng = np.random.default_rng(seed)
+    arms = list(TRUE_RATES)
+    s, f = np.zeros(len(arms)), np.zeros(len(arms))
+    picks = []
+    for _ in range(rounds):
+        arm = arms.index(bandit.choose(arms, s, f, policy, rng=rng))
+        if rng.random() < TRUE_RATES[arms[arm]]:
+            s[arm] += 1
+        else:
+            f[arm] += 1
+        picks.append(arms[arm])
+    return picks
+
+
+@pytest.mark.parametrize("policy", sorted(bandit.POLICIES))
+def test_policies_converge_on_best_variant(policy):
+    picks = _simulate(policy)
+    assert picks[-200:].count("c") / 200 > 0.6
+
+
+def test_thompson_wastes_fewer_runs_than_uniform():
+    picks = _simulate("thompson")
+    # A uniform split would spend 2/3 of the runs on worse variants
+    assert sum(p != "c" for p in picks) / len(picks) < 0.3
+
+
+def test_ucb1_tries_untried_variants_first():
+    rng = np.random.default_rng(0)
+    assert bandit.choose(["a", "b"], [50, 0], [0, 0], "ucb1", rng=rng) == "b"
+
+
+def test_thompson_scores_all_variants_in_one_pass():
+    rng = np.random.default_rng(0)
+    scores = bandit.thompson(np.array([90.0, 10.0]), np.array([10.0, 90.0]), rng)
+    assert scores.shape == (2,)
+    assert scores[0] > scores[1]
+
+
+def test_unknown_policy_and_empty_variants_rejected():
+    with pytest.raises(ValueError):
+        bandit.choose(["a"], [1], [1], "softmax")
+    with pytest.raises(ValueError):
+        bandit.choose([], [], [], "thompson")
@@ -0,0 +1,39 @@
+"""Per-tool cost accounting tests."""
+
+import os, sys
+import pytest
+
+_current_file_dir = os.path.dirname(os.path.abspath(__file__))
+_project_mvp_root_dir = os.path.dirname(_current_file_dir)
+if _project_mvp_root_dir not in sys.path:
+    sys.path.insert(0, _project_mvp_root_dir)
+
+from src import cost
+
+
+def test_usage_reads_tokens_and_rows():
+    assert cost.usage({"usage": {"total_tokens": 120}}) == {"tokens": 120, "rows": 0}
+    assert cost.usage({"usage": {"prompt_tokens": 10, "completion_tokens": 5}}) == {
+        "tokens": 15,
+        "rows": 0,
+    }
+    assert cost.usage({"data": [{}, {}, {}]})["rows"] == 3
+    assert cost.usage({"rows_affected": -1})["rows"] == 0
+    assert cost.usage(None) == {"tokens": 0, "rows": 0}
+
+
+def test_task_cost_combines_model_terms():
+    model = {"per_call": 0.01, "per_token": 0.001, "per_row": 0.1}
+    result = {"usage": {"total_tokens": 100}, "data": [1, 2]}
+    assert cost.task_cost(model, result) == pytest.approx(0.01 + 0.1 + 0.2)
+    assert cost.task_cost({}, result) == 0.0
+
+
+def test_ledger_budget():
+    ledger = cost.CostLedger(budget=0.5)
+    ledger.charge("a", 0.3)
+    assert not ledger.exceeded
+    ledger.charge("a", 0.3)
+    assert ledger.exceeded
+    assert ledger.per_task == {"a": pytest.approx(0.6)}
+    assert cost.CostLedger().exceeded is False
@@ -0,0 +1,95 @@
+"""Latency / cost estimator tests."""
+
+import os, sys, time
+import pytest
+
+_current_file_dir = os.path.dirname(os.path.abspath(__file__))
+_project_mvp_root_dir = os.path.dirname(_current_file_dir)
+if _project_mvp_root_dir not in sys.path:
+    sys.path.insert(0, _project_mvp_root_dir)
+
+from src import estimator
+
+
+@pytest.fixture(autouse=True)
+def clean_history():
+    estimator.reset()
+    yield
+    estimator.reset()
+
+
+def _seed(agent, seconds, cost=0.0, n=50):
+    for _ in range(n):
+        estimator.observe(agent, seconds, cost)
+
+
+def test_sequential_graph_sums_latencies():
+    _seed("A", 1.0, 0.01)
+    _seed("B", 2.0, 0.02)
+    graph = {"tasks": [{"id": "a", "agent": "A"}, {"id": "b", "agent": "B"}]}
+    est = estimator.estimate(graph)
+    assert est["p50_seconds"] == pytest.approx(3.0)
+    assert est["cost_usd"] == pytest.approx(0.03)
+    assert est["unknown_agents"] == []
+
+
+def test_parallel_branches_take_the_longest_path():
+    _seed("A", 1.0)
+    _seed("B", 2.0)
+    graph = {
+        "tasks": [
+            {"id": "root", "agent": "A", "dependencies": []},
+            {"id": "left", "agent": "B", "dependencies": ["root"]},
+            {"id": "right", "agent": "A", "dependencies": ["root"]},
+            {"id": "join", "agent": "A", "dependencies": ["left", "right"]},
+        ]
+    }
+    # The orchestrator runs tasks one by one: branches only overlap when asked
+    assert estimator.estimate(graph)["p50_seconds"] == pytest.approx(5.0)
+    assert estimator.estimate(graph, parallel=True)["p50_seconds"] == pytest.approx(4.0)
+
+
+def test_preload_seeds_history_behind_live_samples():
+    estimator.observe("A", 2.0)
+    estimator.preload({"A": [9.0] * 1000, "B": [3.0]})
+    assert list(estimator._latency["A"])[-1] == 2.0
+    assert len(estimator._latency["A"]) == estimator._MAX_SAMPLES
+    est = estimator.estimate({"tasks": [{"id": "b", "agent": "B"}]})
+    assert est["p50_seconds"] == pytest.approx(3.0)
+    assert est["unknown_agents"] == []
+
+
+def test_p95_reflects_tail():
+    for i in range(100):
+        estimator.observe("A", 10.0 if i % 10 == 0 else 1.0)
+    est = estimator.estimate({"tasks": [{"id": "a", "agent": "A"}]})
+    assert est["p50_seconds"] == pytest.approx(1.0)
+    assert est["p95_seconds"] == pytest.approx(10.0)
+
+
+def test_unknown_agents_use_declared_cost_and_default_latency():
+    graph = {"tasks": [{"id": "x", "agent": "New"}]}
+    est = estimator.estimate(graph, cost_model=lambda a: {"per_call": 0.5})
+    assert est["p50_seconds"] == estimator.DEFAULT_LATENCY
+    assert est["cost_usd"] == 0.5
+    assert est["unknown_agents"] == ["New"]
+
+
+def test_cycle_rejected():
+    graph = {
+        "tasks": [
+            {"id": "a", "agent": "A", "dependencies": ["b"]},
+            {"id": "b", "agent": "A", "dependencies": ["a"]},
+        ]
+    }
+    with pytest.raises(ValueError):
+        estimator.estimate(graph)
+
+
+def test_fast_enough_for_every_plan():
+    for agent in "ABCDEFGH":
+        _seed(agent, 1.0, n=512)
+    graph = {"tasks": [{"id": f"t{i}", "agent": "ABCDEFGH"[i % 8]} for i in range(20)]}
+    start = time.perf_counter()
+    estimator.estimate(graph)
+    assert time.perf_counter() - start < 0.25
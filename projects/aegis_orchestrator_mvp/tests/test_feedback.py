@@ -1,9 +1,10 @@
 import unittest
 import sqlite3
+import threading
 import time
 import os
 import sys
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 # Adjust path to import from src
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -19,23 +20,10 @@ if project_root not in sys.path:
 # Create data directory if it doesn't exist
 os.makedirs(data_path, exist_ok=True)
 
-# Override _DB_FILE for testing before importing feedback
+# Test database; the suite points feedback at it with feedback.configure()
 TEST_DB_FILE = os.path.join(data_path, "test_feedback.db")
 
-# IMPORTANT: Mock the database path *before* feedback module is imported the first time
-# by other test files or the module itself if it's reloaded.
-# We also need to control the `con` object within feedback.
-# One way is to allow `feedback.con` to be reassigned for tests.
-
-# To ensure a clean state for feedback's global `con` and `_DB_FILE`
-# we can try to reload the module or carefully manage its state.
-if "src.feedback" in sys.modules:
-    del sys.modules["src.feedback"]
-
-# Now set the path for feedback to use during its import
-_mock_db_path = MagicMock(return_value=TEST_DB_FILE)
-with patch("src.feedback._DB_FILE", TEST_DB_FILE):
-    from src import feedback  # Import after patching
+from src import feedback, feedback_backends
 
 
 class TestFeedback(unittest.TestCase):
@@ -44,29 +32,24 @@ class TestFeedback(unittest.TestCase):
         # Ensure the test database is clean before all tests in this class
         if os.path.exists(TEST_DB_FILE):
             os.remove(TEST_DB_FILE)
-
-        # Re-initialize the connection in the feedback module to use the test DB
-        # This requires feedback.py to be structured to allow `con` to be re-initialized
-        # or by re-running its schema setup against the new TEST_DB_FILE.
-        feedback.con = sqlite3.connect(TEST_DB_FILE)
-        feedback.con.executescript(
-            feedback._schema
-        )  # Use executescript for multi-statement schema
-        feedback.con.commit()
+        cls._previous_db = feedback._db_file
+        feedback.configure(TEST_DB_FILE)
 
     @classmethod
     def tearDownClass(cls):
-        # Close the connection and remove the test database after all tests
-        if feedback.con:
-            feedback.con.close()
-        if os.path.exists(TEST_DB_FILE):
-            os.remove(TEST_DB_FILE)
+        # Point the store back and remove the test database
+        feedback.configure(cls._previous_db)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(TEST_DB_FILE + suffix):
+                os.remove(TEST_DB_FILE + suffix)
 
     def setUp(self):
         # Clean the ab_stats table before each test method
-        with feedback.con:
-            feedback.con.execute("DELETE FROM ab_stats")
-            feedback.con.commit()
+        with feedback._connection() as con:
+            for table in ("ab_stats", "feedback_events", "ab_stats_hourly"):
+                con.execute(f"DELETE FROM {table}")
+            con.execute("DELETE FROM feedback_rollup")
+        feedback.invalidate_stats()
 
     @patch("src.feedback.VARIANT_METRIC")  # Mock Prometheus counter
     def test_record_new_success(self, mock_variant_metric_counter):
@@ -75,7 +58,7 @@ class TestFeedback(unittest.TestCase):
         mock_variant_metric_counter.labels.assert_called_with("pipe1", "varA")
         mock_variant_metric_counter.labels.return_value.inc.assert_called_once()
 
-        cur = feedback.con.execute(
+        cur = feedback._connection().execute(
             "SELECT success, failure FROM ab_stats WHERE pipeline = 'pipe1' AND variant = 'varA'"
         )
         row = cur.fetchone()
@@ -86,7 +69,7 @@ class TestFeedback(unittest.TestCase):
     @patch("src.feedback.VARIANT_METRIC")
     def test_record_new_failure(self, mock_variant_metric_counter):
         feedback.record("pipe1", "varB", False, tool_name="TestTool")
-        cur = feedback.con.execute(
+        cur = feedback._connection().execute(
             "SELECT success, failure FROM ab_stats WHERE pipeline = 'pipe1' AND variant = 'varB'"
         )
         row = cur.fetchone()
@@ -101,7 +84,7 @@ class TestFeedback(unittest.TestCase):
         feedback.record("pipe2", "varA", False)
         feedback.record("pipe2", "varA", True)
 
-        cur = feedback.con.execute(
+        cur = feedback._connection().execute(
             "SELECT success, failure FROM ab_stats WHERE pipeline = 'pipe2' AND variant = 'varA'"
         )
         row = cur.fetchone()
@@ -170,6 +153,552 @@ class TestFeedback(unittest.TestCase):
             feedback.best_variant("pipe_all_low", default="default_low"), "default_low"
         )
 
+    def test_tune_enables_wal(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            con = feedback_backends._tune(sqlite3.connect(os.path.join(tmp, "fb.db")))
+            try:
+                self.assertEqual(
+                    con.execute("PRAGMA journal_mode").fetchone()[0], "wal"
+                )
+                self.assertEqual(con.execute("PRAGMA synchronous").fetchone()[0], 1)
+            finally:
+                con.close()
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_record_is_a_single_upsert(self, mock_variant_metric_counter):
+        statements = []
+        feedback._connection().set_trace_callback(statements.append)
+        try:
+            feedback.record("pipe_up", "varA", True)
+            feedback.record("pipe_up", "varA", False)
+        finally:
+            feedback._connection().set_trace_callback(None)
+        self.assertFalse([q for q in statements if q.lstrip().startswith("SELECT")])
+        row = (
+            feedback._connection()
+            .execute("SELECT success, failure FROM ab_stats WHERE pipeline = 'pipe_up'")
+            .fetchone()
+        )
+        self.assertEqual(row, (1, 1))
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_best_variant_served_from_memory(self, mock_variant_metric_counter):
+        for _ in range(20):
+            feedback.record("pipe_mem", "varA", True)
+        self.assertEqual(feedback.best_variant("pipe_mem"), "varA")
+
+        statements = []
+        feedback._connection().set_trace_callback(statements.append)
+        try:
+            for _ in range(25):
+                feedback.record("pipe_mem", "varB", True)
+            feedback.record("pipe_mem", "varA", False)
+            self.assertEqual(feedback.best_variant("pipe_mem"), "varB")
+        finally:
+            feedback._connection().set_trace_callback(None)
+        self.assertFalse([q for q in statements if q.lstrip().startswith("SELECT")])
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_stats_reconciled_with_db(self, mock_variant_metric_counter):
+        self.assertEqual(feedback.best_variant("pipe_ext"), "default")
+        with feedback._connection() as con:  # e.g. another process writing
+            con.execute(
+                "INSERT INTO ab_stats (pipeline, variant, success, failure) "
+                "VALUES ('pipe_ext', 'varZ', 30, 0)"
+            )
+        self.assertEqual(feedback.best_variant("pipe_ext"), "default")  # cached
+        feedback.refresh_stats()  # what the background refresh runs
+        self.assertEqual(feedback.best_variant("pipe_ext"), "varZ")
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_lookup_never_flushes_or_rolls_up(self, mock_variant_metric_counter):
+        feedback.record("pipe_ro", "varA", True)  # not rolled up yet
+        writer = feedback.start_writer(flush_interval=60)
+        try:
+            feedback.record("pipe_ro", "varA", False)  # queued, uncommitted
+            store = feedback.get_backend()
+            with patch.object(
+                store, "rollup", side_effect=AssertionError
+            ), patch.object(writer, "flush", side_effect=AssertionError):
+                feedback.invalidate_stats()
+                self.assertEqual(feedback._variant_stats("pipe_ro"), [("varA", 1, 1)])
+                self.assertEqual(
+                    feedback._variant_stats("pipe_ro", window=60), [("varA", 1, 1)]
+                )
+        finally:
+            feedback.stop_writer()
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_refresh_keeps_concurrent_and_queued_records(
+        self, mock_variant_metric_counter
+    ):
+        feedback.record("pipe_gen", "varA", True)
+        feedback.best_variant("pipe_gen")
+        store = feedback.get_backend()
+        real_totals, raced = store.totals, []
+
+        def totals_racing_a_record(pipeline):
+            rows = real_totals(pipeline)
+            if not raced:  # lands after the read: not in this snapshot
+                raced.append(True)
+                feedback.record("pipe_gen", "varA", False)
+            return rows
+
+        with patch.object(store, "totals", side_effect=totals_racing_a_record):
+            feedback.refresh_stats("pipe_gen")
+        self.assertEqual(feedback._variant_stats("pipe_gen"), [("varA", 1, 1)])
+
+        feedback.start_writer(flush_interval=60)
+        try:
+            for _ in range(3):
+                feedback.record("pipe_gen", "varA", False)  # queued only
+            feedback.refresh_stats("pipe_gen")
+            self.assertEqual(feedback._variant_stats("pipe_gen"), [("varA", 1, 4)])
+            self.assertTrue(feedback.flush())
+            feedback.refresh_stats("pipe_gen")  # committed: counted once
+            self.assertEqual(feedback._variant_stats("pipe_gen"), [("varA", 1, 4)])
+        finally:
+            feedback.stop_writer()
+        self.assertEqual(feedback._pending, {})
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_bandit_policy_explores_candidate_variants(
+        self, mock_variant_metric_counter
+    ):
+        for _ in range(5):
+            feedback.record("pipe_bandit", "varA", False)
+        # varB has never run: UCB1 tries it before exploiting varA
+        self.assertEqual(
+            feedback.best_variant("pipe_bandit", policy="ucb1", variants=["varB"]),
+            "varB",
+        )
+        self.assertIn(
+            feedback.best_variant("pipe_bandit", policy="thompson"), ("varA",)
+        )
+        self.assertEqual(
+            feedback.best_variant("pipe_none", default="d", policy="thompson"), "d"
+        )
+        with self.assertRaises(ValueError):
+            feedback.best_variant("pipe_bandit", policy="softmax")
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_record_appends_capped_event(self, mock_variant_metric_counter):
+        feedback.record(
+            "pipe_ev",
+            "varA",
+            False,
+            tool_name="SlackAPI",
+            inputs={"text": "x" * 10_000},
+            output={"ok": False},
+            error_message="boom",
+            duration_s=0.25,
+        )
+        row = (
+            feedback._connection()
+            .execute(
+                "SELECT tool, success, duration_ms, error, inputs, output FROM feedback_events"
+            )
+            .fetchone()
+        )
+        tool, success, duration_ms, error, inputs, output = row
+        self.assertEqual((tool, success, error), ("SlackAPI", 0, "boom"))
+        self.assertAlmostEqual(duration_ms, 250.0)
+        self.assertEqual(output, '{"ok": false}')
+        self.assertTrue(inputs.endswith("...[truncated]"))
+        self.assertLessEqual(len(inputs), feedback.PAYLOAD_LIMIT + 20)
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_rollup_is_incremental(self, mock_variant_metric_counter):
+        for i in range(6):
+            feedback.record("pipe_roll", "varA", i % 3 != 0, duration_s=0.1)
+        self.assertEqual(feedback.rollup(), 6)
+        self.assertEqual(feedback.rollup(), 0)  # nothing new: no double count
+        feedback.record("pipe_roll", "varA", True, duration_s=0.4)
+        self.assertEqual(feedback.rollup(), 1)
+
+        ((variant, bucket, s, f, avg_ms),) = feedback.hourly_stats("pipe_roll")
+        self.assertEqual((variant, s, f), ("varA", 5, 2))
+        self.assertEqual(bucket % feedback.BUCKET_SECONDS, 0)
+        self.assertAlmostEqual(avg_ms, 1000.0 / 7)
+        self.assertEqual(feedback.hourly_stats("pipe_roll", since=bucket + 1), [])
+
+    def _seed_history(self, pipeline, variant, age_s, success, failure):
+        bucket = int((time.time() - age_s) // 3600) * 3600
+        with feedback._connection() as con:
+            con.execute(
+                feedback_backends._UPSERT,
+                (pipeline, variant, success, failure),
+            )
+            con.execute(
+                """INSERT INTO ab_stats_hourly VALUES (?, ?, ?, ?, ?, 0, 0)
+                   ON CONFLICT (pipeline, variant, bucket) DO UPDATE
+                   SET success = success + excluded.success,
+                       failure = failure + excluded.failure""",
+                (pipeline, variant, bucket, success, failure),
+            )
+
+    def test_windowed_and_decayed_rates_demote_degraded_variant(self):
+        day = 24 * 3600
+        self._seed_history("pipe_decay", "varA", 10 * day, 90, 10)  # was great
+        self._seed_history("pipe_decay", "varA", 0, 5, 25)  # degraded today
+        self._seed_history("pipe_decay", "varB", 0, 18, 12)
+
+        self.assertEqual(feedback.best_variant("pipe_decay"), "varA")  # lifetime
+        self.assertEqual(feedback.best_variant("pipe_decay", window=day), "varB")
+        self.assertEqual(feedback.best_variant("pipe_decay", half_life=day), "varB")
+
+        windowed = {
+            v: (s, f) for v, s, f in feedback._variant_stats("pipe_decay", window=day)
+        }
+        self.assertEqual(windowed, {"varA": (5, 25), "varB": (18, 12)})
+        decayed = {
+            v: s for v, s, f in feedback._variant_stats("pipe_decay", half_life=day)
+        }
+        self.assertLess(decayed["varA"], 5 + 90 * 0.01)  # old successes ~gone
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_recorded_events_land_in_current_bucket(self, mock_variant_metric_counter):
+        feedback.record("pipe_win", "varA", True)
+        feedback._variant_stats("pipe_win")  # load, folding in the event
+        feedback.record("pipe_win", "varA", False)  # bumped in memory
+        self.assertEqual(
+            feedback._variant_stats("pipe_win", window=60), [("varA", 1.0, 1.0)]
+        )
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_record_many_aggregates_per_variant(self, mock_variant_metric_counter):
+        feedback.best_variant("pipe_bulk")  # stats loaded: record_many bumps them
+        events = [
+            {
+                "pipeline_id": "pipe_bulk",
+                "variant": f"var{i % 2}",
+                "success": i % 4 != 0,
+            }
+            for i in range(40)
+        ]
+        events.append(
+            {
+                "pipeline_id": "pipe_bulk",
+                "variant": "var0",
+                "success": False,
+                "tool_name": "BulkTool",
+                "error_message": "quota",
+                "duration_s": 0.5,
+            }
+        )
+        self.assertEqual(feedback.record_many(events), 41)
+        self.assertEqual(feedback.record_many([]), 0)
+
+        labels = mock_variant_metric_counter.labels
+        self.assertEqual(labels.call_count, 2)  # one increment per label set
+        incs = sorted(c.args[0] for c in labels.return_value.inc.call_args_list)
+        self.assertEqual(incs, [20, 21])
+
+        rows = dict(
+            (v, (s, f))
+            for v, s, f in feedback._connection().execute(
+                "SELECT variant, success, failure FROM ab_stats WHERE pipeline = 'pipe_bulk'"
+            )
+        )
+        self.assertEqual(rows, {"var0": (10, 11), "var1": (20, 0)})
+        self.assertEqual(
+            sorted(feedback._variant_stats("pipe_bulk")),
+            [("var0", 10, 11), ("var1", 20, 0)],
+        )
+        (n_events,) = (
+            feedback._connection()
+            .execute(
+                "SELECT COUNT(*) FROM feedback_events WHERE pipeline = 'pipe_bulk'"
+            )
+            .fetchone()
+        )
+        self.assertEqual(n_events, 41)
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_record_many_none_success_is_timing_only(self, mock_variant_metric_counter):
+        feedback.best_variant("pipe_timed")
+        n = feedback.record_many(
+            [{"pipeline_id": "pipe_timed", "variant": "varT", "success": True}] * 3
+            + [
+                {
+                    "pipeline_id": "pipe_timed",
+                    "variant": "varT",
+                    "success": None,
+                    "tool_name": "TimedTool",
+                    "duration_s": 0.5,
+                }
+            ]
+        )
+        self.assertEqual(n, 4)
+        self.assertEqual(feedback._variant_stats("pipe_timed"), [("varT", 3, 0)])
+        self.assertEqual(feedback.report(), [("pipe_timed", "varT", 3, 0)])
+        self.assertEqual(feedback.durations()["TimedTool"], [0.5])
+
+    @patch("src.feedback.EXPERIMENT_DECISIONS")
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_sequential_test_retires_losers(
+        self, mock_variant_metric_counter, mock_decisions
+    ):
+        feedback.record_many(
+            [
+                {"pipeline_id": "pipe_seq", "variant": "varA", "success": i % 10 < 3}
+                for i in range(200)
+            ]
+            + [
+                {"pipeline_id": "pipe_seq", "variant": "varB", "success": i % 10 < 7}
+                for i in range(200)
+            ]
+        )
+        status = feedback.experiment_status("pipe_seq")
+        self.assertEqual(status["state"], "decided")
+        self.assertEqual(status["winner"], "varB")
+        self.assertEqual(status["variants"]["varA"]["status"], "loser")
+        self.assertLess(
+            status["variants"]["varA"]["upper"], status["variants"]["varB"]["lower"]
+        )
+        mock_decisions.labels.assert_any_call("pipe_seq", "loser")
+
+        # the loser is out of selection, even for an exploring bandit policy
+        picks = {
+            feedback.best_variant("pipe_seq", policy="epsilon_greedy")
+            for _ in range(200)
+        }
+        self.assertEqual(picks, {"varB"})
+        self.assertEqual(
+            feedback.best_variant(
+                "pipe_seq", policy="ucb1", variants=["varC"], retire_losers=True
+            ),
+            "varC",  # untried candidates are still explored
+        )
+        self.assertIn(
+            "varA",
+            {
+                feedback.best_variant(
+                    "pipe_seq", policy="epsilon_greedy", retire_losers=False
+                )
+                for _ in range(400)
+            },
+        )
+
+    @patch("src.feedback.EXPERIMENT_DECISIONS")
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_retired_default_falls_back_to_a_survivor(
+        self, mock_variant_metric_counter, mock_decisions
+    ):
+        feedback.record_many(
+            [{"pipeline_id": "pipe_def", "variant": "varA", "success": False}] * 300
+            + [{"pipeline_id": "pipe_def", "variant": "varB", "success": True}] * 15
+        )
+        self.assertEqual(
+            feedback.experiment_status("pipe_def")["variants"]["varA"]["status"],
+            "loser",
+        )
+        # varB is short of 20 trials, so greedy would fall back to `default`
+        self.assertEqual(feedback.best_variant("pipe_def", default="varA"), "varB")
+        self.assertEqual(
+            feedback.best_variant("pipe_def", default="varA", retire_losers=False),
+            "varA",
+        )
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_experiment_running_until_data_decides(self, mock_variant_metric_counter):
+        for i in range(20):
+            feedback.record("pipe_seq2", "varA", i % 2 == 0)
+            feedback.record("pipe_seq2", "varB", i % 3 != 0)
+        status = feedback.experiment_status("pipe_seq2")
+        self.assertEqual(status["state"], "running")
+        self.assertIsNone(status["winner"])
+        self.assertEqual(
+            {v: info["status"] for v, info in status["variants"].items()},
+            {"varA": "running", "varB": "running"},
+        )
+
+
+class TestFeedbackWriter(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self._tmp.name, "async.db")
+
+    def tearDown(self):
+        feedback.stop_writer()
+        self._tmp.cleanup()
+
+    def _rows(self):
+        with sqlite3.connect(self.db) as c:
+            return dict(
+                ((p, v), (s, f))
+                for p, v, s, f in c.execute(
+                    "SELECT pipeline, variant, success, failure FROM ab_stats"
+                )
+            )
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_record_is_batched_and_flushed(self, mock_variant_metric_counter):
+        feedback.start_writer(db_path=self.db, batch_size=1000, flush_interval=60)
+        for i in range(30):
+            feedback.record("pipe_async", "varA", i % 3 != 0)
+        self.assertEqual(self._rows(), {})  # nothing committed yet
+        self.assertTrue(feedback.flush())
+        self.assertEqual(self._rows(), {("pipe_async", "varA"): (20, 10)})
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_batch_committed_after_flush_interval(self, mock_variant_metric_counter):
+        feedback.start_writer(db_path=self.db, flush_interval=0.05)
+        feedback.record("pipe_async", "varB", True)
+        deadline = time.time() + 5
+        while not self._rows() and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self._rows(), {("pipe_async", "varB"): (1, 0)})
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_stop_writer_flushes_pending(self, mock_variant_metric_counter):
+        feedback.start_writer(db_path=self.db, flush_interval=60)
+        feedback.record("pipe_async", "varC", False)
+        feedback.stop_writer()
+        self.assertEqual(self._rows(), {("pipe_async", "varC"): (0, 1)})
+        self.assertIsNone(feedback._writer)
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_writer_logs_events_and_rolls_up_on_stop(self, mock_variant_metric_counter):
+        feedback.start_writer(db_path=self.db, flush_interval=60)
+        for i in range(10):
+            feedback.record("pipe_async", "varD", i % 2 == 0, tool_name="T")
+        feedback.stop_writer()
+        with sqlite3.connect(self.db) as c:
+            events = c.execute(
+                "SELECT COUNT(*), SUM(success) FROM feedback_events WHERE tool = 'T'"
+            ).fetchone()
+            hourly = c.execute(
+                "SELECT success, failure FROM ab_stats_hourly WHERE variant = 'varD'"
+            ).fetchall()
+        self.assertEqual(events, (10, 5))
+        self.assertEqual(hourly, [(5, 5)])
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_record_many_is_one_queue_entry(self, mock_variant_metric_counter):
+        feedback.start_writer(db_path=self.db, batch_size=1000, flush_interval=60)
+        feedback.record_many(
+            [{"pipeline_id": "pipe_async", "variant": "varE", "success": True}] * 50
+        )
+        self.assertEqual(feedback._writer._queue.qsize(), 1)
+        self.assertTrue(feedback.flush())
+        self.assertEqual(self._rows(), {("pipe_async", "varE"): (50, 0)})
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_record_many_none_success_is_timing_only(self, mock_variant_metric_counter):
+        feedback.start_writer(db_path=self.db, batch_size=1000, flush_interval=60)
+        feedback.record_many(
+            [{"pipeline_id": "pipe_async", "variant": "varT", "success": True}] * 3
+            + [
+                {
+                    "pipeline_id": "pipe_async",
+                    "variant": "varT",
+                    "success": None,
+                    "tool_name": "TimedTool",
+                    "duration_s": 0.5,
+                }
+            ]
+        )
+        self.assertTrue(feedback.flush())
+        self.assertEqual(self._rows(), {("pipe_async", "varT"): (3, 0)})
+        with sqlite3.connect(self.db) as c:
+            logged = c.execute(
+                "SELECT success, duration_ms FROM feedback_events WHERE tool = 'TimedTool'"
+            ).fetchall()
+        self.assertEqual(logged, [(None, 500.0)])
+
+    def test_drop_policy_when_queue_full(self):
+        writer = feedback.FeedbackWriter(db_path=self.db, max_queue=1, policy="drop")
+        results = [writer.submit("p", "v", True) for _ in range(200)]
+        writer.close()
+        self.assertIn(False, results)
+        committed = self._rows().get(("p", "v"), (0, 0))[0]
+        self.assertEqual(committed, results.count(True))  # only drops are lost
+
+    def test_unknown_policy_rejected(self):
+        with self.assertRaises(ValueError):
+            feedback.FeedbackWriter(db_path=self.db, policy="spill")
+
+
+class TestFeedbackConcurrency(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self._previous_db = feedback._db_file
+        self.db = os.path.join(self._tmp.name, "concurrent.db")
+        feedback.configure(self.db)
+
+    def tearDown(self):
+        feedback.configure(self._previous_db)
+        self._tmp.cleanup()
+
+    def _counts(self, pipeline):
+        return (
+            feedback._connection()
+            .execute(
+                "SELECT SUM(success), SUM(failure) FROM ab_stats WHERE pipeline = ?",
+                (pipeline,),
+            )
+            .fetchone()
+        )
+
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_multithreaded_record_stress(self, mock_variant_metric_counter):
+        n_threads, per_thread = 8, 250
+        errors, start = [], threading.Barrier(n_threads)
+
+        def worker(i):
+            try:
+                start.wait()
+                for j in range(per_thread):
+                    feedback.record("pipe_stress", f"var{j % 4}", (i + j) % 5 != 0)
+                    if j % 50 == 0:
+                        feedback.best_variant("pipe_stress")
+            except Exception as e:  # surfaced after join
+                errors.append(e)
+
+        with patch("builtins.print"):
+            threads = [
+                threading.Thread(target=worker, args=(i,)) for i in range(n_threads)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(60)
+
+        self.assertEqual(errors, [])
+        total = n_threads * per_thread
+        self.assertEqual(self._counts("pipe_stress"), (total * 4 // 5, total // 5))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork()")
+    @patch("src.feedback.VARIANT_METRIC")
+    def test_child_process_reopens_connection(self, mock_variant_metric_counter):
+        feedback.record("pipe_fork", "varA", True)  # parent connection is open
+        pid = os.fork()
+        if pid == 0:  # child
+            code = 1
+            try:
+                feedback.record("pipe_fork", "varA", True)
+                code = 0
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        feedback.record("pipe_fork", "varA", False)
+        self.assertEqual(self._counts("pipe_fork"), (2, 1))
+
+    def test_configure_env_path(self):
+        other = os.path.join(self._tmp.name, "env.db")
+        with patch.dict(os.environ, {"FEEDBACK_DB_PATH": other}):
+            feedback.configure()
+        self.assertEqual(feedback._db_file, other)
+        self.assertTrue(os.path.exists(other))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,167 @@
+"""Feedback storage backends: one contract, checked against every backend."""
+
+import os, sqlite3, subprocess, sys
+from unittest.mock import MagicMock, patch
+import pytest
+
+_current_file_dir = os.path.dirname(os.path.abspath(__file__))
+_project_mvp_root_dir = os.path.dirname(_current_file_dir)
+if _project_mvp_root_dir not in sys.path:
+    sys.path.insert(0, _project_mvp_root_dir)
+
+from src import feedback, feedback_backends
+
+
+def _sql_standin(tmp_path):
+    # SQLBackend through sqlite3 stands in for a server database
+    path = tmp_path / "server.db"
+    return feedback_backends.SQLBackend(
+        connect=lambda: sqlite3.connect(path), paramstyle="qmark", dialect="sqlite"
+    )
+
+
+BACKENDS = {
+    "sqlite": lambda tmp_path: feedback_backends.SQLiteBackend(tmp_path / "fb.db"),
+    "memory": lambda tmp_path: feedback_backends.MemoryBackend(),
+    "sql": _sql_standin,
+    "sharded": lambda tmp_path: feedback_backends.ShardedBackend(
+        tmp_path / "fb.db", shards=3
+    ),
+}
+
+
+def _restore(previous):
+    if previous is None:
+        feedback.configure()
+    else:
+        feedback.configure(backend=previous)
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def store(request, tmp_path):
+    previous = feedback._backend
+    backend = feedback.configure(backend=BACKENDS[request.param](tmp_path))
+    with patch.object(feedback, "VARIANT_METRIC"), patch("builtins.print"):
+        yield backend
+    _restore(previous)
+
+
+def test_record_and_best_variant(store):
+    for i in range(30):
+        feedback.record("pipe", "varA", i % 3 != 0, duration_s=0.01)
+        feedback.record("pipe", "varB", True, duration_s=0.03)
+    assert sorted(store.totals("pipe")) == [("varA", 20, 10), ("varB", 30, 0)]
+    assert feedback.best_variant("pipe") == "varB"
+
+    feedback.invalidate_stats()  # re-read totals and hourly buckets from the store
+    assert feedback.best_variant("pipe", window=3600) == "varB"
+    ((_, bucket, s, f, avg_ms),) = [
+        row for row in feedback.hourly_stats("pipe") if row[0] == "varA"
+    ]
+    assert (s, f) == (20, 10)
+    assert avg_ms == pytest.approx(10.0)
+    assert feedback.report() == [("pipe", "varA", 20, 10), ("pipe", "varB", 30, 0)]
+
+
+def test_writer_batches_into_backend(store):
+    feedback.start_writer(flush_interval=60)
+    try:
+        for _ in range(5):
+            feedback.record("pipe_async", "varA", False)
+        assert feedback.flush()
+        assert store.totals("pipe_async") == [("varA", 0, 5)]
+    finally:
+        feedback.stop_writer()
+
+
+def test_durations_are_logged_but_not_counted(store):
+    feedback.record("pipe_t", "varA", True, "PipelineEnd", duration_s=9.0)
+    feedback.record_duration("SQLTool", 0.25, "pipe_t", "varA")
+    feedback.start_writer(flush_interval=60)
+    try:
+        feedback.record_duration("SQLTool", 0.5, "pipe_t", "varA")
+        feedback.record_duration("SlackAPI", 1.0)
+        history = feedback.durations()  # flushes the writer
+    finally:
+        feedback.stop_writer()
+    assert history == {"SQLTool": [0.25, 0.5], "SlackAPI": [1.0]}
+    feedback.rollup()
+    assert store.totals("pipe_t") == [("varA", 1, 0)]
+    assert [row[2:4] for row in feedback.hourly_stats("pipe_t")] == [(1, 0)]
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        feedback_backends.create("cassandra")
+
+
+def test_sql_backend_needs_a_dsn(monkeypatch):
+    monkeypatch.delenv("FEEDBACK_DSN", raising=False)
+    with pytest.raises(ValueError):
+        feedback_backends.create("sql")
+
+
+def test_postgres_ddl_uses_wide_columns():
+    connection = MagicMock()
+    feedback_backends.SQLBackend(connect=lambda: connection, dialect="postgres")
+    ddl = " ".join(c.args[0] for c in connection.cursor().execute.call_args_list)
+    assert "ts          DOUBLE PRECISION" in ddl  # float4 rounds epoch seconds
+    assert "bucket          BIGINT" in ddl
+    assert "REAL" not in ddl and "INTEGER" not in ddl
+
+
+def test_import_has_no_storage_side_effect(tmp_path):
+    path = tmp_path / "untouched.db"
+    env = dict(os.environ, FEEDBACK_DB_PATH=str(path))
+    subprocess.run(
+        [sys.executable, "-c", "import src.feedback"],
+        cwd=_project_mvp_root_dir,
+        env=env,
+        check=True,
+    )
+    assert not path.exists()
+
+
+def test_backend_selected_from_environment(monkeypatch):
+    previous = feedback._backend
+    monkeypatch.setenv("FEEDBACK_BACKEND", "memory")
+    try:
+        assert isinstance(feedback.configure(), feedback_backends.MemoryBackend)
+        assert feedback._db_file is None
+    finally:
+        _restore(previous)
+
+
+def test_sharded_routing_is_consistent(tmp_path):
+    four = feedback_backends.ShardedBackend(tmp_path / "a.db", shards=4)
+    five = feedback_backends.ShardedBackend(tmp_path / "b.db", shards=5)
+    pipelines = [f"pipeline.p{i}.v0" for i in range(1000)]
+    placement = [four.shard_index(p) for p in pipelines]
+    assert placement == [four.shard_index(p) for p in pipelines]  # stable
+    assert min(placement.count(i) for i in range(4)) > 150  # spread out
+    moved = sum(four.shard_index(p) != five.shard_index(p) for p in pipelines)
+    assert moved < 350  # ~1/5 of the keys move, not most of them
+    assert sorted(p.name for p in tmp_path.iterdir())[:4] == [
+        f"a.shard{i}.db" for i in range(4)
+    ]
+
+
+def test_sharded_reads_merge_after_resharding(tmp_path):
+    previous = feedback._backend
+    try:
+        with patch.object(feedback, "VARIANT_METRIC"), patch("builtins.print"):
+            feedback.configure(tmp_path / "fb.db", backend="sharded", shards=2)
+            feedback.record_many(
+                {"pipeline_id": f"p{i % 10}", "variant": "v", "success": True}
+                for i in range(100)
+            )
+            sharded = feedback.configure(
+                tmp_path / "fb.db", backend="sharded", shards=3
+            )
+            for i in range(10):
+                feedback.record(f"p{i}", "v", False)
+            # pipelines that moved shard still see their earlier history
+            assert sharded.totals("p3") == [("v", 10, 1)]
+            assert sum(row[2] for row in feedback.report()) == 100
+    finally:
+        _restore(previous)
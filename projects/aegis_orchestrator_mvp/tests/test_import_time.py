@@ -0,0 +1,62 @@
+"""
+Import-time regression test for `src.orchestrator`.
+
+Runs in a fresh interpreter so earlier tests' imports don't hide a
+regression. Prefect is imported first: its own start-up cost is outside our
+control, the budget covers the orchestrator's modules and whatever they pull
+in. Override the budget with AEGIS_IMPORT_BUDGET_S on slow machines.
+"""
+
+import json, os, subprocess, sys
+import pytest
+
+_current_file_dir = os.path.dirname(os.path.abspath(__file__))
+_project_mvp_root_dir = os.path.dirname(_current_file_dir)
+if _project_mvp_root_dir not in sys.path:
+    sys.path.insert(0, _project_mvp_root_dir)
+
+IMPORT_BUDGET_S = float(os.getenv("AEGIS_IMPORT_BUDGET_S", "0.25"))
+
+# Adapter modules (and their heavy deps) that must stay unloaded until used
+_LAZY_MODULES = ("src.tools.slack_api", "src.tools.sql_tool", "slack_sdk", "smtplib")
+
+_PROBE = """
+import json, sys, time
+import prefect
+from prefect import flow, task, get_run_logger
+from prefect.deployments import run_deployment
+start = time.perf_counter()
+import src.orchestrator
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def _probe():
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE % (_LAZY_MODULES,)],
+        cwd=_project_mvp_root_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def test_orchestrator_import_is_lazy_and_within_budget():
+    result = _probe()
+    assert result["loaded"] == []
+    assert result["elapsed"] < IMPORT_BUDGET_S, (
+        f"import src.orchestrator took {result['elapsed']:.3f}s "
+        f"(budget {IMPORT_BUDGET_S}s)"
+    )
+
+
+def test_tools_package_keeps_all_and_resolves_lazily():
+    from src import tools
+
+    assert "SlackAPI" in tools.__all__
+    assert tools.SQLTool.__name__ == "SQLTool"
+    assert "SQLTool" in dir(tools)
+    with pytest.raises(AttributeError):
+        tools.NotATool
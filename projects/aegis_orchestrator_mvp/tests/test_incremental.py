@@ -0,0 +1,66 @@
+"""Incremental re-execution tests — fingerprints and output store."""
+
+import os, sys
+
+_current_file_dir = os.path.dirname(os.path.abspath(__file__))
+_project_mvp_root_dir = os.path.dirname(_current_file_dir)
+if _project_mvp_root_dir not in sys.path:
+    sys.path.insert(0, _project_mvp_root_dir)
+
+from src import incremental
+
+
+def _tasks(b_params=None):
+    return [
+        {"id": "a", "agent": "A", "params": {"q": 1}},
+        {"id": "b", "agent": "B", "params": b_params or {"q": 2}},
+        {"id": "c", "agent": "C", "params": {}},
+    ]
+
+
+def test_edit_changes_task_and_downstream_only():
+    before = incremental.fingerprints(_tasks())
+    after = incremental.fingerprints(_tasks({"q": 3}))
+    assert before["a"] == after["a"]
+    assert before["b"] != after["b"]
+    assert before["c"] != after["c"]
+
+
+def test_independent_branch_unaffected_by_edit():
+    def graph(x):
+        return [
+            {"id": "a", "agent": "A", "params": {}, "dependencies": []},
+            {"id": "b", "agent": "B", "params": {"x": x}, "dependencies": ["a"]},
+            {"id": "c", "agent": "C", "params": {}, "dependencies": ["a"]},
+        ]
+
+    before = incremental.fingerprints(graph(1))
+    after = incremental.fingerprints(graph(2))
+    assert before["c"] == after["c"]
+    assert before["b"] != after["b"]
+
+
+def test_runtime_keys_ignored():
+    tasks = _tasks()
+    tasks[0]["__agent_cls"] = object
+    assert incremental.fingerprints(tasks) == incremental.fingerprints(_tasks())
+
+
+def test_agent_version_changes_task_and_downstream():
+    tasks = _tasks()
+    tasks[1]["__agent_version"] = "0.2.0"
+    before = incremental.fingerprints(_tasks())
+    after = incremental.fingerprints(tasks)
+    assert before["a"] == after["a"]
+    assert before["b"] != after["b"]
+    assert before["c"] != after["c"]
+
+
+def test_output_store_roundtrip(tmp_path):
+    store = incremental.OutputStore(tmp_path / "outputs.db")
+    assert store.get("fp") is None
+    assert store.put("fp", "a", {"ok": True})
+    assert store.get("fp") == {"ok": True}
+    assert not store.put("bad", "a", {"error": "boom"})
+    assert not store.put("obj", "a", {"x": object()})
+    assert store.get("bad") is None
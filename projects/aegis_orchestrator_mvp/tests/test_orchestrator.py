@@ -14,7 +14,6 @@ import sys, types, json, os
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 import pytest
-import sqlite3  # For re-opening connection
 
 # ----------------------------------------------------------------------
 # Adjust sys.path to include the parent of 'src' directory (i.e., aegis_orchestrator_mvp)
@@ -89,37 +88,16 @@ def _simple_graph():
 # ----------------------------------------------------------------------
 @pytest.fixture(autouse=True)
 def ensure_feedback_db_connection():
-    """Ensure the feedback database connection is open before each test and closes after."""
-    # This path should align with how test_feedback.py sets it up or where feedback.py expects it.
-    # Assuming TEST_DB_FILE is a convention or feedback.py has a configurable path.
-    # For simplicity, using the same path logic as in test_feedback.py
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(current_dir)
-    data_path = os.path.join(project_root, "data")
-    test_db_file_for_orchestrator_tests = os.path.join(
-        data_path, "test_feedback.db"
-    )  # Ensure this is the same DB file used by test_feedback
-
-    # If feedback.con is closed or None, re-initialize it.
-    # This is a simplistic check. A more robust way might involve checking `feedback.con.closed` if it were a pysqlite3 connection object
-    # or just attempting to connect.
-    try:
-        # Check if connection is usable, e.g., by trying a simple query
-        feedback.con.execute("SELECT 1 FROM ab_stats LIMIT 1").fetchone()
-    except (sqlite3.ProgrammingError, AttributeError, sqlite3.OperationalError) as e:
-        # print(f"DEBUG: Orchestrator tests re-opening feedback DB: {e}")
-        feedback.con = sqlite3.connect(test_db_file_for_orchestrator_tests)
-        # Ensure schema exists if we just created/reconnected the DB
-        # This might be redundant if test_feedback.py always leaves a schema-initialized DB
-        feedback.con.executescript(feedback._schema)
-        feedback.con.commit()
+    """Run each test against an in-memory feedback store (no disk I/O)."""
+    previous = feedback._backend
+    feedback.configure(backend="memory")
 
     yield  # Run the test
 
-    # No explicit close here, to let test_feedback.py's tearDownClass handle the final close and cleanup.
-    # If test_orchestrator runs *after* test_feedback, this is an issue.
-    # The order of test file execution by pytest is not guaranteed unless specified.
-    # A more robust solution involves a session-scoped fixture for DB setup/teardown.
+    if previous is None:
+        feedback.configure()
+    else:
+        feedback.configure(backend=previous)
 
 
 # ----------------------------------------------------------------------
@@ -147,3 +125,163 @@ def test_deploy_creates_file(tmp_path, monkeypatch):
         file_path = deploy(graph, flows_dir=tmp_path)
         assert Path(file_path).exists()
         assert "def dynamic_flow" in Path(file_path).read_text()
+
+
+# ----------------------------------------------------------------------
+class _CheapAgent(_MockAgent):
+    def invoke(self, **params):
+        _MockAgent.calls.append({"cheap": True, **params})
+        return {"ok": True}
+
+
+def _budget_graph(policy="stop"):
+    return {
+        "id": "pipeline.test.budget",
+        "budget_usd": 0.5,
+        "budget_policy": policy,
+        "tasks": [
+            {"id": "t1", "agent": "MockAgent", "params": {}},
+            {"id": "t2", "agent": "MockAgent", "params": {}},
+            {
+                "id": "t3",
+                "agent": "MockAgent",
+                "params": {},
+                "downgrade": {"agent": "CheapAgent"},
+            },
+        ],
+    }
+
+
+def _get_agent(agent_id, **kwargs):
+    return _CheapAgent if agent_id == "CheapAgent" else _MockAgent
+
+
+def _cost_model(agent_id):
+    return {} if agent_id == "CheapAgent" else {"per_call": 0.3}
+
+
+def test_budget_stop_skips_remaining_tasks():
+    _MockAgent.calls.clear()
+    with patch("src.orchestrator.registry.get", side_effect=_get_agent), patch(
+        "src.orchestrator.registry.cost_model", side_effect=_cost_model
+    ):
+        outputs = build_flow(_budget_graph("stop"))()
+    assert len(_MockAgent.calls) == 2
+    assert outputs["t3"] == {"status": "skipped_budget"}
+
+
+def test_budget_downgrade_runs_fallback_agent():
+    _MockAgent.calls.clear()
+    with patch("src.orchestrator.registry.get", side_effect=_get_agent), patch(
+        "src.orchestrator.registry.cost_model", side_effect=_cost_model
+    ):
+        outputs = build_flow(_budget_graph("downgrade"))()
+    assert [c.get("cheap", False) for c in _MockAgent.calls] == [False, False, True]
+    assert outputs["t3"] == {"ok": True}
+
+
+def test_budget_stop_still_reuses_stored_outputs():
+    from src.incremental import OutputStore
+
+    def graph(x, budget=None):
+        g = _budget_graph("stop")
+        g.update(incremental=True, budget_usd=budget)
+        for t in g["tasks"]:
+            t["dependencies"] = []  # t3 doesn't depend on the edited tasks
+        g["tasks"][0]["params"], g["tasks"][1]["params"] = {"x": x}, {"y": x}
+        return g
+
+    store = OutputStore(":memory:")
+    with patch("src.orchestrator.registry.get", side_effect=_get_agent), patch(
+        "src.orchestrator.registry.cost_model", side_effect=_cost_model
+    ):
+        build_flow(graph(1), output_store=store)()
+        _MockAgent.calls.clear()
+        outputs = build_flow(graph(2, budget=0.5), output_store=store)()
+    assert len(_MockAgent.calls) == 2  # t1, t2 rerun and exhaust the budget
+    assert outputs["t3"] == {"ok": True}  # stored: free, not skipped
+
+
+# ----------------------------------------------------------------------
+def test_estimate_uses_observed_runs():
+    from src import estimator, orchestrator
+
+    estimator.reset()
+    with patch("src.orchestrator.registry.get", return_value=_MockAgent), patch(
+        "src.orchestrator.registry.cost_model", return_value={"per_call": 0.25}
+    ):
+        build_flow(_simple_graph())()
+        est = orchestrator.estimate(_simple_graph())
+    assert est["unknown_agents"] == []
+    assert est["cost_usd"] == pytest.approx(0.25)
+    assert est["p95_seconds"] >= est["p50_seconds"] >= 0.0
+
+
+def test_estimate_seeded_from_persisted_runs(monkeypatch):
+    from src import estimator, orchestrator
+
+    with patch("src.orchestrator.registry.get", return_value=_MockAgent):
+        build_flow(_simple_graph())()
+    estimator.reset()  # e.g. a fresh process
+    monkeypatch.setattr(orchestrator, "_history_loaded", False)
+    est = orchestrator.estimate(_simple_graph())
+    assert est["unknown_agents"] == []
+    assert feedback.report() == [("pipeline.test.unit", "default", 2, 0)]
+    assert "PipelineEnd" not in estimator._latency  # a flow, not an agent
+
+
+# ----------------------------------------------------------------------
+def _incremental_graph(x):
+    return {
+        "id": "pipeline.test.incremental",
+        "incremental": True,
+        "tasks": [
+            {"id": "t1", "agent": "MockAgent", "params": {"x": 1}},
+            {"id": "t2", "agent": "MockAgent", "params": {"x": x}},
+        ],
+    }
+
+
+def test_incremental_rerun_only_executes_changed_tasks():
+    from src.incremental import OutputStore
+
+    store = OutputStore(":memory:")
+    _MockAgent.calls.clear()
+    with patch("src.orchestrator.registry.get", return_value=_MockAgent):
+        build_flow(_incremental_graph(2), output_store=store)()
+        assert [c["x"] for c in _MockAgent.calls] == [1, 2]
+
+        _MockAgent.calls.clear()
+        outputs = build_flow(_incremental_graph(2), output_store=store)()
+        assert _MockAgent.calls == []
+        assert outputs == {"t1": {"ok": True}, "t2": {"ok": True}}
+
+        build_flow(_incremental_graph(3), output_store=store)()
+        assert [c["x"] for c in _MockAgent.calls] == [3]
+
+
+def test_incremental_reruns_tasks_after_agent_upgrade():
+    from src.incremental import OutputStore
+
+    store = OutputStore(":memory:")
+    with patch("src.orchestrator.registry.get", return_value=_MockAgent), patch(
+        "src.orchestrator.registry.version_of", return_value="0.1.0"
+    ) as mock_version_of:
+        build_flow(_incremental_graph(2), output_store=store)()
+        mock_version_of.return_value = "0.2.0"  # e.g. upgrade() or a canary
+        _MockAgent.calls.clear()
+        build_flow(_incremental_graph(2), output_store=store)()
+        assert [c["x"] for c in _MockAgent.calls] == [1, 2]
+
+
+# ----------------------------------------------------------------------
+def test_flow_pins_agent_versions_with_one_route_key():
+    with patch(
+        "src.orchestrator.registry.get", return_value=_MockAgent
+    ) as mock_get, patch("src.orchestrator.registry.cost_model", return_value={}):
+        build_flow(_budget_graph("downgrade"))
+        first = {c.kwargs["route_key"] for c in mock_get.call_args_list}
+        build_flow(_budget_graph("downgrade"))
+        keys = {c.kwargs["route_key"] for c in mock_get.call_args_list}
+    assert len(first) == 1  # every task (and downgrade) resolved together
+    assert len(keys) == 2  # a new flow gets its own routing decision
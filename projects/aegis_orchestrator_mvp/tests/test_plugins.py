@@ -0,0 +1,103 @@
+"""Entry-point plugin discovery tests (a fake distribution on sys.path)."""
+
+import os, sys
+from unittest.mock import patch
+import pytest
+
+_current_file_dir = os.path.dirname(os.path.abspath(__file__))
+_project_mvp_root_dir = os.path.dirname(_current_file_dir)
+if _project_mvp_root_dir not in sys.path:
+    sys.path.insert(0, _project_mvp_root_dir)
+
+from src import plugins, registry
+
+
+def _install(site, name, version="1.0"):
+    dist_info = site / f"{name}-{version}.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+    )
+    (dist_info / "entry_points.txt").write_text(
+        f"[{plugins.ENTRY_POINT_GROUP}]\n"
+        f"{name.title()}Agent = {name}_adapter:{name.title()}Agent\n"
+    )
+    (site / f"{name}_adapter.py").write_text(
+        f"class {name.title()}Agent:\n"
+        f"    def invoke(self, **params):\n"
+        f"        return {{'plugin': {name!r}, **params}}\n"
+    )
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    site = tmp_path / "site"
+    site.mkdir()
+    monkeypatch.syspath_prepend(str(site))
+    monkeypatch.setenv("PLUGIN_INDEX_PATH", str(tmp_path / "plugin_index.json"))
+    monkeypatch.setattr(plugins, "_memo", None)
+    return site
+
+
+def test_discovers_entry_points(site):
+    _install(site, "zendesk", "2.3")
+    entry = plugins.discover()["ZendeskAgent"]
+    assert entry["module"] == "zendesk_adapter"
+    assert entry["classname"] == "ZendeskAgent"
+    assert entry["version"] == "2.3"
+    assert entry["source"] == plugins.SOURCE
+    assert plugins.load("ZendeskAgent")().invoke(x=1) == {"plugin": "zendesk", "x": 1}
+
+
+def test_index_reused_until_distributions_change(site, monkeypatch):
+    _install(site, "zendesk")
+    plugins.discover()
+
+    monkeypatch.setattr(plugins, "_memo", None)  # simulate a new process
+    with patch.object(plugins, "_scan", side_effect=AssertionError("rescanned")):
+        assert "ZendeskAgent" in plugins.discover()
+
+    _install(site, "jira")  # a new .dist-info changes the fingerprint
+    agents = plugins.discover()
+    assert {"ZendeskAgent", "JiraAgent"} <= set(agents)
+
+
+def test_registry_resolves_plugin_agents(site):
+    _install(site, "zendesk")
+    registry._invalidate_index()
+    try:
+        assert "ZendeskAgent" in registry.list_agents()
+        assert registry.get("ZendeskAgent")().invoke()["plugin"] == "zendesk"
+        # agents.yaml entries still win
+        assert registry.get("SlackAPI").__module__ == "src.tools.slack_api"
+    finally:
+        registry._drop({"ZendeskAgent"})
+        registry._invalidate_index()
+
+
+def test_tools_package_falls_back_to_plugins(site):
+    from src import tools
+
+    _install(site, "zendesk")
+    assert tools.ZendeskAgent.__name__ == "ZendeskAgent"
+    with pytest.raises(AttributeError):
+        tools.NoSuchTool
+
+
+def test_tools_package_plugin_errors_are_attribute_errors(site):
+    from src import tools
+
+    _install(site, "broken")
+    (site / "broken_adapter.py").write_text("raise ImportError('missing sdk')\n")
+    assert not hasattr(tools, "BrokenAgent")
+    assert getattr(tools, "BrokenAgent", None) is None
+
+
+def test_submodule_imports_skip_plugin_discovery(site):
+    import src.tools
+
+    sys.modules.pop("src.tools.survey_api", None)
+    vars(src.tools).pop("survey_api", None)
+    with patch.object(plugins, "load", side_effect=AssertionError("discovered")):
+        from src.tools import survey_api
+    assert survey_api.SurveyAPI.__name__ == "SurveyAPI"
@@ -1,9 +1,14 @@
 import unittest
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 import os
 import sys
 import yaml
 import importlib  # Added for reload
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
 
 # Adjust path to import from src
 # This assumes tests are run from 'projects/aegis_orchestrator_mvp/' or 'AI_Collaboration_HomeBase/'
@@ -175,11 +180,21 @@ class TestAgentRegistry(unittest.TestCase):
         self.assertIs(agent1, agent2)
         mock_load_manifest.assert_called_once()
 
+    def _temp_manifest(self):
+        """Point the registry at a scratch agents.yaml (upgrades write it)."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = Path(tmp.name) / "agents.yaml"
+        # yaml.dump: some callers patch yaml.safe_dump
+        path.write_text(yaml.dump(ORIGINAL_AGENTS_YAML_CONTENT, Dumper=yaml.SafeDumper))
+        self.registry_module._REG_PATH = path
+        return path
+
     @patch("yaml.safe_dump")
-    @patch("builtins.open", new_callable=mock_open)
     @patch("src.registry._load_manifest")
-    def test_upgrade_agent(self, mock_load_manifest, mock_file_open, mock_yaml_dump):
+    def test_upgrade_agent(self, mock_load_manifest, mock_yaml_dump):
         self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        self._temp_manifest()
         initial_manifest_list = [dict(item) for item in ORIGINAL_AGENTS_YAML_CONTENT]
         mock_load_manifest.return_value = {d["id"]: d for d in initial_manifest_list}
         new_version = "0.2.0"
@@ -215,9 +230,341 @@ class TestAgentRegistry(unittest.TestCase):
             f"Grandparent should be aegis_orchestrator_mvp, got {reg_path_obj.parent.parent.name}",
         )
 
-    # Add a test for list functionality if it's implemented in registry.py
-    # def test_list_agents(self, mock_load_manifest):
-    #     ...
+    def test_manifest_index_reparsed_only_on_change(self):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "agents.yaml"
+            path.write_text(yaml.safe_dump(ORIGINAL_AGENTS_YAML_CONTENT))
+            old = time.time() - 10
+            os.utime(path, (old, old))
+            reg._REG_PATH = path
+            with patch.object(reg, "_load_manifest", wraps=reg._load_manifest) as spy:
+                self.assertEqual(reg.get("SlackAPI").__name__, "SlackAPI")
+                reg._cache.clear()
+                reg.get("SlackAPI")
+                self.assertEqual(spy.call_count, 1)
+
+                # A touch without a content change does not re-parse
+                os.utime(path, (old + 1, old + 1))
+                reg._manifest()
+                self.assertEqual(spy.call_count, 1)
+
+                edited = [dict(item) for item in ORIGINAL_AGENTS_YAML_CONTENT]
+                edited[0]["status"] = "deprecated"
+                path.write_text(yaml.safe_dump(edited))
+                reg._cache.clear()
+                with self.assertRaises(KeyError):
+                    reg.get("SlackAPI")
+                self.assertEqual(spy.call_count, 2)
+
+    @patch("src.registry._load_manifest")
+    def test_slow_import_does_not_block_other_agents(self, mock_load_manifest):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        manifest = {d["id"]: dict(d) for d in ORIGINAL_AGENTS_YAML_CONTENT}
+        manifest["Slow"] = dict(
+            manifest["SQLTool"], id="Slow", module="src.risk", classname="Dict"
+        )
+        mock_load_manifest.return_value = manifest
+        reg.get("SlackAPI")  # warm one entry
+
+        release, started = threading.Event(), threading.Event()
+        real_import = reg.import_module
+
+        def slow_import(name):
+            if name == "src.risk":
+                started.set()
+                release.wait(5)
+            return real_import(name)
+
+        with patch.object(reg, "import_module", side_effect=slow_import):
+            loaded = []
+            t = threading.Thread(target=lambda: loaded.append(reg.get("Slow")))
+            t.start()
+            self.assertTrue(started.wait(5))
+            # Neither a cached hit nor an unrelated miss waits on the slow import
+            self.assertEqual(reg.get("SlackAPI").__name__, "SlackAPI")
+            self.assertEqual(reg.get("EmailAPI").__name__, "EmailAPI")
+            self.assertTrue(t.is_alive())
+            release.set()
+            t.join(5)
+        self.assertEqual(len(loaded), 1)
+
+    @patch("src.registry._load_manifest")
+    def test_upgrade_swaps_snapshot(self, mock_load_manifest):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        mock_load_manifest.return_value = {
+            d["id"]: dict(d) for d in ORIGINAL_AGENTS_YAML_CONTENT
+        }
+        reg.get("SlackAPI")
+        reg.get("EmailAPI")
+        before = reg._cache
+        self._temp_manifest()
+        reg.upgrade("SlackAPI", "0.2.0")
+        self.assertIsNot(reg._cache, before)
+        self.assertIn("SlackAPI", before)  # old snapshot left untouched
+        self.assertNotIn("SlackAPI", reg._cache)
+        self.assertIn("EmailAPI", reg._cache)
+
+    @patch("src.registry._load_manifest")
+    def test_list_agents(self, mock_load_manifest):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        manifest = {d["id"]: dict(d) for d in ORIGINAL_AGENTS_YAML_CONTENT}
+        manifest["SQLTool"]["status"] = "beta"
+        mock_load_manifest.return_value = manifest
+        self.assertEqual(
+            self.registry_module.list_agents(),
+            ["SlackAPI", "EmailAPI", "PlannerAgent"],
+        )
+        self.assertEqual(self.registry_module.list_agents("beta"), ["SQLTool"])
+        self.assertEqual(len(self.registry_module.list_agents(None)), 4)
+
+    @patch("src.registry._load_manifest")
+    def test_prewarm_imports_active_agents(self, mock_load_manifest):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        manifest = {d["id"]: dict(d) for d in ORIGINAL_AGENTS_YAML_CONTENT}
+        manifest["Broken"] = dict(
+            manifest["SQLTool"], id="Broken", module="tools.does_not_exist"
+        )
+        mock_load_manifest.return_value = manifest
+        self.assertFalse(reg.ready())
+
+        errors = reg.prewarm().result(timeout=30)
+
+        self.assertTrue(reg.wait_ready(1))
+        self.assertEqual(list(errors), ["Broken"])
+        for agent_id in ("SlackAPI", "EmailAPI", "SQLTool", "PlannerAgent"):
+            self.assertIn(agent_id, reg._cache)
+
+    @patch("src.registry._load_manifest")
+    def test_canary_routes_stable_share_side_by_side(self, mock_load_manifest):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        manifest = {d["id"]: dict(d) for d in ORIGINAL_AGENTS_YAML_CONTENT}
+        mock_load_manifest.return_value = manifest
+        stable = reg.get("SlackAPI")
+        manifest["SlackAPI"]["canary"] = {
+            "version": "0.2.0",
+            "module": "tools.slack_api",
+            "classname": "SlackAPI",
+            "percent": 25,
+        }
+        with reg._lock:  # what reloading the edited agents.yaml does
+            reg._invalidate_index()
+            reg._drop({"SlackAPI"})
+
+        routed = {key: reg.get("SlackAPI", route_key=key) for key in range(400)}
+        canary = [cls for cls in routed.values() if cls is not stable]
+        self.assertTrue(60 < len(canary) < 140)
+        # Same module path, but the canary's code was loaded separately
+        self.assertIsNot(canary[0], stable)
+        self.assertEqual(canary[0].__name__, "SlackAPI")
+        self.assertIs(reg.get("SlackAPI", route_key=7), routed[7])  # sticky
+        self.assertIs(reg.get("SlackAPI"), stable)
+        self.assertIs(reg.get("SlackAPI", version="0.2.0"), canary[0])
+        self.assertEqual(reg.loaded_versions("SlackAPI"), ["0.1.0", "0.2.0"])
+        with self.assertRaises(KeyError):
+            reg.get("SlackAPI", version="9.9.9")
+
+    @patch("src.registry._load_manifest")
+    def test_retired_version_lives_until_drained(self, mock_load_manifest):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        manifest = {d["id"]: dict(d) for d in ORIGINAL_AGENTS_YAML_CONTENT}
+        mock_load_manifest.return_value = manifest
+        reg.get("SlackAPI")
+        manifest["SlackAPI"]["canary"] = dict(
+            manifest["SlackAPI"], version="0.2.0", percent=100
+        )
+        reg._invalidate_index()
+        pinned = reg.get("SlackAPI", version="0.2.0")  # e.g. held by a flow
+
+        manifest["SlackAPI"].pop("canary")
+        manifest["SlackAPI"]["version"] = "0.3.0"
+        self._temp_manifest()
+        reg.upgrade("SlackAPI", "0.3.0")
+        current = reg.get("SlackAPI")
+        self.assertIsNot(current, pinned)
+        self.assertIn(("SlackAPI", "0.2.0"), reg.collect())
+        self.assertIs(reg.get("SlackAPI", version="0.2.0"), pinned)
+        self.assertEqual(reg.version_of("SlackAPI", pinned), "0.2.0")
+        self.assertEqual(reg.version_of("SlackAPI", current), "0.3.0")
+        self.assertIsNone(reg.version_of("EmailAPI", current))
+
+        del pinned
+        self.assertNotIn(("SlackAPI", "0.2.0"), reg.collect())
+        self.assertNotIn("0.2.0", reg.loaded_versions("SlackAPI"))
+
+    @patch("src.registry._load_manifest")
+    def test_routed_hits_use_the_snapshot(self, mock_load_manifest):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        manifest = {d["id"]: dict(d) for d in ORIGINAL_AGENTS_YAML_CONTENT}
+        manifest["EmailAPI"]["canary"] = dict(
+            manifest["EmailAPI"], version="0.2.0", percent=50
+        )
+        mock_load_manifest.return_value = manifest
+        for key in range(20):
+            reg.get("SlackAPI", route_key=key)
+            reg.get("EmailAPI", route_key=key)
+        snapshots = (reg._cache, reg._versions, reg._canaries)
+
+        # Hits, canary-routed or not, never lock, stat the manifest or publish
+        with patch.object(reg, "_import_lock", side_effect=AssertionError):
+            for key in range(20):
+                reg.get("SlackAPI", route_key=key)
+                reg.get("EmailAPI", route_key=key)
+        self.assertIs(reg._cache, snapshots[0])
+        self.assertIs(reg._versions, snapshots[1])
+        self.assertIs(reg._canaries, snapshots[2])
+        self.assertEqual(reg.loaded_versions("EmailAPI"), ["0.1.0", "0.2.0"])
+
+    @patch("src.registry._load_manifest")
+    def test_ids_sharing_a_module_version_share_the_class(self, mock_load_manifest):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        manifest = {d["id"]: dict(d) for d in ORIGINAL_AGENTS_YAML_CONTENT}
+        manifest["Notifier"] = dict(manifest["SlackAPI"], id="Notifier")
+        mock_load_manifest.return_value = manifest
+        slack = reg.get("SlackAPI")
+        self.assertIs(reg.get("Notifier"), slack)
+        self.assertNotIn("src.tools.slack_api__v0_1_0", sys.modules)
+
+        with reg._lock:
+            reg._drop({"SlackAPI"})  # still used by Notifier: not released
+        self.assertIs(sys.modules["src.tools.slack_api"].SlackAPI, slack)
+        self.assertEqual(
+            reg._module_users, {("src.tools.slack_api", "0.1.0"): {"Notifier"}}
+        )
+
+    def test_upgrade_releases_the_old_version(self):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        self._temp_manifest()
+        import src.tools
+
+        self.assertIs(reg.get("SQLTool"), SQLTool)  # 0.1.0, pinned by this module
+        reg.upgrade("SQLTool", "0.2.0")
+        v2 = weakref.ref(reg.get("SQLTool"))
+        self.assertIsNot(v2(), SQLTool)
+        self.assertIs(src.tools.SQLTool, v2())  # canonical module, not a copy
+
+        reg.upgrade("SQLTool", "0.3.0")
+        v3 = reg.get("SQLTool")
+        self.assertEqual(reg.collect(), [("SQLTool", "0.1.0")])
+        self.assertIsNone(v2())
+        self.assertEqual(reg.loaded_versions("SQLTool"), ["0.1.0", "0.3.0"])
+        self.assertIs(src.tools.SQLTool, v3)
+        self.assertEqual(
+            reg._module_users, {("src.tools.sql_tool", "0.3.0"): {"SQLTool"}}
+        )
+
+    def test_watcher_invalidates_only_changed_agents(self):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        for use_inotify in (True, False):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = Path(tmp) / "agents.yaml"
+                path.write_text(yaml.safe_dump(ORIGINAL_AGENTS_YAML_CONTENT))
+                reg._REG_PATH = path
+                reg._invalidate_index()
+                reg.watch(interval=0.05, use_inotify=use_inotify)
+                try:
+                    slack = reg.get("SlackAPI")
+                    reg.get("EmailAPI")
+                    with patch.object(Path, "stat", side_effect=AssertionError):
+                        reg.get("SQLTool")  # a miss without touching the file
+
+                    edited = [dict(item) for item in ORIGINAL_AGENTS_YAML_CONTENT]
+                    edited[1]["status"] = "deprecated"
+                    path.write_text(yaml.safe_dump(edited))
+                    deadline = time.time() + 1
+                    while "EmailAPI" in reg._cache and time.time() < deadline:
+                        time.sleep(0.01)
+                    self.assertNotIn("EmailAPI", reg._cache)
+                    self.assertIs(reg._cache["SlackAPI"], slack)
+                    with self.assertRaises(KeyError):
+                        reg.get("EmailAPI")
+                finally:
+                    reg.unwatch(timeout=5)
+                self.assertIsNone(reg._watcher)
+
+    def test_upgrade_many_writes_once_and_swaps_once(self):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        path = self._temp_manifest()
+        for agent_id in ("SlackAPI", "EmailAPI", "SQLTool"):
+            reg.get(agent_id)
+        generation = reg._generation
+
+        with patch.object(reg.os, "replace", wraps=os.replace) as spy:
+            reg.upgrade_many(
+                [
+                    {"agent_id": "SlackAPI", "version": "0.2.0"},
+                    {"agent_id": "EmailAPI", "version": "0.3.0", "percent": 10},
+                ]
+            )
+        self.assertEqual(spy.call_count, 2)  # journal + manifest, nothing more
+        self.assertEqual(reg._generation, generation + 1)
+        self.assertEqual(set(reg._cache), {"SQLTool"})
+        written = {d["id"]: d for d in yaml.safe_load(path.read_text())}
+        self.assertEqual(written["SlackAPI"]["version"], "0.2.0")
+        self.assertEqual(written["EmailAPI"]["canary"]["percent"], 10)
+        self.assertFalse(reg._journal_path().exists())
+        self.assertEqual(sorted(os.listdir(path.parent)), ["agents.yaml"])
+
+    def test_upgrade_validates_before_writing(self):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        path = self._temp_manifest()
+        original = path.read_text()
+        with self.assertRaises(KeyError):
+            reg.upgrade("NewAgent", "1.0.0")
+        with self.assertRaises(KeyError):  # one bad change rejects the batch
+            reg.upgrade_many(
+                [
+                    {"agent_id": "SlackAPI", "version": "0.2.0"},
+                    {"agent_id": "NewAgent", "version": "1.0.0"},
+                ]
+            )
+        self.assertEqual(path.read_text(), original)
+        self.assertFalse(reg._journal_path().exists())
+
+        with patch.object(reg.os, "fsync", wraps=os.fsync) as spy:
+            reg.upgrade(
+                "NewAgent", "1.0.0", new_module="tools.sql_tool", new_class="SQLTool"
+            )
+        self.assertEqual(spy.call_count, 4)  # journal + manifest, file and dir
+        written = {d["id"]: d for d in yaml.safe_load(path.read_text())}
+        self.assertEqual(written["NewAgent"]["id"], "NewAgent")
+        self.assertEqual(written["NewAgent"]["status"], "active")
+        self.assertEqual(reg.get("NewAgent").__name__, "SQLTool")
+
+    def test_crash_after_journal_is_recovered(self):
+        self.assertIsNotNone(self.registry_module, "Registry module not loaded")
+        reg = self.registry_module
+        path = self._temp_manifest()
+        original = path.read_text()
+        real_write = reg._atomic_write
+
+        def crash_on_manifest(target, dump):
+            if target == path:
+                raise KeyboardInterrupt("killed mid-upgrade")
+            real_write(target, dump)
+
+        with patch.object(reg, "_atomic_write", side_effect=crash_on_manifest):
+            with self.assertRaises(KeyboardInterrupt):
+                reg.upgrade("SlackAPI", "0.2.0")
+        self.assertEqual(path.read_text(), original)  # old manifest intact
+        self.assertTrue(reg._journal_path().exists())
+
+        reg._invalidate_index()  # e.g. a restarted process
+        self.assertEqual(reg._manifest()["SlackAPI"]["version"], "0.2.0")
+        self.assertFalse(reg._journal_path().exists())
+        self.assertFalse(reg.recover())
 
 
 if __name__ == "__main__":
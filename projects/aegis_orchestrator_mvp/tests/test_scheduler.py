@@ -0,0 +1,132 @@
+"""Dispatch scheduler tests — priority classes, fair queuing and EDF admission."""
+
+import os, sys, time
+import pytest
+
+_current_file_dir = os.path.dirname(os.path.abspath(__file__))
+_project_mvp_root_dir = os.path.dirname(_current_file_dir)
+if _project_mvp_root_dir not in sys.path:
+    sys.path.insert(0, _project_mvp_root_dir)
+
+from src.scheduler import AdmissionRejected, Dispatcher
+
+
+def _graph(pipeline_id, **extra):
+    return {"id": pipeline_id, "tasks": [], **extra}
+
+
+def _drain(dispatcher):
+    order = []
+    while True:
+        item = dispatcher.next(timeout=0)
+        if item is None:
+            return order
+        order.append(item)
+
+
+# ----------------------------------------------------------------------
+def test_interactive_not_stuck_behind_batch_backlog():
+    d = Dispatcher(runner=lambda g: g["id"])
+    for _ in range(50):
+        d.submit(_graph("pipeline.analytics.v0"))
+    d.submit(_graph("pipeline.onboarding.v0"))
+
+    order = _drain(d)
+    position = [i.graph["id"] for i in order].index("pipeline.onboarding.v0")
+    assert position <= 1
+
+
+def test_tenants_share_fairly_within_a_class():
+    d = Dispatcher(runner=lambda g: g)
+    for _ in range(20):
+        d.submit(_graph("pipeline.analytics.v0"), tenant="backfill")
+    for _ in range(5):
+        d.submit(_graph("pipeline.analytics.v0"), tenant="adhoc")
+
+    first_ten = [i.tenant for i in _drain(d)[:10]]
+    assert first_ten.count("adhoc") == 5
+
+
+def test_tenant_weights_skew_share():
+    d = Dispatcher(runner=lambda g: g, tenant_weights={"gold": 3.0})
+    for _ in range(12):
+        d.submit(_graph("p"), tenant="gold")
+        d.submit(_graph("p"), tenant="bronze")
+
+    first_eight = [i.tenant for i in _drain(d)[:8]]
+    assert first_eight.count("gold") == 6
+
+
+def test_priority_override_and_depth():
+    d = Dispatcher(runner=lambda g: g["id"])
+    d.submit(_graph("pipeline.analytics.v0", priority="interactive"))
+    d.submit(_graph("pipeline.analytics.v0"))
+    assert d.depth("interactive") == 1
+    assert d.depth("batch") == 1
+    assert len(d) == 2
+
+    assert d.run_next(timeout=0) == "pipeline.analytics.v0"
+    assert d.depth("interactive") == 0
+
+
+def test_unknown_priority_class_rejected():
+    d = Dispatcher(runner=lambda g: g)
+    with pytest.raises(ValueError):
+        d.submit(_graph("p"), priority="urgent")
+
+
+def test_next_returns_none_when_empty():
+    assert Dispatcher(runner=lambda g: g).run_next(timeout=0) is None
+
+
+# ----------------------------------------------------------------------
+def test_deadline_flows_served_earliest_deadline_first():
+    d = Dispatcher(runner=lambda g: g, default_latency=0.01)
+    for _ in range(3):
+        d.submit(_graph("pipeline.onboarding.v0"))
+    now = time.time()
+    d.submit(_graph("late", deadline=now + 60))
+    d.submit(_graph("soon", slo_seconds=10))
+
+    order = [i.graph["id"] for i in _drain(d)]
+    assert order[:2] == ["soon", "late"]
+
+
+def test_infeasible_deadline_rejected():
+    d = Dispatcher(runner=lambda g: g, default_latency=5.0)
+    with pytest.raises(AdmissionRejected):
+        d.submit(_graph("provision", slo_seconds=1))
+    assert len(d) == 0
+
+
+def test_admission_uses_queue_depth_and_history():
+    d = Dispatcher(runner=lambda g: g, default_latency=1.0, workers=1)
+    d.observe_latency("provision", 2.0)
+    d.submit(_graph("provision", slo_seconds=5))
+    d.submit(_graph("provision", slo_seconds=5))
+    # A third run would finish ~6s out
+    with pytest.raises(AdmissionRejected):
+        d.submit(_graph("provision", slo_seconds=5))
+
+
+def test_admission_protects_already_admitted_flows():
+    d = Dispatcher(runner=lambda g: g, default_latency=2.0)
+    d.submit(_graph("a", slo_seconds=3))
+    # Feasible on its own, but would push "a" past its deadline
+    with pytest.raises(AdmissionRejected):
+        d.submit(_graph("b", slo_seconds=2.5))
+
+
+def test_degrade_policy_demotes_to_best_effort():
+    d = Dispatcher(runner=lambda g: g, default_latency=5.0, deadline_policy="degrade")
+    item = d.submit(_graph("pipeline.analytics.v0", slo_seconds=1))
+    assert item.degraded
+    assert item.deadline is None
+    assert d.depth("batch") == 1
+
+
+def test_run_next_records_latency():
+    d = Dispatcher(runner=lambda g: g["id"], default_latency=1.0)
+    d.submit(_graph("fast", slo_seconds=30))
+    assert d.run_next(timeout=0) == "fast"
+    assert d.expected_latency("fast") < 1.0
@@ -0,0 +1,47 @@
+"""Sequential testing tests — validity under peeking and early decisions."""
+
+import os, sys
+import numpy as np
+
+_current_file_dir = os.path.dirname(os.path.abspath(__file__))
+_project_mvp_root_dir = os.path.dirname(_current_file_dir)
+if _project_mvp_root_dir not in sys.path:
+    sys.path.insert(0, _project_mvp_root_dir)
+
+from src import sequential
+
+
+def test_interval_holds_at_every_sample_size():
+    # Peeking after every outcome: the true rate must stay inside the
+    # interval for the whole run in >= 1 - alpha of the runs.
+    rng = np.random.default_rng(0)
+    runs, n, rate = 300, 2000, 0.3
+    outcomes = rng.random((runs, n)) < rate
+    successes = np.cumsum(outcomes, axis=1)
+    failures = np.arange(1, n + 1) - successes
+    lower, upper = sequential.confidence_sequence(successes, failures, alpha=0.05)
+    ever_missed = ((lower > rate) | (upper < rate)).any(axis=1)
+    assert ever_missed.mean() <= 0.05
+
+
+def test_bounds_shrink_and_untried_variants_are_open():
+    lower, upper = sequential.confidence_sequence([0, 10, 100], [0, 10, 100])
+    assert (lower[0], upper[0]) == (0.0, 1.0)
+    assert upper[2] - lower[2] < upper[1] - lower[1]
+
+
+def test_clear_difference_is_decided():
+    result = sequential.evaluate(["a", "b"], [60, 140], [140, 60])
+    assert result["a"]["status"] == sequential.LOSER
+    assert result["b"]["status"] == sequential.WINNER
+    assert result["b"]["lower"] > result["a"]["upper"]
+
+    # An untried variant could still be better: no winner, but "a" is out
+    result = sequential.evaluate(["a", "b", "c"], [60, 140, 0], [140, 60, 0])
+    assert [result[v]["status"] for v in "abc"] == ["loser", "running", "running"]
+
+
+def test_equal_variants_keep_running():
+    result = sequential.evaluate(["a", "b"], [500, 510], [500, 490])
+    assert {info["status"] for info in result.values()} == {sequential.RUNNING}
+    assert sequential.evaluate([], [], []) == {}